@@ -0,0 +1,120 @@
+"""
+Compare ChangeEvent and CompactChangeEvent on the report's hot path.
+
+For each form this measures events per second for creating events and for
+a full report pass (creation, ``chunk_interval`` and the metrics), and the
+bytes allocated per event, excluding the field values shared by both.
+
+    python -m benchmarks.change_events --events 100000
+"""
+
+import argparse
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from dora_report import metrics
+from dora_report.main import chunk_interval
+from dora_report.models import ChangeEvent, CompactChangeEvent
+
+
+def make_fields(count: int) -> list:
+    """Field tuples of ``count`` events, one every five minutes."""
+    start = datetime(2024, 1, 1)
+    return [
+        (
+            f"{i:040x}",
+            start + timedelta(minutes=5 * i),
+            i % 7 != 0,
+            timedelta(hours=i % 48),
+        )
+        for i in range(count)
+    ]
+
+
+def create_validated(fields) -> list:
+    return [
+        ChangeEvent(identifier=i, stamp=s, success=ok, lead_time=lead)
+        for i, s, ok, lead in fields
+    ]
+
+
+def create_compact(fields) -> list:
+    return [CompactChangeEvent(i, s, ok, lead) for i, s, ok, lead in fields]
+
+
+FORMS = {"ChangeEvent": create_validated, "CompactChangeEvent": create_compact}
+
+
+def report_pass(create, fields):
+    """Create events and aggregate them per day like DoraReport.analyze."""
+    events = create(fields)
+    since = fields[0][1]
+    until = fields[-1][1]
+    for chunk in chunk_interval(iter(events), since=since, size=86400, until=until):
+        metrics.change_frequency(chunk["events"], timedelta(days=1))
+        metrics.change_failure_rate(chunk["events"])
+        metrics.mean_time_to_recover(chunk["events"])
+        metrics.lead_time_for_changes(chunk["events"])
+
+
+def events_per_second(function, fields, repeat: int) -> float:
+    best = min(_timed(function, fields) for _ in range(repeat))
+    return len(fields) / best
+
+
+def _timed(function, fields) -> float:
+    started = time.perf_counter()
+    function(fields)
+    return time.perf_counter() - started
+
+
+def bytes_per_event(create, fields) -> float:
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        events = create(fields)
+        after, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del events
+    return (after - before) / len(fields)
+
+
+def run(count: int, repeat: int) -> dict:
+    """
+    Benchmark both forms.
+
+    :return: A dict of form name to ``create_per_second``,
+             ``report_per_second`` and ``bytes_per_event``.
+    """
+    fields = make_fields(count)
+    results = {}
+    for name, create in FORMS.items():
+        results[name] = {
+            "create_per_second": events_per_second(create, fields, repeat),
+            "report_per_second": events_per_second(
+                lambda f: report_pass(create, f), fields, repeat
+            ),
+            "bytes_per_event": bytes_per_event(create, fields),
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--events", type=int, default=100_000, help="Events per run")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs, the best is kept")
+    args = parser.parse_args()
+
+    results = run(args.events, args.repeat)
+    print(f"{'Form':<20} {'Create/s':>12} {'Report/s':>12} {'Bytes/event':>12}")
+    for name, result in results.items():
+        print(
+            f"{name:<20} {result['create_per_second']:>12,.0f} "
+            f"{result['report_per_second']:>12,.0f} {result['bytes_per_event']:>12,.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,275 @@
+"""
+Generate git repositories of merged feature branches with ``git fast-import``.
+
+The history is a mainline of merges. Every feature branch starts from one
+of the last mainline commits, has a few commits touching its own file and
+is merged with ``--no-ff`` semantics. Merges succeed or fail in streaks;
+successful merges are tagged after the tag pattern, annotated or
+lightweight, and some failures carry tags the pattern does not match. A
+share of branches can have their commits back-dated, as a skewed clock would,
+to exercise walks that order commits by date. The same seed gives the same
+repository, down to the commit hashes.
+
+The whole history is streamed to a single ``git fast-import``, so tens of
+thousands of merges take seconds instead of one ``git commit`` at a time.
+
+    python -m benchmarks.git_fixture /tmp/repo --merges 20000 --seed 1
+"""
+
+import argparse
+import os
+import random
+import subprocess
+import tempfile
+from datetime import datetime, timezone
+from typing import Dict, List
+
+AUTHOR = "Fixture <fixture@example.com>"
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+# Scratch branch the feature commits are written on, deleted afterwards
+FEATURE_REF = "refs/heads/fixture-feature"
+
+
+def _data(text: str) -> List[bytes]:
+    data = text.encode()
+    return [b"data %d\n" % len(data), data, b"\n"]
+
+
+class FixtureHistory:
+    """
+    Seeded history of merges, written as a ``git fast-import`` stream.
+
+    :param merges: Number of merges on the mainline.
+    :type merges: int
+    :param seed: Seed of the topology, timing and outcomes.
+    :type seed: int
+    :param branch_length: Smallest and largest number of commits per branch.
+    :type branch_length: tuple
+    :param base_depth: Branches start from one of this many last mainline
+                       commits.
+    :type base_depth: int
+    :param failure_probability: Probability that a merge after a success
+                                starts a failure streak.
+    :type failure_probability: float
+    :param streak_mean: Mean length of failure streaks, in merges.
+    :type streak_mean: float
+    :param tag_pattern: Name of the tag of successful merge ``n``, formatted
+                        with ``n``.
+    :type tag_pattern: str
+    :param annotated_ratio: Share of annotated tags, the others are
+                            lightweight.
+    :type annotated_ratio: float
+    :param other_tag_ratio: Share of failed merges tagged with a name the
+                            pattern does not match.
+    :type other_tag_ratio: float
+    :param spacing: Largest number of seconds between two commits.
+    :type spacing: int
+    :param skew: Share of branches whose commits are dated up to
+                 ``max_skew`` seconds before the commit they branch from.
+    :type skew: float
+    :param max_skew: Largest back-dating of a skewed branch, in seconds.
+    :type max_skew: int
+    """
+
+    def __init__(
+        self,
+        merges: int = 1000,
+        seed: int = 0,
+        branch_length: tuple = (1, 4),
+        base_depth: int = 3,
+        failure_probability: float = 0.2,
+        streak_mean: float = 2.0,
+        tag_pattern: str = "build-{}",
+        annotated_ratio: float = 0.5,
+        other_tag_ratio: float = 0.1,
+        spacing: int = 3600,
+        skew: float = 0.0,
+        max_skew: int = 30 * 86400,
+    ):
+        if branch_length[0] < 1 or branch_length[0] > branch_length[1]:
+            raise ValueError("Branches have at least one commit.")
+        if base_depth < 1 or streak_mean < 1:
+            raise ValueError("Base depth and streak mean must be at least 1.")
+        self.merges = merges
+        self.seed = seed
+        self.branch_length = branch_length
+        self.base_depth = base_depth
+        self.failure_probability = failure_probability
+        self.streak_mean = streak_mean
+        self.tag_pattern = tag_pattern
+        self.annotated_ratio = annotated_ratio
+        self.other_tag_ratio = other_tag_ratio
+        self.spacing = spacing
+        self.skew = skew
+        self.max_skew = max_skew
+        # Filled while the stream is written, one dict per merge
+        self.expected: List[Dict] = []
+
+    def stream(self):
+        """
+        Yield the fast-import stream in chunks of bytes.
+
+        Also fills :attr:`expected` with the mark, commit time, tags,
+        outcome, branch root time and whether the branch is back-dated of
+        every merge, oldest first.
+        """
+        rng = random.Random(self.seed)
+        stamp = int(START.timestamp())
+        mark = 0
+        self.expected = []
+
+        def commit(ref, message, parents, path=None, backdate=0):
+            nonlocal mark, stamp
+            mark += 1
+            stamp += rng.randint(1, self.spacing)
+            person = f"{AUTHOR} {stamp - backdate} +0000\n".encode()
+            lines = [b"commit %s\nmark :%d\n" % (ref.encode(), mark)]
+            lines += [b"author " + person, b"committer " + person, *_data(message)]
+            if parents:
+                lines.append(b"from :%d\n" % parents[0])
+            lines += [b"merge :%d\n" % parent for parent in parents[1:]]
+            if path:
+                lines.append(b"M 100644 inline %s\n" % path.encode())
+                lines += _data(f"{message}\n")
+            lines.append(b"\n")
+            return mark, stamp - backdate, b"".join(lines)
+
+        def tag(name, target, annotated):
+            if annotated:
+                person = f"{AUTHOR} {stamp} +0000\n".encode()
+                lines = [b"tag %s\nfrom :%d\ntagger " % (name.encode(), target), person]
+                return b"".join(lines + _data(f"Tag {name}\n"))
+            return b"reset refs/tags/%s\nfrom :%d\n\n" % (name.encode(), target)
+
+        head, _, chunk = commit("refs/heads/master", "Initial commit", [], "README")
+        yield chunk
+        mainline = [head]
+        failing = False
+        for number in range(self.merges):
+            base = mainline[-rng.randint(1, min(self.base_depth, len(mainline)))]
+            parent = base
+            root_time = None
+            chunks = []
+            # Drawn only when enabled, so unskewed seeds keep their history
+            skewed = bool(self.skew) and rng.random() < self.skew
+            backdate = rng.randint(self.spacing, self.max_skew) if skewed else 0
+            for position in range(rng.randint(*self.branch_length)):
+                parent, commit_time, chunk = commit(
+                    FEATURE_REF,
+                    f"Feature {number} commit {position}",
+                    [parent],
+                    f"features/{number}.txt",
+                    backdate,
+                )
+                root_time = root_time or commit_time
+                chunks.append(chunk)
+            head, merge_time, chunk = commit(
+                "refs/heads/master", f"Merge feature {number}", [mainline[-1], parent]
+            )
+            chunks.append(chunk)
+            mainline.append(head)
+
+            # Streaks of failures between runs of successes
+            if failing:
+                failing = rng.random() >= 1 / self.streak_mean
+            else:
+                failing = rng.random() < self.failure_probability
+            tags = []
+            if not failing:
+                tags.append(self.tag_pattern.format(number))
+            elif rng.random() < self.other_tag_ratio:
+                tags.append(f"wip-{number}")
+            for name in tags:
+                chunks.append(tag(name, head, rng.random() < self.annotated_ratio))
+            self.expected.append(
+                {
+                    "mark": head,
+                    "timestamp": merge_time,
+                    "tags": tags,
+                    "success": not failing,
+                    "branch_root_time": root_time,
+                    "skewed": skewed,
+                }
+            )
+            yield b"".join(chunks)
+
+
+def build_repository(path: str, merges: int = 1000, seed: int = 0, commit_graph: bool = False, **options) -> List[Dict]:  # noqa: E501
+    """
+    Create a repository at ``path`` from a :class:`FixtureHistory`.
+
+    :param path: Directory of the new repository, created if missing.
+    :type path: str
+    :param merges: Number of merges.
+    :type merges: int
+    :param seed: Seed of the history.
+    :type seed: int
+    :param commit_graph: Whether to write a commit-graph file too.
+    :type commit_graph: bool
+    :param options: Other :class:`FixtureHistory` parameters.
+    :return: The expected merges, oldest first, with their commit ``hash``.
+    :rtype: List[Dict]
+    """
+    os.makedirs(path, exist_ok=True)
+    subprocess.run(["git", "init", "-q", "-b", "master", path], check=True)
+    history = FixtureHistory(merges, seed, **options)
+    with tempfile.TemporaryDirectory() as directory:
+        marks = os.path.join(directory, "marks")
+        process = subprocess.Popen(
+            ["git", "-C", path, "fast-import", "--quiet", f"--export-marks={marks}"],
+            stdin=subprocess.PIPE,
+        )
+        try:
+            for chunk in history.stream():
+                process.stdin.write(chunk)
+        finally:
+            process.stdin.close()
+            if process.wait():
+                raise RuntimeError(f"git fast-import failed with status {process.returncode}")  # noqa: E501
+        with open(marks) as f:
+            hashes = dict(line.split() for line in f)
+    subprocess.run(["git", "-C", path, "update-ref", "-d", FEATURE_REF], check=True)
+    if commit_graph:
+        subprocess.run(
+            ["git", "-C", path, "commit-graph", "write", "--reachable"],
+            check=True,
+            capture_output=True,
+        )
+    for merge in history.expected:
+        merge["hash"] = hashes[f":{merge['mark']}"]
+    return history.expected
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("path", help="Directory of the new repository")
+    parser.add_argument("--merges", type=int, default=1000, help="Number of merges")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the history")
+    parser.add_argument("--min-branch", type=int, default=1, help="Fewest commits per branch")  # noqa: E501
+    parser.add_argument("--max-branch", type=int, default=4, help="Most commits per branch")  # noqa: E501
+    parser.add_argument("--failure-probability", type=float, default=0.2, help="Probability that a merge after a success starts a failure streak")  # noqa: E501
+    parser.add_argument("--streak-mean", type=float, default=2.0, help="Mean length of failure streaks")  # noqa: E501
+    parser.add_argument("--tag-pattern", default="build-{}", help="Tag name of successful merge {}")  # noqa: E501
+    parser.add_argument("--annotated-ratio", type=float, default=0.5, help="Share of annotated tags")  # noqa: E501
+    parser.add_argument("--skew", type=float, default=0.0, help="Share of branches with back-dated commits")  # noqa: E501
+    parser.add_argument("--commit-graph", action="store_true", help="Write a commit-graph file")  # noqa: E501
+    args = parser.parse_args()
+
+    expected = build_repository(
+        args.path,
+        args.merges,
+        args.seed,
+        commit_graph=args.commit_graph,
+        branch_length=(args.min_branch, args.max_branch),
+        failure_probability=args.failure_probability,
+        streak_mean=args.streak_mean,
+        tag_pattern=args.tag_pattern,
+        annotated_ratio=args.annotated_ratio,
+        skew=args.skew,
+    )
+    successes = sum(merge["success"] for merge in expected)
+    print(f"{args.path}: {len(expected)} merges, {successes} successful")
+
+
+if __name__ == "__main__":
+    main()
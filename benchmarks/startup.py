@@ -0,0 +1,131 @@
+"""
+Measure the import time of the report with ``python -X importtime``.
+
+Every scenario imports ``dora_report.main`` in a fresh interpreter, alone or
+followed by the collector of a subcommand, and the best cumulative import
+time of a few runs is compared with a budget. The report alone must not
+import collector dependencies such as faker, and ``--help`` must not import
+pydantic, which is only needed to validate events.
+
+    python -m benchmarks.startup --budget-ms 400
+"""
+
+import argparse
+import subprocess
+import sys
+
+# Modules only a collector may import
+COLLECTOR_MODULES = ("faker", "merge_commits_with_tags", "dora_report.plugins.fake")
+# Modules only event validation may import
+VALIDATION_MODULES = ("pydantic",)
+
+# Runs the report's --help after importing it
+HELP_CODE = """import sys
+import dora_report.main
+sys.argv = ["dora_report.main", "--help"]
+try:
+    dora_report.main.main()
+except SystemExit:
+    pass"""
+
+
+def scenario_code(collector: str = None) -> str:
+    """Python code importing the report and optionally a collector."""
+    code = "import dora_report.main"
+    if collector:
+        code += (
+            "\nfrom dora_report.plugins import collector_entry_points"
+            f"\ncollector_entry_points()[{collector!r}].load()"
+        )
+    return code
+
+
+def import_profile(code: str) -> tuple:
+    """
+    Run code in a fresh interpreter with ``-X importtime``.
+
+    :return: The total import time in seconds and the imported modules.
+    :rtype: tuple
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    imports = []
+    total = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        imports.append(name.strip())
+        # Top-level imports are not indented
+        if not name.startswith("  "):
+            total += int(cumulative)
+    return total / 1e6, imports
+
+
+def run(collectors, repeat: int) -> dict:
+    """
+    Profile the report alone and with each collector.
+
+    :return: A dict of scenario name to ``seconds`` (best of ``repeat``)
+             and ``modules`` imported, ``help`` being the report's ``--help``.
+    """
+    results = {}
+    profiles = [import_profile(HELP_CODE) for _ in range(repeat)]
+    results["help"] = {
+        "seconds": min(seconds for seconds, _ in profiles),
+        "modules": profiles[0][1],
+    }
+    for collector in [None, *collectors]:
+        profiles = [import_profile(scenario_code(collector)) for _ in range(repeat)]
+        results[collector or "report"] = {
+            "seconds": min(seconds for seconds, _ in profiles),
+            "modules": profiles[0][1],
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--collectors",
+        nargs="*",
+        default=["example_plugin", "git_merge"],
+        help="Also measure the report with the collectors of these subcommands",
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="Runs, the best is kept")
+    parser.add_argument(
+        "--budget-ms",
+        type=float,
+        default=400,
+        help="Largest import time of the report alone, in milliseconds",
+    )
+    args = parser.parse_args()
+
+    results = run(args.collectors, args.repeat)
+    print(f"{'Scenario':<20} {'Import ms':>10}")
+    for name, result in results.items():
+        print(f"{name:<20} {result['seconds'] * 1000:>10.1f}")
+
+    failures = []
+    report = results["report"]
+    if report["seconds"] * 1000 > args.budget_ms:
+        failures.append(
+            f"report imports in {report['seconds'] * 1000:.1f}ms, over {args.budget_ms:.0f}ms"
+        )
+    for module in COLLECTOR_MODULES:
+        if module in report["modules"]:
+            failures.append(f"report imports {module} before a collector is selected")
+    for module in VALIDATION_MODULES:
+        if module in results["help"]["modules"]:
+            failures.append(f"report --help imports {module}")
+    for failure in failures:
+        print(failure, file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,293 @@
+"""
+Benchmark the report's hot paths and compare them with a baseline.
+
+Every benchmark runs for each of its input sizes, event counts for
+``chunk_interval``, the metrics and ``Record.json``, merge counts for
+``get_merge_commits`` and the lead times, and keeps the best time of a few
+runs. Results are saved as JSON; compared with a baseline, a benchmark
+more than its threshold slower fails the run.
+
+    python -m benchmarks.suite --events 10000,100000 --merges 1000 --output results.json
+    python -m benchmarks.suite --baseline benchmarks/baseline.json --threshold 0.3
+    python -m benchmarks.suite --update-baseline benchmarks/baseline.json
+
+Merge benchmarks run on repositories from ``benchmarks.git_fixture``.
+Baselines are machine specific: record one on the machine that compares.
+"""
+
+import argparse
+import atexit
+import gc
+import json
+import logging
+import math
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Callable, Dict, List, Tuple
+
+from benchmarks.git_fixture import build_repository
+from dora_report import metrics
+from dora_report.columns import EventColumns
+from dora_report.main import Record, chunk_interval
+from dora_report.plugins.synthetic import SyntheticCollector
+from merge_commits_with_tags import (
+    calculate_lead_times,
+    close_git_sessions,
+    get_merge_commits,
+    load_commit_graph,
+)
+from rolling import parse_sizes
+
+# Benchmark name to (input kind, setup); setup(size) returns the function
+# to time and the number of items it handles
+BENCHMARKS: Dict[str, Tuple[str, Callable]] = {}
+
+SINCE = datetime(2024, 1, 1)
+
+
+def benchmark(name: str, kind: str):
+    """Register a benchmark setup taking a size of ``kind`` inputs."""
+
+    def register(setup):
+        BENCHMARKS[name] = (kind, setup)
+        return setup
+
+    return register
+
+
+def synthetic_events(count: int) -> list:
+    """``count`` reproducible events over about a year."""
+    collector = SyntheticCollector(
+        logging.getLogger(__name__),
+        SINCE,
+        SINCE + timedelta(days=3650),
+        seed=1,
+        rate=count / 365,
+        unknown_probability=0.05,
+    )
+    events = []
+    for event in collector.collect_change_events():
+        events.append(event)
+        if len(events) == count:
+            break
+    return events
+
+
+@benchmark("chunk_interval", "events")
+def setup_chunk_interval(count: int):
+    events = synthetic_events(count)
+    until = events[-1].stamp
+
+    def run():
+        for _ in chunk_interval(iter(events), since=SINCE, size=86400, until=until):
+            pass
+
+    return run, count
+
+
+@benchmark("metrics.reference", "events")
+def setup_reference_metrics(count: int):
+    events = synthetic_events(count)
+    return lambda: metrics.reference_metrics(events, timedelta(days=365)), count
+
+
+@benchmark("metrics.accumulator", "events")
+def setup_accumulator(count: int):
+    events = synthetic_events(count)
+    return lambda: metrics.MetricAccumulator().update(events).metrics(timedelta(days=365)), count
+
+
+@benchmark("metrics.vectorized", "events")
+def setup_vectorized(count: int):
+    columns = EventColumns.from_events(synthetic_events(count))
+
+    def run():
+        metrics.change_frequency_vectorized(columns, timedelta(days=365))
+        metrics.change_failure_rate_vectorized(columns)
+        metrics.mean_time_to_recover_vectorized(columns)
+        metrics.lead_time_for_changes_vectorized(columns)
+
+    return run, count
+
+
+@benchmark("Record.json", "events")
+def setup_record_json(count: int):
+    # ``count`` records with the fields of a busy interval
+    fields = metrics.MetricAccumulator().update(synthetic_events(1000)).metrics(timedelta(days=1))
+    records = [
+        Record(start=SINCE, end=SINCE + timedelta(days=1), duration=timedelta(days=1), **fields)
+        for _ in range(count)
+    ]
+
+    def run():
+        for record in records:
+            record.json()
+
+    return run, count
+
+
+@lru_cache(maxsize=None)
+def fixture_repository(count: int) -> tuple:
+    """A temporary fast-import repository of ``count`` merges and its merges."""
+    directory = tempfile.mkdtemp(prefix="dora-bench-")
+    atexit.register(shutil.rmtree, directory, ignore_errors=True)
+    return directory, build_repository(directory, count, seed=1)
+
+
+@benchmark("get_merge_commits", "merges")
+def setup_get_merge_commits(count: int):
+    directory, _ = fixture_repository(count)
+
+    def run():
+        get_merge_commits(directory, "", "", "build-*")
+        close_git_sessions()
+
+    return run, count
+
+
+@benchmark("calculate_lead_times", "merges")
+def setup_calculate_lead_times(count: int):
+    directory, expected = fixture_repository(count)
+    merges = [{"hash": merge["hash"], "timestamp": merge["timestamp"]} for merge in expected]
+    log = logging.getLogger(__name__)
+
+    def run():
+        commit_graph = load_commit_graph(directory, log=log)
+        calculate_lead_times(merges, directory, log, commit_graph=commit_graph)
+        close_git_sessions()
+
+    return run, count
+
+
+# Shortest sample measured; faster functions run several times per sample
+MIN_SAMPLE_SECONDS = 0.05
+
+
+def measure(function: Callable, repeat: int) -> float:
+    """
+    Best wall time of a call out of ``repeat`` samples, in seconds.
+
+    Samples of fast functions loop over several calls so that timer
+    resolution and scheduling noise do not dominate, and the garbage
+    collector is off while timing, like in ``timeit``.
+    """
+    started = time.perf_counter()
+    function()
+    loops = max(1, math.ceil(MIN_SAMPLE_SECONDS / max(time.perf_counter() - started, 1e-9)))
+    best = float("inf")
+    gc.collect()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            started = time.perf_counter()
+            for _ in range(loops):
+                function()
+            best = min(best, (time.perf_counter() - started) / loops)
+    finally:
+        gc.enable()
+    return best
+
+
+def run(sizes: Dict[str, List[int]], repeat: int, names: List[str] = None) -> Dict:
+    """
+    Run the benchmarks for every size of their input kind.
+
+    :param sizes: Input sizes by kind, ``events`` and ``merges``.
+    :return: Results keyed ``name[size]``, each with ``seconds`` and
+             ``per_second``.
+    """
+    results = {}
+    for name, (kind, setup) in BENCHMARKS.items():
+        if names and name not in names:
+            continue
+        for size in sizes[kind]:
+            function, items = setup(size)
+            seconds = measure(function, repeat)
+            results[f"{name}[{size}]"] = {
+                "seconds": seconds,
+                "per_second": items / seconds if seconds else float("inf"),
+            }
+    return results
+
+
+def compare(results: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """
+    Compare results with a baseline.
+
+    A result fails when it takes more than ``1 + threshold`` times its
+    baseline; the baseline may set ``thresholds`` by benchmark name to
+    override the default. Benchmarks missing on either side are skipped.
+
+    :return: A message per regression.
+    :rtype: List[str]
+    """
+    thresholds = baseline.get("thresholds", {})
+    regressions = []
+    for key, result in results.items():
+        expected = baseline.get("results", {}).get(key)
+        if expected is None:
+            continue
+        allowed = thresholds.get(key.split("[")[0], threshold)
+        ratio = result["seconds"] / expected["seconds"]
+        if ratio > 1 + allowed:
+            regressions.append(
+                f"{key} took {result['seconds'] * 1000:.1f}ms, {ratio:.2f}x the baseline {expected['seconds'] * 1000:.1f}ms (allowed {1 + allowed:.2f}x)"  # noqa: E501
+            )
+    return regressions
+
+
+def environment() -> Dict:
+    return {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "system": platform.system(),
+        "recorded": datetime.now().isoformat(timespec="seconds"),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--events", type=parse_sizes, default=[10_000, 100_000], help="Event counts, comma separated")  # noqa: E501
+    parser.add_argument("--merges", type=parse_sizes, default=[1000, 10000], help="Merge counts, comma separated")  # noqa: E501
+    parser.add_argument("--repeat", type=int, default=5, help="Samples, the best is kept")
+    parser.add_argument("--only", action="append", choices=sorted(BENCHMARKS), help="Run only this benchmark, repeatable")  # noqa: E501
+    parser.add_argument("--output", default=None, help="Save the results to this JSON file")  # noqa: E501
+    parser.add_argument("--baseline", default=None, help="Compare with this JSON baseline")  # noqa: E501
+    parser.add_argument("--threshold", type=float, default=0.3, help="Allowed slowdown over the baseline, 0.3 for 30%%")  # noqa: E501
+    parser.add_argument("--update-baseline", default=None, help="Write the results as the baseline, keeping its thresholds")  # noqa: E501
+    args = parser.parse_args()
+
+    results = run({"events": args.events, "merges": args.merges}, args.repeat, args.only)
+    print(f"{'Benchmark':<36} {'ms':>10} {'Items/s':>14}")
+    for key, result in results.items():
+        print(f"{key:<36} {result['seconds'] * 1000:>10.2f} {result['per_second']:>14,.0f}")
+
+    document = {"environment": environment(), "results": results}
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(document, f, indent=2)
+    if args.update_baseline:
+        thresholds = {}
+        if os.path.exists(args.update_baseline):
+            with open(args.update_baseline) as f:
+                thresholds = json.load(f).get("thresholds", {})
+        with open(args.update_baseline, "w") as f:
+            json.dump({**document, "thresholds": thresholds}, f, indent=2)
+            f.write("\n")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
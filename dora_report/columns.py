@@ -0,0 +1,123 @@
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, Optional
+
+import numpy as np
+
+from dora_report.events import AnyChangeEvent
+
+# Tri-state codes of the success column
+SUCCESS = 1
+FAILURE = 0
+UNKNOWN = -1
+
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+
+
+def to_epoch_us(stamp: datetime) -> int:
+    """
+    Convert a datetime to integer microseconds since the epoch.
+
+    Naive datetimes are taken as they are, aware ones are converted to UTC
+    first, so differences between stamps stay exact.
+    """
+    if stamp.tzinfo is not None:
+        stamp = stamp.astimezone(timezone.utc).replace(tzinfo=None)
+    return (stamp - EPOCH) // MICROSECOND
+
+
+def from_epoch_us(value: int) -> datetime:
+    """
+    Convert integer microseconds since the epoch to a naive datetime.
+    """
+    return EPOCH + timedelta(microseconds=int(value))
+
+
+class EventColumns:
+    """
+    Columnar store of change events.
+
+    Events are kept as parallel NumPy arrays instead of objects: int64
+    epoch microseconds for the stamps, int8 tri-state success (``SUCCESS``,
+    ``FAILURE`` or ``UNKNOWN`` for ``None``) and, optionally, int64 lead
+    times in microseconds with a mask of the events that have one. Slicing
+    returns a view sharing the arrays.
+
+    :param stamps: Epoch microseconds of the events, in event order.
+    :type stamps: numpy.ndarray
+    :param success: Tri-state success codes.
+    :type success: numpy.ndarray
+    :param lead_times: Lead times in microseconds, None if no event has one.
+    :type lead_times: numpy.ndarray
+    :param has_lead_time: Which events have a lead time, required with
+                          ``lead_times``.
+    :type has_lead_time: numpy.ndarray
+    :param identifiers: Optional event identifiers.
+    :type identifiers: numpy.ndarray
+    """
+
+    def __init__(
+        self,
+        stamps,
+        success,
+        lead_times=None,
+        has_lead_time=None,
+        identifiers=None,
+    ):
+        self.stamps = np.asarray(stamps, dtype=np.int64)
+        self.success = np.asarray(success, dtype=np.int8)
+        if self.stamps.shape != self.success.shape:
+            raise ValueError("Stamps and success must have the same length.")
+        self.lead_times = None
+        self.has_lead_time = None
+        if lead_times is not None:
+            self.lead_times = np.asarray(lead_times, dtype=np.int64)
+            self.has_lead_time = np.asarray(has_lead_time, dtype=bool)
+        self.identifiers = identifiers
+
+    @classmethod
+    def from_events(cls, events: Iterable[AnyChangeEvent]) -> "EventColumns":
+        """
+        Build the columns from ChangeEvent or CompactChangeEvent objects.
+        """
+        stamps = []
+        success = []
+        lead_times = []
+        identifiers = []
+        for event in events:
+            identifiers.append(event.identifier)
+            stamps.append(to_epoch_us(event.stamp))
+            success.append(UNKNOWN if event.success is None else int(bool(event.success)))
+            lead_times.append(None if event.lead_time is None else event.lead_time // MICROSECOND)
+        has_lead_time = np.array([lead is not None for lead in lead_times], dtype=bool)
+        return cls(
+            np.array(stamps, dtype=np.int64),
+            np.array(success, dtype=np.int8),
+            np.array([lead or 0 for lead in lead_times], dtype=np.int64)
+            if has_lead_time.any()
+            else None,
+            has_lead_time if has_lead_time.any() else None,
+            np.array(identifiers, dtype=object),
+        )
+
+    def __len__(self) -> int:
+        return len(self.stamps)
+
+    def __getitem__(self, index: slice) -> "EventColumns":
+        if not isinstance(index, slice):
+            raise TypeError("EventColumns only supports slicing.")
+        return EventColumns(
+            self.stamps[index],
+            self.success[index],
+            None if self.lead_times is None else self.lead_times[index],
+            None if self.has_lead_time is None else self.has_lead_time[index],
+            None if self.identifiers is None else self.identifiers[index],
+        )
+
+    def lead_time(self, position: int) -> Optional[timedelta]:
+        """
+        Return the lead time of one event, None if it has none.
+        """
+        if self.lead_times is None or not self.has_lead_time[position]:
+            return None
+        return timedelta(microseconds=int(self.lead_times[position]))
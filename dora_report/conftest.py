@@ -1,9 +1,65 @@
-import pytest
 import logging
+import os
+import subprocess
+from datetime import timedelta
+
+import pytest
+
+from dora_report.metrics import PERCENTILES
 
 @pytest.fixture(scope="session")
 def root_logger():
     logging.basicConfig(level=logging.DEBUG, format="[%(levelname)s] %(message)s")
     logger = logging.getLogger("dora_report.test")
     logger.setLevel(logging.DEBUG)
-    return logger
\ No newline at end of file
+    return logger
+
+
+@pytest.fixture
+def assert_metrics_close():
+    """
+    Compare metric fields, exactly but for the histogram percentiles, which
+    may be 1% (and a microsecond of rounding) off.
+    """
+
+    def compare(actual: dict, expected: dict):
+        assert actual.keys() == expected.keys()
+        for key, value in expected.items():
+            if key.rsplit("_", 1)[-1] in PERCENTILES:
+                assert abs(actual[key] - value) <= value * 0.01 + timedelta(microseconds=1), key
+            else:
+                assert actual[key] == value, key
+
+    return compare
+
+
+def run_git(cmd, cwd, stamp=None):
+    env = None
+    if stamp:
+        env = {"GIT_AUTHOR_DATE": stamp, "GIT_COMMITTER_DATE": stamp}
+    subprocess.run(
+        ["git", *cmd],
+        cwd=cwd,
+        check=True,
+        capture_output=True,
+        env={**os.environ, **env} if env else None,
+    )
+
+
+@pytest.fixture
+def git_repository(tmp_path):
+    run_git(["init", "-b", "master"], tmp_path)
+    run_git(["config", "user.email", "test@example.com"], tmp_path)
+    run_git(["config", "user.name", "Test User"], tmp_path)
+    run_git(["commit", "--allow-empty", "-m", "Initial commit"], tmp_path, "2023-01-01T08:00:00")
+    for branch, start, merge, tag in [
+        ("one", "2023-01-01T10:00:00", "2023-01-01T12:00:00", None),
+        ("two", "2023-01-01T11:00:00", "2023-01-01T12:30:00", "build-2"),
+    ]:
+        run_git(["checkout", "-b", branch, "master"], tmp_path)
+        run_git(["commit", "--allow-empty", "-m", branch], tmp_path, start)
+        run_git(["checkout", "master"], tmp_path)
+        run_git(["merge", "--no-ff", branch, "-m", f"Merge {branch}"], tmp_path, merge)
+        if tag:
+            run_git(["tag", tag], tmp_path)
+    return tmp_path
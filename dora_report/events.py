@@ -0,0 +1,50 @@
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, NamedTuple, Optional, Union
+
+if TYPE_CHECKING:
+    from dora_report.models import ChangeEvent
+
+class CompactChangeEvent(NamedTuple):
+    """
+    Tuple form of :class:`~dora_report.models.ChangeEvent` for hot paths.
+
+    It has the same fields, so ``chunk_interval`` and the ``metrics``
+    functions take either form, but creating one does no validation and
+    instances carry no ``__dict__``. Trusted collectors yield them directly,
+    :func:`~dora_report.models.compact_events` validates everything else.
+    The module does not import pydantic, which is only loaded to validate.
+
+    :param identifier: A unique identifier for the change event.
+    :type identifier: str
+    :param stamp: The timestamp of when the event occurred.
+    :type stamp: datetime
+    :param success: Indicates whether the change was successful.
+    :type success: bool
+    :param lead_time: Time between work on the change started and the
+                      change was registered, if known.
+    :type lead_time: timedelta
+    """
+    identifier: str
+    stamp: datetime
+    success: Optional[bool]
+    lead_time: Optional[timedelta] = None
+
+    @classmethod
+    def from_event(cls, event: "ChangeEvent") -> "CompactChangeEvent":
+        """
+        Copy the fields of a validated ChangeEvent.
+        """
+        return cls(event.identifier, event.stamp, event.success, event.lead_time)
+
+    def validate(self) -> "CompactChangeEvent":
+        """
+        Validate and coerce the fields the way ChangeEvent does.
+
+        :raises pydantic.ValidationError: If a field is invalid.
+        """
+        from dora_report.models import ChangeEvent
+
+        return self.from_event(ChangeEvent(**self._asdict()))
+
+
+AnyChangeEvent = Union["ChangeEvent", CompactChangeEvent]
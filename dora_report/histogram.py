@@ -0,0 +1,129 @@
+from math import ceil, log
+from array import array
+from bisect import bisect_left
+from itertools import accumulate
+from typing import Iterable
+
+
+class LogHistogram:
+    """
+    Fixed-memory histogram of non-negative values with logarithmic buckets.
+
+    Bucket ``k + 1`` holds the values in ``(gamma ** (k - 1), gamma ** k]``
+    with ``gamma = (1 + relative_error) / (1 - relative_error)`` and reports
+    them as ``2 * gamma ** k / (gamma + 1)``, at most ``relative_error``
+    away from any of them. A quantile is therefore within
+    ``relative_error`` of the exact nearest-rank quantile of the values
+    recorded, for values from 1 to ``highest``. Values below 1 count as
+    zero (an absolute error below 1), larger values than ``highest`` as
+    ``highest`` and negative values as zero.
+
+    With the defaults and values in microseconds the histogram spans 1µs to
+    about 285 years at 1% error in 1,839 buckets. Histograms with the same
+    parameters merge by adding their counts, and values can be removed
+    again, so partial results combine and windows slide.
+
+    :param relative_error: Largest relative error of a quantile.
+    :type relative_error: float
+    :param highest: Largest value told apart.
+    :type highest: float
+    """
+
+    def __init__(self, relative_error: float = 0.01, highest: float = 2.0**53):
+        if not 0 < relative_error < 1:
+            raise ValueError("Relative error must be between 0 and 1.")
+        self.relative_error = relative_error
+        self.highest = highest
+        self.gamma = (1 + relative_error) / (1 - relative_error)
+        self.log_gamma = log(self.gamma)
+        self._scale = 1 / self.log_gamma
+        # Bucket 0 holds the values below 1
+        self.counts = array("q", bytes(8 * (self._bucket(highest) + 1)))
+        self.count = 0
+
+    def _bucket(self, value: float) -> int:
+        if value < 1:
+            return 0
+        if value > self.highest:
+            value = self.highest
+        return ceil(log(value) * self._scale) + 1
+
+    def _value(self, bucket: int) -> float:
+        if bucket == 0:
+            return 0.0
+        return 2 * self.gamma ** (bucket - 1) / (self.gamma + 1)
+
+    def add(self, value: float, count: int = 1):
+        """
+        Record a value ``count`` times.
+        """
+        # _bucket inlined, this is called for every duration
+        if value < 1:
+            bucket = 0
+        else:
+            if value > self.highest:
+                value = self.highest
+            bucket = ceil(log(value) * self._scale) + 1
+        self.counts[bucket] += count
+        self.count += count
+
+    def update(self, values: Iterable[float]):
+        """
+        Record every value of an iterable.
+        """
+        for value in values:
+            self.add(value)
+
+    def remove(self, value: float, count: int = 1):
+        """
+        Forget a value recorded before.
+        """
+        self.add(value, -count)
+
+    def merge(self, other: "LogHistogram") -> "LogHistogram":
+        """
+        Add the counts of another histogram with the same parameters.
+
+        :raises ValueError: If the parameters differ.
+        """
+        if (other.relative_error, other.highest) != (self.relative_error, self.highest):
+            raise ValueError("Only histograms with the same parameters merge.")
+        for bucket, count in enumerate(other.counts):
+            if count:
+                self.counts[bucket] += count
+        self.count += other.count
+        return self
+
+    def quantile(self, q: float) -> float:
+        """
+        Return the nearest-rank quantile ``q`` of the values, 0 if empty.
+
+        :param q: Quantile between 0 and 1, e.g. 0.99.
+        :type q: float
+        """
+        if not self.count:
+            return 0.0
+        rank = max(1, ceil(q * self.count))
+        return self._value(bisect_left(list(accumulate(self.counts)), rank))
+
+    def quantiles(self, qs: Iterable[float]) -> list:
+        """
+        Return several quantiles with a single pass over the buckets.
+        """
+        if not self.count:
+            return [0.0 for _ in qs]
+        cumulative = list(accumulate(self.counts))
+        return [
+            self._value(bisect_left(cumulative, max(1, ceil(q * self.count))))
+            for q in qs
+        ]
+
+
+def nearest_rank(values: list, q: float):
+    """
+    Return the exact nearest-rank quantile ``q`` of values, None if empty.
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(1, ceil(q * len(ordered))) - 1]
@@ -0,0 +1,185 @@
+from collections.abc import Sequence
+from datetime import datetime, timedelta
+from typing import Optional
+
+import numpy as np
+
+from dora_report.columns import FAILURE, MICROSECOND, SUCCESS, UNKNOWN, from_epoch_us, to_epoch_us
+
+
+class Intervals:
+    """
+    Interval boundaries of a report as arrays.
+
+    The intervals start at ``since`` and are ``size`` wide; the last one is
+    cut at ``until`` but keeps the full duration, like the intervals the
+    report always had. An interval holds the events after its start up to
+    and including its end; events before ``since`` fall in the first one.
+
+    :param since: Start of the first interval.
+    :type since: datetime
+    :param size: Interval width in seconds.
+    :type size: float
+    :param until: End of the last interval.
+    :type until: datetime
+    """
+
+    def __init__(self, since: datetime, size: float, until: datetime):
+        self.since = since
+        self.until = until
+        self.duration = timedelta(seconds=size)
+        self.origin = to_epoch_us(since)
+        self.step = self.duration // MICROSECOND
+        if self.step <= 0:
+            raise ValueError("Interval size must be positive.")
+        # Every full interval ends before until, the last one ends at it
+        span = to_epoch_us(until) - self.origin
+        count = max(-(-span // self.step), 1)
+        self.ends = self.origin + self.step * np.arange(1, count + 1, dtype=np.int64)
+        self.ends[-1] = to_epoch_us(until)
+
+    def __len__(self) -> int:
+        return len(self.ends)
+
+    def start(self, index: int) -> datetime:
+        return self.since + self.duration * index
+
+    def end(self, index: int) -> datetime:
+        if index == len(self) - 1:
+            return self.until
+        return self.since + self.duration * (index + 1)
+
+    def locate(self, stamps: np.ndarray) -> np.ndarray:
+        """
+        Return the interval index of every stamp by arithmetic alone.
+
+        Stamps after the last interval get ``len(self)``.
+
+        :param stamps: Epoch microseconds, in any order.
+        :type stamps: numpy.ndarray
+        :return: Interval indexes.
+        :rtype: numpy.ndarray
+        """
+        # An end is inclusive, so a stamp on a boundary belongs to the
+        # interval before it
+        index = np.maximum(-(-(stamps - self.origin) // self.step) - 1, 0)
+        np.minimum(index, len(self) - 1, out=index)
+        index[stamps > self.ends[-1]] = len(self)
+        return index
+
+    def split(self, stamps: np.ndarray) -> np.ndarray:
+        """
+        Return the slice boundaries of the intervals in sorted stamps.
+
+        Interval ``i`` holds the stamps ``[bounds[i], bounds[i + 1])``.
+
+        :param stamps: Epoch microseconds in ascending order.
+        :type stamps: numpy.ndarray
+        :return: ``len(self) + 1`` positions into ``stamps``.
+        :rtype: numpy.ndarray
+        """
+        bounds = np.empty(len(self) + 1, dtype=np.int64)
+        bounds[0] = 0
+        bounds[1:] = np.searchsorted(stamps, self.ends, side="right")
+        return bounds
+
+
+class EventSlice(Sequence):
+    """
+    Read-only view of a range of an event list, without copying it.
+
+    :param events: The underlying events.
+    :type events: list
+    :param start: First position of the view.
+    :type start: int
+    :param stop: Position after the last one of the view.
+    :type stop: int
+    """
+
+    def __init__(self, events: list, start: int, stop: int):
+        self.events = events
+        self.start = start
+        self.stop = stop
+
+    def __len__(self) -> int:
+        return self.stop - self.start
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("EventSlice index out of range")
+        return self.events[self.start + index]
+
+    def __iter__(self):
+        events = self.events
+        for position in range(self.start, self.stop):
+            yield events[position]
+
+    def __eq__(self, other):
+        if not isinstance(other, Sequence) or isinstance(other, str):
+            return NotImplemented
+        return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+
+    def __repr__(self):
+        return f"EventSlice<{list(self)}>"
+
+
+def open_failures(
+    success: np.ndarray,
+    stamps: np.ndarray,
+    stops: np.ndarray,
+    initial: Optional[datetime] = None,
+) -> list:
+    """
+    Return the start of the failure streak still open before each stop.
+
+    A streak opens at a failure and closes at the next success; unknown
+    outcomes neither open nor close one.
+
+    :param success: Tri-state success codes.
+    :type success: numpy.ndarray
+    :param stamps: Epoch microseconds of the events.
+    :type stamps: numpy.ndarray
+    :param stops: Positions to look before.
+    :type stops: numpy.ndarray
+    :param initial: Start of a streak open before the first event.
+    :type initial: datetime
+    :return: A datetime or None per stop.
+    :rtype: list
+    """
+    known = np.flatnonzero(success != UNKNOWN)
+    failed = success[known] == FAILURE
+    starts = known[np.flatnonzero(failed & ~np.concatenate(([False], failed[:-1])))]
+    # The last known outcome before each stop, and the streak it belongs to
+    last = np.searchsorted(known, stops, side="left") - 1
+    result = []
+    for position in last:
+        if position < 0:
+            result.append(initial)
+        elif not failed[position]:
+            result.append(None)
+        else:
+            streak = starts[np.searchsorted(starts, known[position], side="right") - 1]
+            if streak == known[0] and initial is not None:
+                # The streak was already open before the first event
+                result.append(initial)
+            else:
+                result.append(from_epoch_us(stamps[streak]))
+    return result
+
+
+def success_codes(events: list) -> np.ndarray:
+    """
+    Return the tri-state success codes of events.
+    """
+    return np.fromiter(
+        (
+            UNKNOWN if event.success is None else SUCCESS if event.success else FAILURE
+            for event in events
+        ),
+        dtype=np.int8,
+        count=len(events),
+    )
@@ -1,10 +1,30 @@
 from argparse import ArgumentParser
 from datetime import datetime, timedelta
+from itertools import islice
 import json
 import logging
+import sys
+
+import numpy as np
 
 from dora_report import metrics
-from dora_report.plugins import FakeGitMerge
+from dora_report.columns import to_epoch_us
+from dora_report.intervals import EventSlice, Intervals, open_failures, success_codes
+from dora_report.output import SERIALIZERS, RecordWriter
+from dora_report.plugins import collector_entry_points
+import profiling
+from rolling import RollingStats, parse_sizes
+
+# Record fields the moving averages follow
+ROLLING_FIELDS = [
+    "deployment_frequency",
+    "change_failure_rate",
+    "mean_time_to_recover",
+    "lead_time_for_changes",
+]
+
+# Events chunk_interval reads at once
+CHUNK_BLOCK_SIZE = 4096
 
 unit_in_seconds = {
     "d": 60 * 60 * 24,
@@ -21,25 +41,104 @@ class DoraReport:
         self.until = args.until_dt
         self.records = []
         self.log = args.log
+        self.validate = getattr(args, "validate_events", False)
+        # The single-pass accumulator, or the metric functions it replaces
+        self.engine = getattr(args, "metrics_engine", "accumulator")
+        # Width of trailing windows evaluated every interval, if any
+        self.window_seconds = getattr(args, "window_seconds", None)
+        self.windows = getattr(args, "ma", None) or []
+        self.spans = getattr(args, "ema", None) or []
         
     def analyze(self):
+        self.records.extend(self.stream())
+
+    def stream(self):
+        """
+        Yield the records of the collected events without keeping them.
+        """
         self.log.info("Analysing data")
-        event_gen = self.collector.collect_change_events()
-        for chunk in chunk_interval(event_gen, since=self.since, size=self.interval_seconds, until=self.until):
+        events = profiling.iterate("collect", self.collector.collect_change_events(), "events")
+        # Trusted collectors yield CompactChangeEvents that skip validation,
+        # pydantic is only imported for the others
+        if getattr(self.collector, "trusted", False) and not self.validate:
+            event_gen = events
+        else:
+            from dora_report.models import compact_events
+
+            event_gen = compact_events(events)
+        return self.iter_records(profiling.iterate("validate", event_gen))
+
+    def iter_records(self, event_gen):
+        """
+        Yield the record of each interval as soon as it closes.
+
+        The accumulator engine carries the open failure streak and the
+        events waiting for a success from one interval to the next, the
+        reference engine measures every interval on its own. With a window
+        width, the records are of trailing windows instead.
+        """
+        if self.window_seconds:
+            records = self.iter_window_records(event_gen)
+        else:
+            records = self.iter_interval_records(event_gen)
+        rolling = None
+        if self.windows or self.spans:
+            rolling = RollingStats(ROLLING_FIELDS, self.windows, self.spans)
+        for record in records:
+            if rolling is not None:
+                with profiling.stage("metrics"):
+                    record.fields.update(rolling.push(record.fields))
+            yield record
+
+    def iter_interval_records(self, event_gen):
+        duration = timedelta(seconds=self.interval_seconds/unit_in_seconds[self.interval_unit])
+        accumulator = metrics.MetricAccumulator()
+        chunks = chunk_interval(event_gen, since=self.since, size=self.interval_seconds, until=self.until)
+        for chunk in profiling.iterate("chunk", chunks, "intervals"):
             # Aggregate
-            record = Record(
+            with profiling.stage("metrics"):
+                if self.engine == "reference":
+                    fields = metrics.reference_metrics(chunk["events"], duration)
+                else:
+                    fields = accumulator.update(chunk["events"]).metrics(duration)
+                    accumulator = accumulator.carry()
+            yield Record(
                 start=chunk["start"],
                 end=chunk["end"],
                 duration=chunk["duration"],
-                deployment_frequency=metrics.change_frequency(
-                    chunk["events"], 
-                    timedelta(seconds=self.interval_seconds/unit_in_seconds[self.interval_unit]),
-                ),
-                change_failure_rate=metrics.change_failure_rate(chunk["events"]),
-                mean_time_to_recover=metrics.mean_time_to_recover(chunk["events"]),
-                lead_time_for_changes=metrics.lead_time_for_changes(chunk["events"]),
+                **fields,
             ) 
-            self.records.append(record)
+
+    def iter_window_records(self, event_gen):
+        """
+        Yield the record of a trailing window at the end of every interval.
+
+        Two pointers move over the events, oldest first: the newest end
+        adds the events up to the end of the interval and the oldest end
+        removes those that are no longer within the window width, so every
+        event is added and removed once whatever the overlap.
+        """
+        duration = timedelta(seconds=self.window_seconds/unit_in_seconds[self.interval_unit])
+        width = timedelta(seconds=self.window_seconds)
+        intervals = Intervals(self.since, self.interval_seconds, self.until)
+        window = metrics.WindowAccumulator()
+        events = iter(event_gen)
+        event = next(events, None)
+        for index in range(len(intervals)):
+            end = intervals.end(index)
+            with profiling.stage("metrics"):
+                while event is not None and event.stamp <= end:
+                    window.add(event)
+                    event = next(events, None)
+                window.remove_until(end - width)
+                fields = window.metrics(duration)
+            profiling.count("intervals")
+            yield Record(
+                start=end - width,
+                end=end,
+                duration=width,
+                **fields,
+            )
 
  
 class Record:
@@ -73,17 +172,17 @@ class DateTimeEncoder(json.JSONEncoder):
 
 
 def main():
-    collectors = {}
+    collectors = collector_entry_points()
     parser = ArgumentParser()
     
-    # Add subcommand
+    # Add subcommand, the arguments of the selected one are added below
     subparsers = parser.add_subparsers(
         dest="collector_name", 
         help="subcommand help",
     )
-    p1 = subparsers.add_parser(FakeGitMerge.name)
-    FakeGitMerge.add_arguments(p1)
-    collectors[FakeGitMerge.name] = FakeGitMerge
+    plugin_parsers = {
+        name: subparsers.add_parser(name, add_help=False) for name in collectors
+    }
     
     # Add root-level arguments
     parser.add_argument(
@@ -111,11 +210,86 @@ def main():
         default="1m",
         help="Interval size (e.g., 7d, 1w, 1m)",  # noqa: E501
     )
+    parser.add_argument(
+        "--window",
+        required=False,
+        default=None,
+        help="Report trailing windows of this size evaluated every interval (e.g., 28d with --interval 1d)",  # noqa: E501
+    )
+    parser.add_argument(
+        "--validate-events",
+        action="store_true",
+        help="Validate the events of trusted collectors too",  # noqa: E501
+    )
+    parser.add_argument(
+        "--metrics-engine",
+        choices=["accumulator", "reference"],
+        default="accumulator",
+        help="Compute records in a single pass, or with the reference metric functions",  # noqa: E501
+    )
+    parser.add_argument(
+        "--ma",
+        type=parse_sizes,
+        default=[],
+        help="Add simple moving averages of the metrics over these numbers of intervals, comma separated",  # noqa: E501
+    )
+    parser.add_argument(
+        "--ema",
+        type=parse_sizes,
+        default=[],
+        help="Add exponential moving averages of the metrics with these spans, comma separated",  # noqa: E501
+    )
+    parser.add_argument(
+        "--format",
+        choices=sorted(SERIALIZERS),
+        default="ndjson",
+        help="Output format of the records, columnar is binary",  # noqa: E501
+    )
+    parser.add_argument(
+        "--output",
+        required=False,
+        default=None,
+        help="Write the records to this file instead of stdout",  # noqa: E501
+    )
+    parser.add_argument(
+        "--flush-every",
+        type=int,
+        default=None,
+        help="Flush the output after this many records, 0 to flush when the buffer is full or --flush-seconds passed (default: 1 when writing to a terminal or a pipe, else 0)",  # noqa: E501
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Report the time spent per stage to stderr",  # noqa: E501
+    )
+    parser.add_argument(
+        "--profile-output",
+        default=None,
+        help="Write the --profile report to this JSON file instead",  # noqa: E501
+    )
+    parser.add_argument(
+        "--flush-seconds",
+        type=float,
+        default=1.0,
+        help="Flush pending records this many seconds after the last flush",  # noqa: E501
+    )
     
+    # Only the selected collector is imported, then parsing starts over
+    known_args, _ = parser.parse_known_args()
+    if not known_args.collector_name:
+        parser.error(f"a collector is required: {', '.join(collectors)}")
+    plugin = collectors[known_args.collector_name].load()
+    plugin_parser = plugin_parsers[known_args.collector_name]
+    plugin_parser.add_argument(
+        "-h", "--help", action="help", help="show this help message and exit"
+    )
+    plugin.add_arguments(plugin_parser)
     args = parser.parse_args()
  
     log = setup_logging(args.verbose)
     args.log = log
+    if args.profile or args.profile_output:
+        profiling.start()
     
     # Parse date arguments
     if not args.until:
@@ -139,6 +313,7 @@ def main():
         )
 
     interval_seconds, interval_unit = parse_interval(args.interval)
+    args.window_seconds = parse_interval(args.window)[0] if args.window else None
 
     args.since_dt = since_dt
     args.until_dt = until_dt
@@ -146,12 +321,30 @@ def main():
     args.interval_unit = interval_unit
       
     args.log.debug(args)
-    collector = collectors[args.collector_name].from_arguments(args)
+    collector = plugin.from_arguments(args)
     args.collector = collector
     report = DoraReport(args)
-    report.analyze()
-    for r in report.records:
-        print(r.json())
+    # Records are written as their intervals close
+    binary = SERIALIZERS[args.format].binary
+    if args.output:
+        stream = open(args.output, "wb" if binary else "w", newline="" if not binary else None)
+    else:
+        stream = sys.stdout.buffer if binary else sys.stdout
+    writer = RecordWriter(
+        stream,
+        flush_every=args.flush_every,
+        flush_seconds=args.flush_seconds,
+        output_format=args.format,
+    )
+    try:
+        with writer:
+            records = writer.write_all(report.stream())
+    finally:
+        if args.output:
+            stream.close()
+    if profiling.active() is not None:
+        profiling.count("records", records)
+        profiling.write(profiling.stop(), args.profile_output or "-")
     args.log.info("Exiting program with success") 
     
 
@@ -180,55 +373,94 @@ def parse_interval(interval_str):
     except IndexError as e:
         raise ValueError("Zero-length argument not supported. Use Nd, Nw, or Nm (e.g., 7d, 2w, 1m)") from e
 
-def chunk_interval(event_gen, since, size, until):
-      
-    def interval_gen(start, stop, step):
-        start_dt = start
-        end_dt = start_dt + step
-        duration = (end_dt - start_dt)
-        while end_dt < stop:
-            yield start_dt, end_dt, duration
-            start_dt = end_dt
-            end_dt = end_dt + step
-            duration = (end_dt - start_dt)
-        yield start_dt, stop, duration
-     
-    intervals = interval_gen(
-        since, 
-        until, 
-        timedelta(seconds=size),
-    ) 
-
-    chunk = []
-    last_failure = None
-    event = None
- 
-    for s, e, d in intervals:
-        try:
-            while True:
-                event = next(event_gen)
-                if event.stamp > e:
-                    break
-                if event.success:
-                    last_failure = None
-                elif event.success is False and  last_failure is None:
-                    last_failure = event.stamp
-                chunk.append(event)
-        except StopIteration:
-              event = None
- 
-        yield {
-            "start": s,
-            "end": e,
-            "duration": d,
-            "last_failure": last_failure,
-            "events": chunk,
-        }
-        
-        if event is not None:
-            chunk = [event]
+def chunk_interval(event_gen, since, size, until, block_size=CHUNK_BLOCK_SIZE):
+    """
+    Bucket events into the intervals of a report, as the intervals close.
+
+    Events are read in blocks of ``block_size``. The interval boundaries
+    are computed as an array and the events of a block are placed with a
+    binary search over their stamps, or by arithmetic on the interval width
+    when they are not in order. An interval is yielded as soon as an event
+    past its end has been read, with a view of its events rather than a
+    copy. Only the block and the events of the interval still open are
+    kept, not the whole history.
+
+    Events are expected oldest first: an event older than the interval
+    still open, read after an event that closed its own interval, is
+    counted in the open interval.
+
+    :param event_gen: Events, normally oldest first.
+    :type event_gen: Iterable
+    :param since: Start of the first interval.
+    :type since: datetime
+    :param size: Interval width in seconds.
+    :type size: float
+    :param until: End of the last interval.
+    :type until: datetime
+    :param block_size: Number of events read at once.
+    :type block_size: int
+    :yield: A dict per interval with its start, end, duration, the start
+            of a failure streak still open at its end and its events.
+    :rtype: Generator[dict, None, None]
+    """
+    intervals = Intervals(since, size, until)
+    events = iter(event_gen)
+    first = 0  # The first interval still open
+    tail = []  # and its events
+    tail_stamps = np.empty(0, dtype=np.int64)
+    tail_success = np.empty(0, dtype=np.int8)
+    last_failure = None  # Open at the end of the last closed interval
+
+    while first < len(intervals):
+        # Reading at least as many events as are carried over keeps the
+        # copying linear when an interval spans many blocks
+        count = max(block_size, len(tail))
+        new = list(islice(events, count))
+        exhausted = len(new) < count
+        block = tail + new
+        stamps = np.concatenate((
+            tail_stamps,
+            np.fromiter(
+                (to_epoch_us(event.stamp) for event in new),
+                dtype=np.int64,
+                count=len(new),
+            ),
+        ))
+        success = np.concatenate((tail_success, success_codes(new)))
+        if np.any(stamps[1:] < stamps[:-1]):
+            # Out of order: sort by interval, keeping the order within one
+            index = np.maximum(intervals.locate(stamps), first)
+            order = np.argsort(index, kind="stable")
+            block = [block[position] for position in order]
+            stamps = stamps[order]
+            success = success[order]
+            bounds = np.searchsorted(index[order], np.arange(first + 1, len(intervals) + 1))
+        else:
+            bounds = np.searchsorted(stamps, intervals.ends[first:], side="right")
+        bounds = np.concatenate(([0], bounds))
+
+        # An interval closes with the first event read past its end
+        closed = len(bounds) - 1 if exhausted else int(np.count_nonzero(bounds[1:] < len(block)))
+        failures = open_failures(success, stamps, bounds[1:closed + 1], initial=last_failure)
+        for offset in range(closed):
+            yield {
+                "start": intervals.start(first + offset),
+                "end": intervals.end(first + offset),
+                "duration": intervals.duration,
+                "last_failure": failures[offset],
+                "events": EventSlice(block, int(bounds[offset]), int(bounds[offset + 1])),
+            }
+        if closed:
+            last_failure = failures[-1]
+        first += closed
+        if exhausted:
+            break
+        open_start = int(bounds[closed])
+        tail = block[open_start:]
+        tail_stamps = stamps[open_start:]
+        tail_success = success[open_start:]
+
 
-           
 if __name__ == "__main__":
     main()
  
\ No newline at end of file
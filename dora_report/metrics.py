@@ -1,12 +1,25 @@
-from datetime import timedelta
-from dora_report.models import ChangeEvent
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Iterable, List, Tuple
 
-def change_frequency(change_events: list[ChangeEvent], duration: timedelta) -> float:
+import numpy as np
+
+from dora_report.columns import (
+    FAILURE,
+    MICROSECOND,
+    SUCCESS,
+    UNKNOWN,
+    EventColumns,
+)
+from dora_report.histogram import LogHistogram, nearest_rank
+from dora_report.events import AnyChangeEvent
+
+def change_frequency(change_events: list[AnyChangeEvent], duration: timedelta) -> float:
     """
     Calculate the frequency of changes.
 
-    :param change_events: A list of ChangeEvent objects.
-    :type change_events: list[ChangeEvent]
+    :param change_events: A list of ChangeEvent or CompactChangeEvent objects.
+    :type change_events: list[AnyChangeEvent]
     :param duration: A timedelta representing the duration.
     :type duration: timedelta
     :return: The change frequency (number of events divided by total seconds of the duration).
@@ -19,12 +32,12 @@ def change_frequency(change_events: list[ChangeEvent], duration: timedelta) -> f
     return len(change_events) / duration.total_seconds()
 
 
-def change_failure_rate(change_events: list[ChangeEvent]) -> float:
+def change_failure_rate(change_events: list[AnyChangeEvent]) -> float:
     """
     Calculate the change failure rate.
 
-    :param change_events: A list of ChangeEvent objects.
-    :type change_events: list[ChangeEvent]
+    :param change_events: A list of ChangeEvent or CompactChangeEvent objects.
+    :type change_events: list[AnyChangeEvent]
     :return: The failure rate (number of failed changes divided by total changes).
     :rtype: float
     """
@@ -37,18 +50,15 @@ def change_failure_rate(change_events: list[ChangeEvent]) -> float:
     return failed_events / total_events
 
 
-def mean_time_to_recover(change_events: list[ChangeEvent]) -> timedelta:
+def recovery_times(change_events: Iterable[AnyChangeEvent]) -> list[timedelta]:
     """
-    Calculate the mean time to recover (MTTR) from failures.
+    Return the time from the first failure of every streak to its recovery.
 
-    :param change_events: A list of ChangeEvent objects.
-    :type change_events: list[ChangeEvent]
-    :return: The mean time to recover (average recovery time across all failures).
-    :rtype: timedelta
+    :param change_events: ChangeEvent or CompactChangeEvent objects.
+    :type change_events: Iterable[AnyChangeEvent]
+    :return: The recovery times in order, without streaks still failing.
+    :rtype: list[timedelta]
     """
-    if not change_events:
-        return timedelta(0)
-
     recovery_times = []
     failure_start = None  # Tracks the start of a failure
 
@@ -59,45 +69,649 @@ def mean_time_to_recover(change_events: list[ChangeEvent]) -> timedelta:
                 failure_start = event.stamp  # Mark the start of failure
         elif event.success and failure_start:
             # Recovery happens at the first successful event after a failure
-            recovery_time = event.stamp - failure_start
-            recovery_times.append(recovery_time)
+            recovery_times.append(event.stamp - failure_start)
             failure_start = None  # Reset failure start
 
-    # If failures end without recovery, do not count them in MTTR
-    if not recovery_times:
-        return timedelta(0)
+    return recovery_times
 
-    # Calculate the mean recovery time
-    return sum(recovery_times, timedelta(0)) / len(recovery_times)
 
- 
-def lead_time_for_changes(change_events: list[ChangeEvent]) -> timedelta:
+def lead_times(change_events: Iterable[AnyChangeEvent]) -> list[timedelta]:
     """
-    Calculate the mean lead time for changes.
+    Return the lead time of every change.
 
-    :param change_events: A list of ChangeEvent objects.
-    :type change_events: list[ChangeEvent]
-    :return: The mean lead time for all changes.
-    :rtype: timedelta
-    """
-    if not change_events:
-        return timedelta(0)
+    A change with a ``lead_time``, measured by its collector, has that lead
+    time. Any other change that is not a success waits for the next
+    success, and its lead time is the time until then.
 
+    :param change_events: ChangeEvent or CompactChangeEvent objects.
+    :type change_events: Iterable[AnyChangeEvent]
+    :return: The lead times, without changes still waiting.
+    :rtype: list[timedelta]
+    """
     lead_times = []
     chunk = []
 
     # Iterate over the events and chunk them
     for event in change_events:
-        chunk.append(event)
-        if event.success:  # A success marks the end of a chunk 
+        if event.lead_time is not None:
+            lead_times.append(event.lead_time)
+        elif not event.success:
+            chunk.append(event)
+        if event.success:  # A success marks the end of a chunk
             success_stamp = event.stamp
-            for e in chunk[:-1]:  # Exclude the final successful event
+            for e in chunk:
                 lead_times.append(success_stamp - e.stamp)
-            chunk = []  # Start a new chunk 
+            chunk = []  # Start a new chunk
+
+    return lead_times
+
 
+def mean_time_to_recover(change_events: list[AnyChangeEvent]) -> timedelta:
+    """
+    Calculate the mean time to recover (MTTR) from failures.
+
+    :param change_events: A list of ChangeEvent or CompactChangeEvent objects.
+    :type change_events: list[AnyChangeEvent]
+    :return: The mean time to recover (average recovery time across all failures).
+    :rtype: timedelta
+    """
+    # If failures end without recovery, do not count them in MTTR
+    durations = recovery_times(change_events)
+    if not durations:
+        return timedelta(0)
+
+    # Calculate the mean recovery time
+    return sum(durations, timedelta(0)) / len(durations)
+
+
+def lead_time_for_changes(change_events: list[AnyChangeEvent]) -> timedelta:
+    """
+    Calculate the mean lead time for changes.
+
+    :param change_events: A list of ChangeEvent or CompactChangeEvent objects.
+    :type change_events: list[AnyChangeEvent]
+    :return: The mean lead time for all changes.
+    :rtype: timedelta
+    """
     # If no lead times were recorded, return 0
-    if not lead_times:
+    durations = lead_times(change_events)
+    if not durations:
         return timedelta(0)
 
     # Calculate the mean lead time
-    return sum(lead_times, timedelta(0)) / len(lead_times) 
+    return sum(durations, timedelta(0)) / len(durations)
+
+
+# Percentiles reported for recovery and lead times, by field suffix
+PERCENTILES = {"p50": 0.5, "p90": 0.9, "p99": 0.99}
+
+
+def percentiles(name: str, durations: list[timedelta]) -> dict:
+    """
+    Return the exact nearest-rank percentiles of durations as record fields.
+
+    :param name: Field prefix, e.g. ``lead_time``.
+    :type name: str
+    :param durations: The durations, in any order.
+    :type durations: list[timedelta]
+    :return: ``<name>_p50`` and so on, 0 without durations.
+    :rtype: dict
+    """
+    return {
+        f"{name}_{label}": nearest_rank(durations, q) or timedelta(0)
+        for label, q in PERCENTILES.items()
+    }
+
+
+def histogram_percentiles(name: str, histogram: LogHistogram) -> dict:
+    """
+    Return the percentiles of a histogram of microseconds as record fields.
+
+    :param name: Field prefix, e.g. ``lead_time``.
+    :type name: str
+    :param histogram: Durations in microseconds.
+    :type histogram: LogHistogram
+    :return: ``<name>_p50`` and so on, 0 for an empty histogram.
+    :rtype: dict
+    """
+    values = histogram.quantiles(PERCENTILES.values())
+    return {
+        f"{name}_{label}": timedelta(microseconds=round(value))
+        for label, value in zip(PERCENTILES, values)
+    }
+
+
+def reference_metrics(change_events: list[AnyChangeEvent], duration: timedelta) -> dict:
+    """
+    Calculate the metrics of a record with the functions above.
+
+    :param change_events: A list of ChangeEvent or CompactChangeEvent objects.
+    :type change_events: list[AnyChangeEvent]
+    :param duration: A timedelta representing the duration.
+    :type duration: timedelta
+    :return: The metrics keyed by their record field names.
+    :rtype: dict
+    """
+    return {
+        "deployment_frequency": change_frequency(change_events, duration),
+        "change_failure_rate": change_failure_rate(change_events),
+        "mean_time_to_recover": mean_time_to_recover(change_events),
+        "lead_time_for_changes": lead_time_for_changes(change_events),
+        **percentiles("time_to_recover", recovery_times(change_events)),
+        **percentiles("lead_time", lead_times(change_events)),
+    }
+
+
+# Runs of pending stamps kept before merging, see PendingStamps
+PENDING_RUNS = 4096
+# Largest relative error merged runs add to a lead time
+PENDING_ERROR = 0.001
+
+
+class PendingStamps:
+    """
+    The stamps of the events waiting for a success, in bounded memory.
+
+    New stamps are appended to ``recent``. Past ``PENDING_RUNS`` of them
+    they are folded into runs of ``[first, last, count]``, oldest first,
+    with a running count and the sum of their offsets from the first stamp,
+    which give the total lead time exactly: ``count * (stamp - first) -
+    sum``. The lead times of a run are measured from its last stamp, and
+    past ``PENDING_RUNS`` runs adjacent runs merge while the merged run
+    spans at most ``PENDING_ERROR`` of the time from its last stamp to the
+    newest one. Those lead times are then that much off at most, and the
+    runs grow with the logarithm of the time waited instead of with the
+    events.
+    """
+    __slots__ = ("recent", "runs", "count", "base", "offsets", "limit")
+
+    def __init__(self):
+        self.recent: List[datetime] = []
+        self.runs: List[list] = []
+        self.count = 0
+        self.base = None
+        self.offsets = timedelta(0)
+        self.limit = PENDING_RUNS
+
+    def __len__(self) -> int:
+        return self.count + len(self.recent)
+
+    def add(self, stamp: datetime):
+        """
+        Start the wait of an event.
+
+        :param stamp: The stamp of the event, not older than the stamps
+                      added before.
+        :type stamp: datetime
+        """
+        self.recent.append(stamp)
+        if len(self.recent) > PENDING_RUNS:
+            self.fold()
+
+    def fold(self):
+        """
+        Fold the recent stamps into the runs.
+        """
+        runs = self.runs
+        if self.base is None:
+            self.base = self.recent[0]
+        for stamp in self.recent:
+            self.offsets += stamp - self.base
+            if runs and runs[-1][1] == stamp:
+                runs[-1][2] += 1
+            else:
+                runs.append([stamp, stamp, 1])
+        self.count += len(self.recent)
+        # Cleared in place, the accumulators hold on to the list
+        self.recent.clear()
+        if len(runs) > self.limit:
+            self._merge()
+
+    def _merge(self):
+        newest = self.runs[-1][1]
+        merged = [self.runs[0]]
+        for run in self.runs[1:]:
+            last = merged[-1]
+            if run[1] - last[0] <= (newest - run[1]) * PENDING_ERROR:
+                last[1] = run[1]
+                last[2] += run[2]
+            else:
+                merged.append(run)
+        self.runs = merged
+        self.limit = max(PENDING_RUNS, 2 * len(merged))
+
+    def lead_times(self, stamp: datetime) -> Tuple[List[Tuple[int, int]], timedelta]:
+        """
+        Return the lead times of the waiting events if a success at
+        ``stamp`` ends them.
+
+        :return: The lead times in microseconds as ``(lead time, count)``
+                 pairs and their exact sum.
+        :rtype: Tuple[List[Tuple[int, int]], timedelta]
+        """
+        lead_times = [((stamp - waiting) // MICROSECOND, 1) for waiting in self.recent]
+        total = timedelta(microseconds=sum(lead_time for lead_time, _ in lead_times))
+        if self.count:
+            lead_times += [((stamp - last) // MICROSECOND, count) for _, last, count in self.runs]
+            total += (stamp - self.base) * self.count - self.offsets
+        return lead_times, total
+
+    def clear(self):
+        self.recent.clear()
+        self.runs = []
+        self.count = 0
+        self.base = None
+        self.offsets = timedelta(0)
+        self.limit = PENDING_RUNS
+
+    def copy(self) -> "PendingStamps":
+        following = PendingStamps()
+        following.recent = list(self.recent)
+        following.runs = [list(run) for run in self.runs]
+        following.count = self.count
+        following.base = self.base
+        following.offsets = self.offsets
+        following.limit = self.limit
+        return following
+
+
+class MetricTotals:
+    """
+    The metrics from event counts, duration totals and histograms.
+
+    Subclasses keep ``events``, ``failures``, ``recoveries``,
+    ``recovery_total``, ``lead_times`` and ``lead_time_total``, and the
+    ``recovery_histogram`` and ``lead_time_histogram`` of the durations in
+    microseconds.
+    """
+
+    def change_frequency(self, duration: timedelta) -> float:
+        if duration.total_seconds() == 0:
+            raise ValueError("Duration cannot be zero.")
+        return self.events / duration.total_seconds()
+
+    def change_failure_rate(self) -> float:
+        if not self.events:
+            return 0.0
+        return self.failures / self.events
+
+    def mean_time_to_recover(self) -> timedelta:
+        if not self.recoveries:
+            return timedelta(0)
+        return self.recovery_total / self.recoveries
+
+    def lead_time_for_changes(self) -> timedelta:
+        if not self.lead_times:
+            return timedelta(0)
+        return self.lead_time_total / self.lead_times
+
+    def metrics(self, duration: timedelta) -> dict:
+        """
+        Return the metrics keyed like reference_metrics.
+
+        The means are exact, the percentiles within the relative error of
+        the histograms.
+        """
+        return {
+            "deployment_frequency": self.change_frequency(duration),
+            "change_failure_rate": self.change_failure_rate(),
+            "mean_time_to_recover": self.mean_time_to_recover(),
+            "lead_time_for_changes": self.lead_time_for_changes(),
+            **histogram_percentiles("time_to_recover", self.recovery_histogram),
+            **histogram_percentiles("lead_time", self.lead_time_histogram),
+        }
+
+
+class MetricAccumulator(MetricTotals):
+    """
+    Calculate the metrics in a single pass over the events.
+
+    Only counters, sums and fixed-size histograms are kept, plus the
+    events still waiting for a success as :class:`PendingStamps`, which
+    grow with the logarithm of the time waited at most, so the memory does
+    not grow with the number of events. The means are exactly those of the
+    functions above, the percentiles within 1%, and within 0.1% more for
+    lead times once more than ``PENDING_RUNS`` distinct stamps wait at once.
+    """
+
+    def __init__(self):
+        self.events = 0
+        self.failures = 0
+        self.failure_start = None
+        self.recoveries = 0
+        self.recovery_total = timedelta(0)
+        self.recovery_histogram = LogHistogram()
+        self.waiting = PendingStamps()
+        self.lead_times = 0
+        self.lead_time_total = timedelta(0)
+        self.lead_time_histogram = LogHistogram()
+
+    def add(self, event: AnyChangeEvent):
+        """
+        Account for one more event.
+
+        :param event: A ChangeEvent or CompactChangeEvent.
+        :type event: AnyChangeEvent
+        """
+        self.update((event,))
+
+    def update(self, change_events: Iterable[AnyChangeEvent]) -> "MetricAccumulator":
+        """
+        Account for every event of an iterable.
+
+        The state lives in locals during the loop, which is the hot path of
+        a report.
+
+        :param change_events: ChangeEvent or CompactChangeEvent objects.
+        :type change_events: Iterable[AnyChangeEvent]
+        :return: The accumulator itself.
+        :rtype: MetricAccumulator
+        """
+        events = self.events
+        failures = self.failures
+        failure_start = self.failure_start
+        recoveries = self.recoveries
+        recovery_total = self.recovery_total
+        add_recovery = self.recovery_histogram.add
+        waiting = self.waiting
+        recent = waiting.recent
+        lead_times = self.lead_times
+        lead_time_total = self.lead_time_total
+        add_lead_time = self.lead_time_histogram.add
+
+        for event in change_events:
+            events += 1
+            success = event.success
+            own_lead_time = event.lead_time
+            if own_lead_time is not None:
+                lead_time_total += own_lead_time
+                add_lead_time(own_lead_time // MICROSECOND)
+                lead_times += 1
+            if not success:
+                failures += 1
+                if success is False and failure_start is None:
+                    failure_start = event.stamp
+                if own_lead_time is None:
+                    # Waits for the next success
+                    recent.append(event.stamp)
+                    if len(recent) > PENDING_RUNS:
+                        waiting.fold()
+                continue
+
+            if failure_start is not None:
+                recovery = event.stamp - failure_start
+                recovery_total += recovery
+                add_recovery(recovery // MICROSECOND)
+                recoveries += 1
+                failure_start = None
+            if recent:
+                stamp = event.stamp
+                for waited in recent:
+                    lead_time = stamp - waited
+                    lead_time_total += lead_time
+                    add_lead_time(lead_time // MICROSECOND)
+                lead_times += len(recent)
+                recent.clear()
+            if waiting.count:
+                # Only the runs of a long wait are left
+                ended, total = waiting.lead_times(event.stamp)
+                for lead_time, count in ended:
+                    add_lead_time(lead_time, count)
+                lead_time_total += total
+                lead_times += waiting.count
+                waiting.clear()
+
+        self.events = events
+        self.failures = failures
+        self.failure_start = failure_start
+        self.recoveries = recoveries
+        self.recovery_total = recovery_total
+        self.lead_times = lead_times
+        self.lead_time_total = lead_time_total
+        return self
+
+    def carry(self) -> "MetricAccumulator":
+        """
+        Start the accumulator of the next interval.
+
+        The failure streak still open and the events still waiting for a
+        success are carried over, so a recovery or a lead time spanning an
+        interval boundary is measured in the interval where it ends.
+
+        :return: A new accumulator with no events but the open state.
+        :rtype: MetricAccumulator
+        """
+        following = MetricAccumulator()
+        following.failure_start = self.failure_start
+        following.waiting = self.waiting.copy()
+        return following
+
+
+class WindowAccumulator(MetricTotals):
+    """
+    Calculate the metrics of a sliding window of events.
+
+    Events enter at the newest end with :meth:`add` and leave at the oldest
+    with :meth:`remove_until`, both in O(1) per event and lead time, the
+    events waiting for a success kept as :class:`PendingStamps`. Each
+    event adds a fixed contribution while it is in the window: itself,
+    whether it failed, the recovery it ends and the lead times of the events
+    it ends the wait of, measured over the whole stream like the carrying
+    MetricAccumulator. A window therefore counts the recoveries and lead
+    times ending in it. Events are expected oldest first.
+    """
+
+    def __init__(self):
+        # (stamp, failed, recovery, lead time total, lead times) per event,
+        # the lead times as (microseconds, count) pairs
+        self.contributions = deque()
+        self.events = 0
+        self.failures = 0
+        self.recoveries = 0
+        self.recovery_total = timedelta(0)
+        self.recovery_histogram = LogHistogram()
+        self.lead_times = 0
+        self.lead_time_total = timedelta(0)
+        self.lead_time_histogram = LogHistogram()
+        # Open state of the stream
+        self.failure_start = None
+        self.waiting = PendingStamps()
+
+    def __len__(self) -> int:
+        return len(self.contributions)
+
+    def add(self, event: AnyChangeEvent):
+        """
+        Add the newest event to the window.
+
+        :param event: A ChangeEvent or CompactChangeEvent.
+        :type event: AnyChangeEvent
+        """
+        success = event.success
+        stamp = event.stamp
+        recovery = None
+        lead_time_total = None
+        lead_times = []
+        if event.lead_time is not None:
+            lead_time_total = event.lead_time
+            lead_times.append((event.lead_time // MICROSECOND, 1))
+        if not success:
+            if success is False and self.failure_start is None:
+                self.failure_start = stamp
+            if event.lead_time is None:
+                self.waiting.add(stamp)
+        else:
+            if self.failure_start is not None:
+                recovery = stamp - self.failure_start
+                self.failure_start = None
+            if len(self.waiting):
+                ended, waited = self.waiting.lead_times(stamp)
+                lead_times += ended
+                lead_time_total = waited if lead_time_total is None else lead_time_total + waited
+                self.waiting.clear()
+        lead_times = tuple(lead_times)
+
+        failed = not success
+        self.contributions.append((stamp, failed, recovery, lead_time_total, lead_times))
+        self._count(failed, recovery, lead_time_total, lead_times, 1)
+
+    def remove_until(self, stamp):
+        """
+        Remove the events up to and including ``stamp`` from the window.
+
+        :param stamp: The newest stamp to remove.
+        :type stamp: datetime
+        """
+        contributions = self.contributions
+        while contributions and contributions[0][0] <= stamp:
+            _, failed, recovery, lead_time_total, lead_times = contributions.popleft()
+            self._count(failed, recovery, lead_time_total, lead_times, -1)
+
+    def _count(self, failed, recovery, lead_time_total, lead_times, sign):
+        self.events += sign
+        self.failures += sign * failed
+        if recovery is not None:
+            self.recoveries += sign
+            self.recovery_total += sign * recovery
+            self.recovery_histogram.add(recovery // MICROSECOND, sign)
+        if lead_times:
+            self.lead_time_total += sign * lead_time_total
+            for lead_time, count in lead_times:
+                self.lead_times += sign * count
+                self.lead_time_histogram.add(lead_time, sign * count)
+
+
+INT64_WRAP = 2**64
+
+
+def _unwrap(wrapped: int, estimate: float) -> int:
+    """
+    Recover an exact integer from its int64 wrapped-around value.
+
+    NumPy integer sums wrap silently past int64, but they stay exact modulo
+    2**64. A float64 estimate of the same sum, whose error is many orders of
+    magnitude below 2**63, tells how many times the sum wrapped.
+    """
+    return wrapped + round((estimate - wrapped) / INT64_WRAP) * INT64_WRAP
+
+
+def _sum_microseconds(durations: np.ndarray) -> int:
+    """
+    Exact sum of int64 microsecond durations as a Python int.
+    """
+    return _unwrap(int(durations.sum()), float(durations.sum(dtype=np.float64)))
+
+
+def change_frequency_vectorized(columns: EventColumns, duration: timedelta) -> float:
+    """
+    Vectorized change_frequency over an EventColumns store.
+
+    :param columns: The change events in columnar form.
+    :type columns: EventColumns
+    :param duration: A timedelta representing the duration.
+    :type duration: timedelta
+    :return: The change frequency (number of events divided by total seconds of the duration).
+    :rtype: float
+    :raises InvalidArgument: If the duration has zero seconds.
+    """
+    return change_frequency(columns, duration)
+
+
+def change_failure_rate_vectorized(columns: EventColumns) -> float:
+    """
+    Vectorized change_failure_rate over an EventColumns store.
+
+    Unknown outcomes count as failures, like in change_failure_rate.
+
+    :param columns: The change events in columnar form.
+    :type columns: EventColumns
+    :return: The failure rate (number of failed changes divided by total changes).
+    :rtype: float
+    """
+    if not len(columns):
+        return 0.0
+
+    failed_events = int(np.count_nonzero(columns.success != SUCCESS))
+    return failed_events / len(columns)
+
+
+def mean_time_to_recover_vectorized(columns: EventColumns) -> timedelta:
+    """
+    Vectorized mean_time_to_recover over an EventColumns store.
+
+    Unknown outcomes are dropped first. A failure streak starts where a
+    failure follows a non-failure and a recovery is a success following a
+    failure, both found by comparing the success column with itself shifted
+    by one. Streaks and recoveries alternate, so the n-th recovery closes
+    the n-th streak and a trailing streak without recovery is left out.
+
+    :param columns: The change events in columnar form.
+    :type columns: EventColumns
+    :return: The mean time to recover (average recovery time across all failures).
+    :rtype: timedelta
+    """
+    known = np.flatnonzero(columns.success != UNKNOWN)
+    failed = columns.success[known] == FAILURE
+    if not len(failed):
+        return timedelta(0)
+
+    succeeded = ~failed
+    streak_starts = np.flatnonzero(failed[1:] & succeeded[:-1]) + 1
+    if failed[0]:
+        streak_starts = np.concatenate(([0], streak_starts))
+    recoveries = np.flatnonzero(succeeded[1:] & failed[:-1]) + 1
+    if not len(recoveries):
+        return timedelta(0)
+
+    stamps = columns.stamps
+    durations = (
+        stamps[known[recoveries]] - stamps[known[streak_starts[: len(recoveries)]]]
+    )
+    return timedelta(microseconds=_sum_microseconds(durations)) / len(recoveries)
+
+
+def lead_time_for_changes_vectorized(columns: EventColumns) -> timedelta:
+    """
+    Vectorized lead_time_for_changes over an EventColumns store.
+
+    Events with a lead time column value have that lead time. Every other
+    event that is not a success waits for the next success. The gaps
+    between success positions give how many events wait for each one, so
+    the total lead time comes from a few sums instead of a per-event
+    lookup. Events after the last success have no lead time, like in
+    lead_time_for_changes.
+
+    :param columns: The change events in columnar form.
+    :type columns: EventColumns
+    :return: The mean lead time for all changes.
+    :rtype: timedelta
+    """
+    own_total = 0
+    own_count = 0
+    pending = columns.success != SUCCESS
+    if columns.lead_times is not None:
+        own_total = _sum_microseconds(columns.lead_times[columns.has_lead_time])
+        own_count = int(np.count_nonzero(columns.has_lead_time))
+        pending &= ~columns.has_lead_time
+
+    total = count = 0
+    successes = np.flatnonzero(columns.success == SUCCESS)
+    if len(successes):
+        # Events waiting for each success, and their number
+        waiting = np.diff(np.cumsum(pending)[successes], prepend=0)
+        count = int(waiting.sum())
+    if count:
+        # The sum of (success stamp - event stamp) over the waiting events
+        # is the waiting-weighted success stamps minus the stamps of the
+        # waiting events before the last success.
+        success_stamps = columns.stamps[successes]
+        pending_stamps = columns.stamps[: successes[-1]][pending[: successes[-1]]]
+        wrapped = int((waiting * success_stamps).sum()) - int(pending_stamps.sum())
+        estimate = float(
+            waiting.astype(np.float64) @ success_stamps.astype(np.float64)
+        ) - float(pending_stamps.sum(dtype=np.float64))
+        total = _unwrap(wrapped, estimate)
+
+    if not count + own_count:
+        return timedelta(0)
+    return timedelta(microseconds=total + own_total) / (count + own_count)
@@ -1,6 +1,8 @@
 from pydantic import BaseModel
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Iterable, Iterator, Optional
+
+from dora_report.events import AnyChangeEvent, CompactChangeEvent  # noqa: F401
 
 class ChangeEvent(BaseModel):
     """
@@ -13,7 +15,33 @@ class ChangeEvent(BaseModel):
     :param success: Indicates whether the change was successful. 
                     ``True`` means success, ``False`` indicates an error.
     :type success: bool
+    :param lead_time: Time between work on the change started and the
+                      change was registered, if known.
+    :type lead_time: timedelta
     """
     identifier: str
     stamp: datetime
-    success: Optional[bool]
\ No newline at end of file
+    success: Optional[bool]
+    lead_time: Optional[timedelta] = None
+
+
+def compact_events(events: Iterable, validate: bool = True) -> Iterator[CompactChangeEvent]:
+    """
+    Turn the events a collector yields into CompactChangeEvents.
+
+    ChangeEvent instances were validated when they were created and are
+    only copied. Anything else, compact events included, is validated
+    through ChangeEvent unless ``validate`` is false, the fast path for
+    collectors trusted to yield well-formed CompactChangeEvents.
+
+    :param events: ChangeEvent or CompactChangeEvent objects, or dicts.
+    :param validate: Whether to validate events not yet validated.
+    :raises pydantic.ValidationError: If an event is invalid.
+    """
+    for event in events:
+        if isinstance(event, CompactChangeEvent):
+            yield event.validate() if validate else event
+        elif isinstance(event, ChangeEvent):
+            yield CompactChangeEvent.from_event(event)
+        else:
+            yield CompactChangeEvent.from_event(ChangeEvent.model_validate(event))
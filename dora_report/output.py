@@ -0,0 +1,395 @@
+import csv
+import io
+import json
+import math
+import os
+import stat
+import struct
+import threading
+import time
+from contextlib import nullcontext
+from datetime import datetime, timedelta
+from typing import IO, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from dora_report.columns import MICROSECOND, to_epoch_us
+import profiling
+
+
+# json.dumps spelling of the floats repr() spells differently
+SPECIAL_FLOATS = {"nan": "NaN", "inf": "Infinity", "-inf": "-Infinity"}
+
+
+def _floats(values) -> List[str]:
+    """
+    Format floats the way json.dumps does.
+    """
+    values = list(map(float, values))
+    text = list(map(float.__repr__, values))
+    if not all(map(math.isfinite, values)):
+        text = [SPECIAL_FLOATS.get(value, value) for value in text]
+    return text
+
+
+def _kind(value) -> str:
+    """
+    Return the schema kind of a record value.
+    """
+    if isinstance(value, datetime):
+        return "datetime"
+    if isinstance(value, timedelta):
+        return "timedelta"
+    if isinstance(value, bool):
+        return "bool"
+    if isinstance(value, int):
+        return "int"
+    if isinstance(value, float):
+        return "float"
+    return "json"
+
+
+# How a column of each kind is written in the text formats
+TEXT_FORMATTERS = {
+    "datetime": lambda values: list(map(datetime.isoformat, values)),
+    "timedelta": lambda values: _floats(map(timedelta.total_seconds, values)),
+    "bool": lambda values: ["true" if value else "false" for value in values],
+    "int": lambda values: list(map(int.__repr__, values)),
+    "float": _floats,
+    "json": lambda values: list(map(json.dumps, values)),
+}
+
+# How the kinds are stored in the columnar format
+COLUMN_DTYPES = {
+    "datetime": "<i8",
+    "timedelta": "<i8",
+    "bool": "u1",
+    "int": "<i8",
+    "float": "<f8",
+}
+
+
+class Schema:
+    """
+    Field names, kinds and order shared by the records of a report.
+
+    :param fields: ``(name, kind)`` pairs in output order.
+    :type fields: Tuple[Tuple[str, str], ...]
+    """
+
+    def __init__(self, fields: Tuple[Tuple[str, str], ...]):
+        self.fields = tuple(fields)
+        self.names = tuple(name for name, _ in self.fields)
+        self.formatters = tuple(TEXT_FORMATTERS[kind] for _, kind in self.fields)
+        self.keys = frozenset(self.names)
+
+    @classmethod
+    def from_record(cls, record) -> "Schema":
+        return cls(tuple((name, _kind(value)) for name, value in record.fields.items()))
+
+    def text_rows(self, records) -> List[tuple]:
+        """
+        Return the values of records formatted as text, in schema order.
+
+        Values are formatted a column at a time.
+
+        :raises ValueError: If a record does not have the schema fields.
+        """
+        rows = [record.fields for record in records]
+        for fields in rows:
+            if fields.keys() != self.keys:
+                raise ValueError(f"Record fields {list(fields)} do not match {list(self.names)}")
+        columns = [
+            format([fields[name] for fields in rows])
+            for name, format in zip(self.names, self.formatters)
+        ]
+        return list(zip(*columns))
+
+
+class NDJSONSerializer:
+    """
+    Encode records as NDJSON, one object per line.
+
+    The output is the one of ``Record.json``, but every line is filled into
+    a template built once per field layout instead of going through the
+    JSON encoder.
+    """
+    binary = False
+
+    def __init__(self):
+        self.templates: Dict[tuple, Tuple[Schema, str]] = {}
+
+    def _template(self, record) -> Tuple[Schema, str]:
+        key = tuple(record.fields)
+        if key not in self.templates:
+            schema = Schema.from_record(record)
+            parts = []
+            for name, kind in schema.fields:
+                value = '"%s"' if kind == "datetime" else "%s"
+                parts.append(json.dumps(name).replace("%", "%%") + ": " + value)
+            self.templates[key] = schema, "{" + ", ".join(parts) + "}\n"
+        return self.templates[key]
+
+    def encode(self, records) -> str:
+        lines = []
+        # Runs of records with the same field layout share a template
+        start = 0
+        while start < len(records):
+            key = tuple(records[start].fields)
+            stop = start + 1
+            while stop < len(records) and tuple(records[stop].fields) == key:
+                stop += 1
+            schema, template = self._template(records[start])
+            lines += [template % row for row in schema.text_rows(records[start:stop])]
+            start = stop
+        return "".join(lines)
+
+
+class CSVSerializer:
+    """
+    Encode records as CSV rows, with a header from the first record.
+
+    Datetimes are ISO 8601 and durations are seconds, like in NDJSON.
+    """
+    binary = False
+
+    def __init__(self):
+        self.schema: Optional[Schema] = None
+        self.buffer = io.StringIO()
+        self.writer = csv.writer(self.buffer, lineterminator="\n")
+
+    def encode(self, records) -> str:
+        if not records:
+            return ""
+        if self.schema is None:
+            self.schema = Schema.from_record(records[0])
+            self.writer.writerow(self.schema.names)
+        self.writer.writerows(self.schema.text_rows(records))
+        data = self.buffer.getvalue()
+        self.buffer.seek(0)
+        self.buffer.truncate()
+        return data
+
+
+COLUMNAR_MAGIC = b"DORAREC1"
+
+
+class ColumnarSerializer:
+    """
+    Encode records in a binary columnar format for large backfills.
+
+    The stream starts with ``COLUMNAR_MAGIC`` and the schema as a length
+    prefixed JSON list of ``[name, kind]`` pairs. Each batch follows as its
+    row count (little-endian uint32) and then one contiguous array per
+    field: int64 epoch microseconds for datetimes, int64 microseconds for
+    durations, float64, int64 or uint8 for the rest. :func:`read_columnar`
+    reads it back into NumPy arrays.
+    """
+    binary = True
+
+    def __init__(self):
+        self.schema: Optional[Schema] = None
+
+    def encode(self, records) -> bytes:
+        if not records:
+            return b""
+        parts = []
+        if self.schema is None:
+            self.schema = Schema.from_record(records[0])
+            for name, kind in self.schema.fields:
+                if kind not in COLUMN_DTYPES:
+                    raise ValueError(f"Field {name} of kind {kind} has no column type")
+            schema = json.dumps([list(field) for field in self.schema.fields]).encode()
+            parts += [COLUMNAR_MAGIC, struct.pack("<I", len(schema)), schema]
+
+        parts.append(struct.pack("<I", len(records)))
+        rows = [record.fields for record in records]
+        for name, kind in self.schema.fields:
+            values = [row[name] for row in rows]
+            if kind == "datetime":
+                values = [to_epoch_us(value) for value in values]
+            elif kind == "timedelta":
+                values = [value // MICROSECOND for value in values]
+            parts.append(np.array(values, dtype=COLUMN_DTYPES[kind]).tobytes())
+        return b"".join(parts)
+
+
+def read_columnar(stream: IO[bytes]) -> Dict[str, np.ndarray]:
+    """
+    Read a stream written by :class:`ColumnarSerializer`.
+
+    :param stream: Binary stream positioned at the start of the data.
+    :type stream: IO[bytes]
+    :return: One array per field, datetimes as ``datetime64[us]`` and
+             durations as ``timedelta64[us]``.
+    :rtype: Dict[str, numpy.ndarray]
+    :raises ValueError: If the stream is not in the columnar format.
+    """
+    if stream.read(len(COLUMNAR_MAGIC)) != COLUMNAR_MAGIC:
+        raise ValueError("Not a columnar record stream.")
+    (length,) = struct.unpack("<I", stream.read(4))
+    fields = json.loads(stream.read(length))
+    columns = {name: [] for name, _ in fields}
+    while True:
+        count = stream.read(4)
+        if not count:
+            break
+        (rows,) = struct.unpack("<I", count)
+        for name, kind in fields:
+            dtype = np.dtype(COLUMN_DTYPES[kind])
+            columns[name].append(np.frombuffer(stream.read(rows * dtype.itemsize), dtype=dtype))
+
+    result = {}
+    for name, kind in fields:
+        array = np.concatenate(columns[name]) if columns[name] else np.empty(0, COLUMN_DTYPES[kind])
+        if kind == "datetime":
+            array = array.astype("datetime64[us]")
+        elif kind == "timedelta":
+            array = array.astype("timedelta64[us]")
+        elif kind == "bool":
+            array = array.astype(bool)
+        result[name] = array
+    return result
+
+
+SERIALIZERS = {
+    "ndjson": NDJSONSerializer,
+    "csv": CSVSerializer,
+    "columnar": ColumnarSerializer,
+}
+
+
+def is_pipe_or_tty(stream: IO) -> bool:
+    """
+    Return whether a stream writes to a terminal, a pipe or a socket, where a
+    reader waits for every line, rather than to a file.
+    """
+    try:
+        fileno = stream.fileno()
+    except (AttributeError, OSError, ValueError):
+        return False
+    mode = os.fstat(fileno).st_mode
+    return os.isatty(fileno) or stat.S_ISFIFO(mode) or stat.S_ISSOCK(mode)
+
+
+class RecordWriter:
+    """
+    Buffered, batched writer for report records.
+
+    Records are collected in memory and encoded as one batch by the
+    serializer of ``output_format``, after every ``flush_every`` records,
+    ``flush_seconds`` after the last flush or when ``batch_size`` records
+    are pending, whichever comes first. A background thread keeps the time,
+    so records buffered before the records upstream stall are written too.
+    The stream is flushed as well, so consumers reading a pipe see whole
+    lines as soon as they are written.
+
+    :param stream: Stream to write to, binary for the columnar format.
+    :type stream: IO
+    :param flush_every: Records per flush, 0 to flush on size or time only
+                        and 1 for interactive use. By default 1 when the
+                        stream is a terminal, a pipe or a socket and 0
+                        otherwise, see :func:`is_pipe_or_tty`.
+    :type flush_every: Optional[int]
+    :param flush_seconds: Flush pending records this many seconds after
+                          the last flush.
+    :type flush_seconds: float
+    :param batch_size: Records buffered before a flush is forced.
+    :type batch_size: int
+    :param output_format: One of ``SERIALIZERS``.
+    :type output_format: str
+    """
+
+    def __init__(
+        self,
+        stream: IO,
+        flush_every: Optional[int] = None,
+        flush_seconds: Optional[float] = None,
+        batch_size: int = 1024,
+        output_format: str = "ndjson",
+    ):
+        self.stream = stream
+        if flush_every is None:
+            flush_every = 1 if is_pipe_or_tty(stream) else 0
+        self.flush_every = flush_every
+        self.flush_seconds = flush_seconds
+        self.batch_size = batch_size
+        self.serializer = SERIALIZERS[output_format]()
+        self.batch = []
+        self.last_flush = time.monotonic()
+        self.records = 0
+        self.lock = threading.Lock()
+        self.closed = threading.Event()
+        self.timer = None
+        if flush_seconds is not None and flush_every != 1:
+            self.timer = threading.Thread(
+                target=self._flush_on_time, name="record-writer", daemon=True
+            )
+            self.timer.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def write(self, record):
+        """
+        Buffer one record, flushing when a limit is reached.
+
+        :param record: The record to write.
+        :type record: Record
+        """
+        with self.lock:
+            self.batch.append(record)
+            self.records += 1
+            if (
+                (self.flush_every and len(self.batch) >= self.flush_every)
+                or len(self.batch) >= self.batch_size
+            ):
+                self._flush()
+
+    def write_all(self, records) -> int:
+        """
+        Write every record of an iterable as it arrives.
+
+        :return: The number of records written.
+        :rtype: int
+        """
+        for record in records:
+            self.write(record)
+        self.flush()
+        return self.records
+
+    def flush(self):
+        with self.lock:
+            self._flush()
+
+    def _flush(self, profile: bool = True):
+        if self.batch:
+            # The profiler only follows the stages of the main thread
+            with profiling.stage("serialize") if profile else nullcontext():
+                self.stream.write(self.serializer.encode(self.batch))
+            self.batch = []
+        self.stream.flush()
+        self.last_flush = time.monotonic()
+
+    def _flush_on_time(self):
+        """
+        Flush pending records once ``flush_seconds`` passed since the last
+        flush, until the writer is closed.
+        """
+        timeout = self.flush_seconds
+        while not self.closed.wait(timeout):
+            with self.lock:
+                timeout = self.last_flush + self.flush_seconds - time.monotonic()
+                if timeout <= 0:
+                    if self.batch:
+                        self._flush(profile=False)
+                    timeout = self.flush_seconds
+
+    def close(self):
+        self.closed.set()
+        if self.timer is not None:
+            self.timer.join()
+        self.flush()
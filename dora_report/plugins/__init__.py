@@ -0,0 +1,54 @@
+"""
+Collectors of change events, one module each.
+
+Collectors are discovered through the ``dora_report.collectors`` entry
+point group, so a package can ship its own by declaring
+
+.. code-block:: toml
+
+    [project.entry-points."dora_report.collectors"]
+    my_collector = "my_package.collector:MyCollector"
+
+Discovery only reads the entry point metadata: a collector module, and the
+dependencies it imports, is loaded when its subcommand is selected.
+"""
+from importlib import import_module
+from importlib.metadata import EntryPoint, entry_points
+from typing import Dict
+
+ENTRY_POINT_GROUP = "dora_report.collectors"
+
+# Collectors shipped with the report, by subcommand name
+BUILTIN_COLLECTORS = {
+    "example_plugin": "dora_report.plugins.fake:FakeGitMerge",
+    "git_merge": "dora_report.plugins.git_merge:GitMergeCollector",
+    "synthetic": "dora_report.plugins.synthetic:SyntheticCollector",
+}
+
+
+def collector_entry_points() -> Dict[str, EntryPoint]:
+    """
+    Return the entry points of every known collector, without loading any.
+
+    Installed entry points add collectors; the built-in names cannot be
+    taken over.
+
+    :return: Entry points by subcommand name, built-in collectors first.
+    :rtype: Dict[str, EntryPoint]
+    """
+    collectors = {
+        name: EntryPoint(name, value, ENTRY_POINT_GROUP)
+        for name, value in BUILTIN_COLLECTORS.items()
+    }
+    for entry_point in entry_points(group=ENTRY_POINT_GROUP):
+        collectors.setdefault(entry_point.name, entry_point)
+    return collectors
+
+
+def __getattr__(name: str):
+    # Import the built-in collectors on first access only
+    for value in BUILTIN_COLLECTORS.values():
+        module, attribute = value.split(":")
+        if attribute == name:
+            return getattr(import_module(module), attribute)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
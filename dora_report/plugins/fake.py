@@ -1,9 +1,7 @@
-from datetime import datetime, timedelta
+from datetime import timedelta
 from typing import Generator
-from argparse import Namespace
 from faker import Faker
 from dora_report.models import ChangeEvent
-import os
 
 class FakeGitMerge:
     """
@@ -61,7 +59,7 @@ class FakeGitMerge:
 
         # Generate events until the current_time exceeds 'until'
         while current_time < self.until:
-            self.log.info("Generating a new ChangeEvent")
+            self.log.debug("Generating a new ChangeEvent")
             # Generate a random increment (e.g., 1-10 minutes)
             increment = timedelta(minutes=fake.random_int(min=1, max=10))
             current_time += increment
@@ -76,4 +74,3 @@ class FakeGitMerge:
                 stamp=current_time,
                 success=fake.random_element([True, False, None]),
             )
- 
\ No newline at end of file
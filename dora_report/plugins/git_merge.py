@@ -0,0 +1,139 @@
+from datetime import datetime, timedelta
+from typing import Generator
+from dora_report.events import CompactChangeEvent
+from merge_commits_with_tags import (
+    CommitCache,
+    GIT_BACKENDS,
+    branch_graph,
+    calculate_lead_time,
+    get_backend,
+    iter_merge_slices,
+    use_backend,
+)
+
+class GitMergeCollector:
+    """
+    A plugin collecting change events from the merge commits of a git
+    repository.
+
+    A merge is successful when it carries a tag matching the tag pattern.
+    Merges are read in time slices of bounded size, one ``git log`` per
+    slice, and lead times come from a commit graph that loads commits as
+    branch walks reach them, started over for each slice. The ``python``
+    backend reads the repository in-process instead of running git.
+
+    The collector is trusted: it yields CompactChangeEvents built from git
+    data and the report does not validate them again.
+    """
+    name = "git_merge"
+    trusted = True
+
+    def __init__(self, log, since, until, repository, tag_pattern, branch=None, cache_dir=None, backend="git"):
+        self.log = log
+        self.since = since
+        self.until = until
+        self.repository = repository
+        self.tag_pattern = tag_pattern
+        self.branch = branch
+        self.cache_dir = cache_dir
+        self.backend = backend
+
+    @classmethod
+    def from_arguments(cls, arguments):
+        # Ensure the arguments have the required attributes
+        if not hasattr(arguments, "since_dt") or not hasattr(arguments, "until_dt"):
+            raise ValueError(
+                "Arguments object must have 'since' and 'until' attributes."
+            )
+        obj = cls(
+            arguments.log,
+            arguments.since_dt,
+            arguments.until_dt,
+            arguments.repository,
+            arguments.tag,
+            branch=arguments.branch,
+            cache_dir=arguments.cache_dir,
+            backend=arguments.backend,
+        )
+        return obj
+
+    @staticmethod
+    def add_arguments(parser):
+        """
+        Add plugin centric arguments
+
+        The repository, the tag pattern marking successful changes and
+        optionally the branch to scan, a commit cache directory and the
+        backend reading the repository.
+        """
+        parser.add_argument("repository", help="Path to the git repository")
+        parser.add_argument(
+            "--tag",
+            required=True,
+            help='Tag pattern marking a successful change (e.g., "build-*")',  # noqa: E501
+        )
+        parser.add_argument(
+            "--branch",
+            required=False,
+            default=None,
+            help='Branch to scan (e.g., "main" or "master")',  # noqa: E501
+        )
+        parser.add_argument(
+            "--cache-dir",
+            required=False,
+            default=None,
+            help="Read commits through a persistent commit metadata cache in this directory",  # noqa: E501
+        )
+        parser.add_argument(
+            "--backend",
+            choices=sorted(GIT_BACKENDS),
+            default="git",
+            help="Run git, or read objects in-process with the pure Python reader (ignores --cache-dir)",  # noqa: E501
+        )
+
+    def collect_change_events(self) -> Generator[CompactChangeEvent, None, None]:
+        """
+        A generator method that yields a CompactChangeEvent per merge commit,
+        oldest first, as each time slice of the history has been read.
+
+        :yield: CompactChangeEvent objects with the merge hash as identifier,
+                the commit time as stamp, tag-based success and the lead
+                time of the merged branch.
+        :rtype: Generator[CompactChangeEvent, None, None]
+        """
+        since = self.since.strftime("%Y-%m-%dT%H:%M:%S")
+        until = self.until.strftime("%Y-%m-%dT%H:%M:%S")
+        previous_backend = get_backend()
+        use_backend(self.backend)
+        cache = None
+        try:
+            if self.cache_dir and self.backend == "git":
+                cache = CommitCache(self.cache_dir, self.repository, log=self.log)
+            for _, merges in iter_merge_slices(
+                self.repository,
+                since,
+                until,
+                self.tag_pattern,
+                self.branch,
+                log=self.log,
+                cache=cache,
+            ):
+                if cache is None:
+                    commit_graph = branch_graph(self.repository, log=self.log)
+                else:
+                    commit_graph = cache
+                for merge in merges:
+                    lead_time = calculate_lead_time(
+                        merge, self.repository, self.log, commit_graph=commit_graph
+                    )
+                    yield CompactChangeEvent(
+                        merge["hash"],
+                        datetime.fromtimestamp(merge["timestamp"]),
+                        # Tags are already filtered by the pattern
+                        bool(merge["tags"]),
+                        None if lead_time is None else timedelta(seconds=lead_time),
+                    )
+        finally:
+            use_backend(previous_backend)
+            if cache is not None:
+                cache.close()
@@ -0,0 +1,227 @@
+from typing import Generator
+
+import numpy as np
+
+from dora_report.columns import FAILURE, SUCCESS, UNKNOWN, EventColumns, to_epoch_us
+from dora_report.events import CompactChangeEvent
+
+MICROSECONDS_PER_DAY = 86400 * 10**6
+MICROSECONDS_PER_HOUR = 3600 * 10**6
+
+# Success and failure runs drawn at once when more outcomes are needed
+RUN_BLOCK = 1024
+
+
+class SyntheticCollector:
+    """
+    A plugin generating reproducible change events at any scale.
+
+    Events arrive as a Poisson process of ``rate`` events per day. Outcomes
+    alternate between runs of successes and failure streaks: after a
+    success the next change fails with ``failure_probability`` and streaks
+    are geometrically distributed with a mean of ``streak_mean`` changes.
+    Every change is unknown instead with ``unknown_probability``. Lead times
+    are log-normal around ``lead_time_median`` hours with shape
+    ``lead_time_sigma``, or absent when the median is 0.
+
+    Events are generated with NumPy in batches of ``batch_size`` from
+    independent random streams derived from ``seed``, so the same seed
+    gives the same events whatever the batch size.
+
+    The collector is trusted: it yields CompactChangeEvents.
+    """
+    name = "synthetic"
+    trusted = True
+
+    def __init__(
+        self,
+        log,
+        since,
+        until,
+        seed=0,
+        rate=48.0,
+        failure_probability=0.1,
+        streak_mean=2.0,
+        unknown_probability=0.0,
+        lead_time_median=24.0,
+        lead_time_sigma=1.0,
+        batch_size=65536,
+    ):
+        if rate <= 0:
+            raise ValueError("Rate must be positive.")
+        if not 0 <= failure_probability <= 1 or not 0 <= unknown_probability <= 1:
+            raise ValueError("Probabilities must be between 0 and 1.")
+        if streak_mean < 1:
+            raise ValueError("Failure streaks last at least one change.")
+        if lead_time_median < 0 or lead_time_sigma < 0:
+            raise ValueError("Lead time median and sigma cannot be negative.")
+        if batch_size < 1:
+            raise ValueError("Batch size must be positive.")
+        self.log = log
+        self.since = since
+        self.until = until
+        self.seed = seed
+        self.rate = rate
+        self.failure_probability = failure_probability
+        self.streak_mean = streak_mean
+        self.unknown_probability = unknown_probability
+        self.lead_time_median = lead_time_median
+        self.lead_time_sigma = lead_time_sigma
+        self.batch_size = batch_size
+
+    @classmethod
+    def from_arguments(cls, arguments):
+        # Ensure the arguments have the required attributes
+        if not hasattr(arguments, "since_dt") or not hasattr(arguments, "until_dt"):
+            raise ValueError(
+                "Arguments object must have 'since' and 'until' attributes."
+            )
+        return cls(
+            arguments.log,
+            arguments.since_dt,
+            arguments.until_dt,
+            seed=arguments.seed,
+            rate=arguments.rate,
+            failure_probability=arguments.failure_probability,
+            streak_mean=arguments.streak_mean,
+            unknown_probability=arguments.unknown_probability,
+            lead_time_median=arguments.lead_time_median,
+            lead_time_sigma=arguments.lead_time_sigma,
+            batch_size=arguments.batch_size,
+        )
+
+    @staticmethod
+    def add_arguments(parser):
+        """
+        Add plugin centric arguments
+
+        The seed and the distributions of arrivals, outcomes and lead times.
+        """
+        parser.add_argument("--seed", type=int, default=0, help="Seed of the random streams")  # noqa: E501
+        parser.add_argument("--rate", type=float, default=48.0, help="Mean changes per day")  # noqa: E501
+        parser.add_argument(
+            "--failure-probability",
+            type=float,
+            default=0.1,
+            help="Probability that a change after a success starts a failure streak",  # noqa: E501
+        )
+        parser.add_argument(
+            "--streak-mean",
+            type=float,
+            default=2.0,
+            help="Mean length of failure streaks, in changes",  # noqa: E501
+        )
+        parser.add_argument(
+            "--unknown-probability",
+            type=float,
+            default=0.0,
+            help="Probability that the outcome of a change is unknown",  # noqa: E501
+        )
+        parser.add_argument(
+            "--lead-time-median",
+            type=float,
+            default=24.0,
+            help="Median lead time in hours, 0 for changes without lead time",  # noqa: E501
+        )
+        parser.add_argument(
+            "--lead-time-sigma",
+            type=float,
+            default=1.0,
+            help="Shape of the log-normal lead times, 0 for a constant lead time",  # noqa: E501
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=65536,
+            help="Events generated at once",  # noqa: E501
+        )
+
+    def _outcome_runs(self, rng) -> np.ndarray:
+        """
+        Return the outcomes of ``RUN_BLOCK`` success runs, each followed by
+        a failure streak.
+        """
+        if self.failure_probability == 0:
+            return np.full(RUN_BLOCK, SUCCESS, dtype=np.int8)
+        successes = rng.geometric(self.failure_probability, RUN_BLOCK)
+        failures = rng.geometric(1 / self.streak_mean, RUN_BLOCK)
+        lengths = np.column_stack((successes, failures)).ravel()
+        codes = np.tile(np.array([SUCCESS, FAILURE], dtype=np.int8), RUN_BLOCK)
+        return np.repeat(codes, lengths)
+
+    def iter_columns(self) -> Generator[EventColumns, None, None]:
+        """
+        Generate the events between since and until as batches of columns.
+
+        The columns have no identifiers, :meth:`collect_change_events`
+        numbers the events.
+
+        :yield: EventColumns of at most ``batch_size`` events, oldest first.
+        :rtype: Generator[EventColumns, None, None]
+        """
+        arrivals, outcomes, unknowns, leads = (
+            np.random.default_rng(seed)
+            for seed in np.random.SeedSequence(self.seed).spawn(4)
+        )
+        scale = MICROSECONDS_PER_DAY / self.rate
+        last = to_epoch_us(self.since)
+        until = to_epoch_us(self.until)
+        pending = np.empty(0, dtype=np.int8)
+        generated = 0
+
+        size = self.batch_size
+        # A short batch reached until
+        while size == self.batch_size:
+            gaps = arrivals.exponential(scale, self.batch_size).astype(np.int64)
+            stamps = last + np.cumsum(gaps)
+            stamps = stamps[: np.searchsorted(stamps, until, side="right")]
+            size = len(stamps)
+            if not size:
+                break
+            last = int(stamps[-1])
+
+            blocks = [pending]
+            while sum(map(len, blocks)) < size:
+                blocks.append(self._outcome_runs(outcomes))
+            pending = np.concatenate(blocks)
+            success, pending = pending[:size], pending[size:]
+            if self.unknown_probability:
+                success = np.where(
+                    unknowns.random(size) < self.unknown_probability, UNKNOWN, success
+                ).astype(np.int8)
+
+            lead_times = has_lead_time = None
+            if self.lead_time_median:
+                lead_times = (
+                    leads.lognormal(np.log(self.lead_time_median), self.lead_time_sigma, size)
+                    * MICROSECONDS_PER_HOUR
+                ).astype(np.int64)
+                has_lead_time = np.ones(size, dtype=bool)
+
+            generated += size
+            self.log.debug(f"Generated {size} synthetic events, {generated} in total")
+            yield EventColumns(stamps, success, lead_times, has_lead_time)
+
+    def collect_change_events(self) -> Generator[CompactChangeEvent, None, None]:
+        """
+        A generator method that yields the synthetic events one by one.
+
+        :yield: CompactChangeEvent objects, oldest first, identified by the
+                seed and their position like a 40 digit hash.
+        :rtype: Generator[CompactChangeEvent, None, None]
+        """
+        identifier = f"{self.seed:08x}%032x".__mod__
+        position = 0
+        for columns in self.iter_columns():
+            identifiers = map(identifier, range(position, position + len(columns)))
+            position += len(columns)
+            stamps = columns.stamps.astype("datetime64[us]").tolist()
+            success = [
+                None if code == UNKNOWN else code == SUCCESS
+                for code in columns.success.tolist()
+            ]
+            if columns.lead_times is None:
+                lead_times = [None] * len(columns)
+            else:
+                lead_times = columns.lead_times.astype("timedelta64[us]").tolist()
+            yield from map(CompactChangeEvent, identifiers, stamps, success, lead_times)
@@ -0,0 +1,75 @@
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+
+from dora_report.columns import (
+    FAILURE,
+    SUCCESS,
+    UNKNOWN,
+    EventColumns,
+    from_epoch_us,
+    to_epoch_us,
+)
+from dora_report.models import ChangeEvent, CompactChangeEvent
+
+
+def test_from_events():
+    """
+    Test the columns built from both event forms.
+    """
+    stamp = datetime(2024, 1, 1, 12, 0, 0, 250)
+    events = [
+        ChangeEvent(identifier="a", stamp=stamp, success=True),
+        CompactChangeEvent("b", stamp + timedelta(hours=1), False, timedelta(minutes=5)),
+        CompactChangeEvent("c", stamp + timedelta(hours=2), None),
+    ]
+    columns = EventColumns.from_events(events)
+
+    assert len(columns) == 3
+    assert columns.stamps.dtype == np.int64
+    assert columns.success.dtype == np.int8
+    assert list(columns.success) == [SUCCESS, FAILURE, UNKNOWN]
+    assert [from_epoch_us(value) for value in columns.stamps] == [
+        event.stamp for event in events
+    ]
+    assert list(columns.identifiers) == ["a", "b", "c"]
+    assert [columns.lead_time(i) for i in range(3)] == [None, timedelta(minutes=5), None]
+
+
+def test_from_events_without_lead_times():
+    """
+    Test that the lead-time arrays are only allocated when needed.
+    """
+    columns = EventColumns.from_events(
+        [CompactChangeEvent("a", datetime(2024, 1, 1), True)]
+    )
+    assert columns.lead_times is None
+    assert columns.lead_time(0) is None
+
+
+def test_slices_are_views():
+    """
+    Test that slicing shares the arrays of the store.
+    """
+    columns = EventColumns(np.arange(10), np.ones(10))
+    part = columns[2:5]
+
+    assert len(part) == 3
+    assert np.shares_memory(part.stamps, columns.stamps)
+    assert np.shares_memory(part.success, columns.success)
+    with pytest.raises(TypeError):
+        columns[2]
+
+
+def test_mismatched_columns():
+    with pytest.raises(ValueError):
+        EventColumns(np.arange(3), np.ones(2))
+
+
+def test_aware_stamps():
+    """
+    Test that aware datetimes are converted to UTC.
+    """
+    aware = datetime(2024, 1, 1, 14, 0, tzinfo=timezone(timedelta(hours=2)))
+    assert to_epoch_us(aware) == to_epoch_us(datetime(2024, 1, 1, 12, 0))
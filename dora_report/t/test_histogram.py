@@ -0,0 +1,83 @@
+import random
+
+import pytest
+
+from dora_report.histogram import LogHistogram, nearest_rank
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_quantiles_within_relative_error(seed):
+    """
+    Test that every quantile is within 1% of the exact nearest-rank one.
+    """
+    rng = random.Random(seed)
+    values = [int(rng.lognormvariate(20, 3)) for _ in range(rng.randint(1, 2000))]
+    histogram = LogHistogram()
+    histogram.update(values)
+
+    for q in (0.0, 0.01, 0.5, 0.9, 0.99, 1.0):
+        exact = nearest_rank(values, q)
+        assert abs(histogram.quantile(q) - exact) <= exact * 0.01 + 1
+
+
+def test_quantiles_match_quantile():
+    histogram = LogHistogram()
+    histogram.update([1, 10, 100, 1000, 10000])
+
+    assert histogram.quantiles([0.2, 0.5, 1.0]) == [
+        histogram.quantile(0.2),
+        histogram.quantile(0.5),
+        histogram.quantile(1.0),
+    ]
+
+
+def test_small_and_large_values():
+    """
+    Test that values below 1 count as zero and values above the highest as
+    the highest.
+    """
+    histogram = LogHistogram(highest=1000)
+    histogram.update([0, 0.5, -3, 10**9])
+
+    assert histogram.quantile(0.75) == 0.0
+    assert histogram.quantile(1.0) == pytest.approx(1000, rel=0.01)
+
+
+def test_empty_histogram():
+    assert LogHistogram().quantile(0.5) == 0.0
+    assert LogHistogram().quantiles([0.5, 0.9]) == [0.0, 0.0]
+    assert nearest_rank([], 0.5) is None
+
+
+def test_merge_equals_single_histogram():
+    rng = random.Random(1)
+    values = [rng.randint(0, 10**9) for _ in range(1000)]
+    whole = LogHistogram()
+    whole.update(values)
+    first, second = LogHistogram(), LogHistogram()
+    first.update(values[:300])
+    second.update(values[300:])
+
+    merged = first.merge(second)
+    assert merged.counts == whole.counts
+    assert merged.count == 1000
+
+
+def test_merge_different_parameters():
+    with pytest.raises(ValueError):
+        LogHistogram(0.01).merge(LogHistogram(0.02))
+
+
+def test_remove():
+    histogram = LogHistogram()
+    histogram.update([5, 50, 500])
+    histogram.remove(500)
+
+    assert histogram.count == 2
+    assert histogram.quantile(1.0) == pytest.approx(50, rel=0.01)
+
+
+@pytest.mark.parametrize("relative_error", [0, 1, -0.5])
+def test_invalid_relative_error(relative_error):
+    with pytest.raises(ValueError):
+        LogHistogram(relative_error)
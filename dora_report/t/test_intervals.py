@@ -0,0 +1,152 @@
+from datetime import datetime, timedelta
+import random
+
+import numpy as np
+import pytest
+
+from dora_report.columns import to_epoch_us
+from dora_report.intervals import EventSlice, Intervals
+from dora_report.main import chunk_interval
+from dora_report.models import CompactChangeEvent
+
+
+def reference_intervals(start, stop, step):
+    """The interval generator the report used before the array engine."""
+    end = start + step
+    while end < stop:
+        yield start, end, step
+        start = end
+        end = end + step
+    yield start, stop, step
+
+
+@pytest.mark.parametrize(
+    "since, size, until",
+    [
+        (datetime(2025, 7, 12), 86400.0, datetime(2025, 7, 14)),
+        (datetime(2025, 7, 12), 86400.0, datetime(2025, 7, 14, 6)),
+        (datetime(2025, 7, 12), 7 * 86400.0, datetime(2025, 7, 13)),
+        (datetime(2025, 7, 12), 86400.0, datetime(2025, 7, 12)),
+        (datetime(2025, 7, 12), 30 * 86400.0, datetime(2026, 7, 12, 0, 0, 1)),
+    ],
+)
+def test_intervals_match_generator(since, size, until):
+    intervals = Intervals(since, size, until)
+    expected = list(reference_intervals(since, until, timedelta(seconds=size)))
+
+    assert [
+        (intervals.start(i), intervals.end(i), intervals.duration)
+        for i in range(len(intervals))
+    ] == expected
+    assert [to_epoch_us(end) for _, end, _ in expected] == list(intervals.ends)
+
+
+def test_locate_and_split_agree():
+    intervals = Intervals(datetime(2025, 1, 1), 3600.0, datetime(2025, 1, 2, 0, 30))
+    rng = np.random.default_rng(0)
+    stamps = np.sort(
+        rng.integers(intervals.origin - 10**9, intervals.ends[-1] + 10**9, 10000)
+    )
+    # Stamps right on the boundaries belong to the interval they end
+    stamps = np.sort(np.concatenate((stamps, intervals.ends)))
+    bounds = intervals.split(stamps)
+    index = intervals.locate(stamps)
+
+    for i in range(len(intervals)):
+        assert (index[bounds[i]:bounds[i + 1]] == i).all()
+    assert (index[bounds[-1]:] == len(intervals)).all()
+
+
+def test_event_slice():
+    events = list(range(10))
+    view = EventSlice(events, 2, 5)
+
+    assert len(view) == 3
+    assert list(view) == [2, 3, 4]
+    assert view == [2, 3, 4]
+    assert view[-1] == 4
+    assert view[1:] == [3, 4]
+    with pytest.raises(IndexError):
+        view[3]
+
+
+def reference_chunks(events, since, until, step):
+    """Bucket events one by one, an end belonging to its interval."""
+    chunks = []
+    last_failure = None
+    for start, end, duration in reference_intervals(since, until, step):
+        chunk = [
+            e for e in events
+            if e.stamp <= end and (not chunks or e.stamp > chunks[-1]["end"])
+        ]
+        for event in chunk:
+            if event.success:
+                last_failure = None
+            elif event.success is False and last_failure is None:
+                last_failure = event.stamp
+        chunks.append(
+            {
+                "start": start,
+                "end": end,
+                "duration": duration,
+                "last_failure": last_failure,
+                "events": chunk,
+            }
+        )
+    return chunks
+
+
+@pytest.mark.parametrize("block_size", [1, 7, 4096])
+@pytest.mark.parametrize("seed", range(10))
+def test_chunk_interval_matches_reference(seed, block_size):
+    rng = random.Random(seed)
+    since = datetime(2025, 1, 1)
+    until = since + timedelta(hours=rng.randint(1, 60), minutes=rng.randint(0, 59))
+    events = []
+    for i in range(rng.randint(0, 200)):
+        stamp = since + timedelta(minutes=rng.randint(-30, 4000))
+        if rng.random() < 0.1:
+            # Land right on an interval boundary
+            stamp = since + timedelta(hours=rng.randint(0, 60))
+        events.append(
+            CompactChangeEvent(str(i), stamp, rng.choice([True, False, None]))
+        )
+    ordered = sorted(events, key=lambda e: e.stamp)
+    expected = reference_chunks(ordered, since, until, timedelta(hours=1))
+
+    actual = list(chunk_interval(iter(ordered), since, 3600.0, until, block_size))
+    assert actual == expected
+    if block_size < len(events):
+        return
+    # Events out of order land in the same intervals, in their own order
+    actual = list(chunk_interval(iter(events), since, 3600.0, until))
+    for chunk, reference in zip(actual, expected):
+        assert sorted(chunk["events"]) == sorted(reference["events"])
+        assert list(chunk["events"]) == [e for e in events if e in reference["events"]]
+
+
+def test_chunk_interval_streams():
+    """
+    Test that an interval is yielded once an event past its end is read,
+    without reading the rest of the events.
+    """
+    read = []
+
+    def events():
+        for hour in range(200):
+            read.append(hour)
+            yield CompactChangeEvent(
+                str(hour), datetime(2025, 1, 1) + timedelta(hours=hour, minutes=30), True
+            )
+
+    chunks = chunk_interval(
+        events(), datetime(2025, 1, 1), 3600.0, datetime(2025, 1, 6), block_size=1
+    )
+    first = next(chunks)
+    assert list(first["events"]) == [
+        CompactChangeEvent("0", datetime(2025, 1, 1, 0, 30), True)
+    ]
+    assert read == [0, 1]
+    assert len(list(chunks)) == 119
+    # Nothing is read past until
+    assert len(read) == 121
@@ -1,5 +1,6 @@
 from datetime import datetime, timedelta
 import json
+import random
 from unittest.mock import MagicMock, patch
 
 import pytest
@@ -11,12 +12,15 @@ from dora_report.main import (
     DoraReport, 
     Record,
 ) 
+from dora_report.metrics import MetricAccumulator
+from dora_report.models import CompactChangeEvent
 
 
 class FakeEvent:
-    def __init__(self, stamp, success=None):
+    def __init__(self, stamp, success=None, lead_time=None):
         self.stamp = stamp
         self.success = success
+        self.lead_time = lead_time
             
     def __eq__(self, other): 
         if self.stamp == other.stamp:
@@ -44,6 +48,19 @@ def test_main(script_runner):
         assert "lead_time_for_changes" in result 
 
 
+def test_main_git_merge(script_runner, git_repository):
+    result = script_runner.run(
+        f"dora_report/main.py --since 2023-01-01 --until 2023-01-02 --interval 1d git_merge {git_repository} --tag 'build-*'",
+        check=True,
+        shell=True,
+    )
+
+    records = [json.loads(line) for line in result.stdout.splitlines()]
+    assert len(records) == 1
+    assert records[0]["change_failure_rate"] == 0.5
+    assert records[0]["start"] == "2023-01-01T00:00:00"
+
+
 @pytest.fixture
 def interval_chunks():
     with patch("dora_report.main.chunk_interval") as p:
@@ -79,6 +96,7 @@ def test_dora_report_records(interval_chunks, root_logger):
     args.collector = MagicMock()
     args.interval_seconds = 86400.0
     args.interval_unit = "d"
+    args.window_seconds = None
     args.since = datetime(2025, 7, 12)
     args.until = datetime(2025, 7, 14)
     args.log = root_logger
@@ -94,6 +112,12 @@ def test_dora_report_records(interval_chunks, root_logger):
             change_failure_rate=0.0,
             mean_time_to_recover=timedelta(0),
             lead_time_for_changes=timedelta(0),
+            time_to_recover_p50=timedelta(0),
+            time_to_recover_p90=timedelta(0),
+            time_to_recover_p99=timedelta(0),
+            lead_time_p50=timedelta(0),
+            lead_time_p90=timedelta(0),
+            lead_time_p99=timedelta(0),
         ),
         Record(
             start=datetime(2025, 7, 13), 
@@ -103,10 +127,251 @@ def test_dora_report_records(interval_chunks, root_logger):
             change_failure_rate=0.0, 
             mean_time_to_recover=timedelta(0), 
             lead_time_for_changes=timedelta(0),
+            time_to_recover_p50=timedelta(0),
+            time_to_recover_p90=timedelta(0),
+            time_to_recover_p99=timedelta(0),
+            lead_time_p50=timedelta(0),
+            lead_time_p90=timedelta(0),
+            lead_time_p99=timedelta(0),
         ),
     ]
 
 
+def test_dora_report_engines_agree(root_logger, assert_metrics_close):
+    """
+    Test that the single-pass accumulator gives the records of the
+    reference metric functions.
+    """
+    outcomes = [True, False, None, False, True, None, True, False, False, True]
+    events = [
+        CompactChangeEvent(str(i), datetime(2025, 7, 12) + timedelta(hours=5 * i), success)
+        for i, success in enumerate(outcomes)
+    ]
+    records = {}
+    for engine in ("accumulator", "reference"):
+        args = MagicMock()
+        args.collector.collect_change_events.return_value = iter(events)
+        args.collector.trusted = True
+        args.validate_events = False
+        args.metrics_engine = engine
+        args.interval_seconds = 86400.0
+        args.interval_unit = "d"
+        args.window_seconds = None
+        args.since_dt = datetime(2025, 7, 12)
+        args.until_dt = datetime(2025, 7, 15)
+        args.log = root_logger
+        report = DoraReport(args)
+        report.analyze()
+        records[engine] = [record.fields for record in report.records]
+
+    assert len(records["reference"]) == 3
+    for accumulated, reference in zip(records["accumulator"], records["reference"]):
+        assert_metrics_close(accumulated, reference)
+
+
+def test_dora_report_carries_open_state(root_logger):
+    """
+    Test that a failure streak crossing an interval boundary is measured in
+    the interval of its recovery, where the reference engine misses it.
+    """
+    events = [
+        CompactChangeEvent("1", datetime(2025, 7, 12, 20), True),
+        CompactChangeEvent("2", datetime(2025, 7, 12, 22), False),
+        CompactChangeEvent("3", datetime(2025, 7, 13, 2), True),
+    ]
+    results = {}
+    for engine in ("accumulator", "reference"):
+        args = MagicMock()
+        args.collector.collect_change_events.return_value = iter(events)
+        args.collector.trusted = True
+        args.validate_events = False
+        args.metrics_engine = engine
+        args.interval_seconds = 86400.0
+        args.interval_unit = "d"
+        args.window_seconds = None
+        args.since_dt = datetime(2025, 7, 12)
+        args.until_dt = datetime(2025, 7, 14)
+        args.log = root_logger
+        report = DoraReport(args)
+        report.analyze()
+        results[engine] = [
+            (r.fields["mean_time_to_recover"], r.fields["lead_time_for_changes"])
+            for r in report.records
+        ]
+
+    assert results["accumulator"] == [
+        (timedelta(0), timedelta(0)),
+        (timedelta(hours=4), timedelta(hours=4)),
+    ]
+    assert results["reference"] == [(timedelta(0), timedelta(0))] * 2
+
+
+def test_dora_report_moving_averages(root_logger):
+    """
+    Test that moving averages of the metrics are added to the records.
+    """
+    events = [
+        CompactChangeEvent("1", datetime(2025, 7, 12, 10), True),
+        CompactChangeEvent("2", datetime(2025, 7, 13, 10), False),
+        CompactChangeEvent("3", datetime(2025, 7, 14, 10), True),
+    ]
+    args = MagicMock()
+    args.collector.collect_change_events.return_value = iter(events)
+    args.collector.trusted = True
+    args.validate_events = False
+    args.metrics_engine = "accumulator"
+    args.ma = [2]
+    args.ema = [3]
+    args.interval_seconds = 86400.0
+    args.interval_unit = "d"
+    args.window_seconds = None
+    args.since_dt = datetime(2025, 7, 12)
+    args.until_dt = datetime(2025, 7, 15)
+    args.log = root_logger
+    report = DoraReport(args)
+    report.analyze()
+
+    assert [r.fields["ma_change_failure_rate"] for r in report.records] == [0.0, 0.5, 0.5]
+    assert [r.fields["ema3_change_failure_rate"] for r in report.records] == [0.0, 0.5, 0.25]
+    assert [r.fields["ma_mean_time_to_recover"] for r in report.records] == [
+        timedelta(0), timedelta(0), timedelta(hours=12)
+    ]
+
+
+def sliding_report(events, root_logger, since, until, interval, window):
+    args = MagicMock()
+    args.collector.collect_change_events.return_value = iter(events)
+    args.collector.trusted = True
+    args.validate_events = False
+    args.metrics_engine = "accumulator"
+    args.ma = []
+    args.ema = []
+    args.interval_seconds = interval
+    args.interval_unit = "d"
+    args.window_seconds = window
+    args.since_dt = since
+    args.until_dt = until
+    args.log = root_logger
+    report = DoraReport(args)
+    report.analyze()
+    return report.records
+
+
+def random_events(seed, days, lead_times=False):
+    rng = random.Random(seed)
+    stamp = datetime(2025, 1, 1)
+    events = []
+    for i in range(days * 8):
+        stamp += timedelta(minutes=rng.randint(0, 360))
+        lead_time = None
+        if lead_times and rng.random() < 0.5:
+            lead_time = timedelta(minutes=rng.randint(0, 3000))
+        events.append(CompactChangeEvent(str(i), stamp, rng.choice([True, False, None]), lead_time))
+    return events
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("lead_times", [False, True])
+def test_sliding_window_without_overlap_matches_intervals(seed, lead_times, root_logger):
+    """
+    Test that windows as wide as their step give the interval records,
+    with and without lead times measured by the collector.
+    """
+    events = random_events(seed, 20, lead_times)
+    since, until = datetime(2025, 1, 1), datetime(2025, 1, 11)
+    tumbling = sliding_report(events, root_logger, since, until, 86400.0, None)
+    sliding = sliding_report(events, root_logger, since, until, 86400.0, 86400.0)
+
+    assert len(sliding) == 10
+    assert [r.fields for r in sliding] == [r.fields for r in tumbling]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_sliding_window_matches_brute_force(seed, root_logger):
+    """
+    Test trailing three-day windows evaluated daily against summing the
+    contribution of every event in each window.
+    """
+    events = random_events(seed, 20)
+    # What every event adds to the stream totals, in order
+    contributions = []
+    accumulator = MetricAccumulator()
+    waiting = []
+    for event in events:
+        before = dict(vars(accumulator))
+        accumulator.add(event)
+        recoveries = []
+        if accumulator.recoveries > before["recoveries"]:
+            recoveries.append(event.stamp - before["failure_start"])
+        lead_times = []
+        if event.success:
+            lead_times, waiting = [event.stamp - stamp for stamp in waiting], []
+        elif event.lead_time is None:
+            waiting.append(event.stamp)
+        if event.lead_time is not None:
+            lead_times.append(event.lead_time)
+        contributions.append(
+            (event.stamp, {k: accumulator.__dict__[k] - before[k] for k in (
+                "events", "failures", "recoveries", "recovery_total", "lead_times", "lead_time_total"
+            )}, recoveries, lead_times)
+        )
+    since, until = datetime(2025, 1, 1), datetime(2025, 1, 15)
+    records = sliding_report(events, root_logger, since, until, 86400.0, 3 * 86400.0)
+
+    assert len(records) == 14
+    for record in records:
+        start, end = record.fields["start"], record.fields["end"]
+        assert end - start == timedelta(days=3)
+        totals = MetricAccumulator()
+        for stamp, added, recoveries, lead_times in contributions:
+            if start < stamp <= end:
+                for key, value in added.items():
+                    setattr(totals, key, getattr(totals, key) + value)
+                totals.recovery_histogram.update(r // timedelta(microseconds=1) for r in recoveries)
+                totals.lead_time_histogram.update(l // timedelta(microseconds=1) for l in lead_times)
+        assert {
+            k: v for k, v in record.fields.items() if k not in ("start", "end", "duration")
+        } == totals.metrics(timedelta(seconds=3))
+
+
+def test_main_synthetic(script_runner):
+    command = "dora_report/main.py --since 2024-01-01 --until 2024-01-08 --interval 1d synthetic --seed 5 --rate 100"
+    first = script_runner.run(command, check=True, shell=True)
+    second = script_runner.run(command, check=True, shell=True)
+
+    records = [json.loads(line) for line in first.stdout.splitlines()]
+    assert len(records) == 7
+    assert first.stdout == second.stdout
+    assert sum(record["deployment_frequency"] for record in records) == pytest.approx(700, rel=0.1)
+
+
+def test_main_requires_collector(script_runner):
+    result = script_runner.run("dora_report/main.py --interval 1d", shell=True)
+
+    assert not result.success
+    assert "a collector is required: example_plugin, git_merge, synthetic" in result.stderr
+
+
+def test_main_collector_help(script_runner):
+    result = script_runner.run("dora_report/main.py git_merge --help", shell=True)
+
+    assert result.success
+    assert "--tag TAG" in result.stdout
+
+
+def test_main_sliding_window(script_runner):
+    result = script_runner.run(
+        "dora_report/main.py --since 2025-07-12 --until 2025-07-15 --interval 1d --window 2d example_plugin",
+        check=True,
+        shell=True,
+    )
+    records = [json.loads(line) for line in result.stdout.splitlines()]
+    assert [r["start"] for r in records] == [
+        "2025-07-11T00:00:00", "2025-07-12T00:00:00", "2025-07-13T00:00:00"
+    ]
+    assert {r["duration"] for r in records} == {172800.0}
+
+
 @pytest.mark.parametrize(
     "interval_str, expected_output",
     [
@@ -173,4 +438,21 @@ def test_chunk_interval():
     ]
     
     assert expect == actual 
-        
\ No newline at end of file
+        
+
+def test_main_profile(script_runner, tmp_path):
+    profile = tmp_path / "profile.json"
+    command = f"dora_report/main.py --since 2024-01-01 --until 2024-01-08 --interval 1d --profile-output {profile} synthetic --rate 100"
+    plain = script_runner.run(command.replace(f"--profile-output {profile} ", ""), check=True, shell=True)
+    result = script_runner.run(command, check=True, shell=True)
+
+    assert result.stdout == plain.stdout
+    report = json.loads(profile.read_text())
+    assert set(report["stages"]) == {"collect", "validate", "chunk", "metrics", "serialize"}
+    assert report["counts"]["events"] == report["stages"]["collect"]["calls"]
+    assert report["counts"]["intervals"] == report["counts"]["records"] == 7
+    assert report["per_second"]["events"] > 0
+
+    result = script_runner.run(command.replace(f"-output {profile}", ""), check=True, shell=True)
+    assert result.stdout == plain.stdout
+    assert "events: " in result.stderr
@@ -1,11 +1,21 @@
 import pytest
 from datetime import datetime, timedelta
-from dora_report.models import ChangeEvent
+import random
+from dora_report.columns import EventColumns
+from dora_report.models import ChangeEvent, CompactChangeEvent
 from dora_report.metrics import (
     change_frequency, 
     change_failure_rate,
     mean_time_to_recover,
     lead_time_for_changes,
+    change_frequency_vectorized,
+    change_failure_rate_vectorized,
+    mean_time_to_recover_vectorized,
+    lead_time_for_changes_vectorized,
+    MetricAccumulator,
+    PENDING_ERROR,
+    PendingStamps,
+    reference_metrics,
 )
 from faker import Faker
 
@@ -311,3 +321,213 @@ def test_lead_time_for_changes_with_fixture(change_event_factory):
 
     # Assert the result
     assert lead_time_for_changes(change_events) == expected_mean_lead_time 
+
+
+def test_metrics_accept_compact_events(change_event_factory):
+    """
+    Test that every metric gives the same result for both event forms.
+    """
+    events = [
+        change_event_factory(success)
+        for success in (True, False, None, False, True, True, False, True)
+    ]
+    compact = [CompactChangeEvent.from_event(e) for e in events]
+
+    assert change_frequency(compact, timedelta(days=1)) == change_frequency(
+        events, timedelta(days=1)
+    )
+    assert change_failure_rate(compact) == change_failure_rate(events)
+    assert mean_time_to_recover(compact) == mean_time_to_recover(events)
+    assert lead_time_for_changes(compact) == lead_time_for_changes(events)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_vectorized_metrics_match_reference(seed, assert_metrics_close):
+    """
+    Test that the vectorized metrics give exactly the results of the
+    reference functions, unknown outcomes and odd microseconds included.
+    """
+    rng = random.Random(seed)
+    stamp = datetime(2024, 1, 1)
+    events = []
+    for position in range(rng.randint(0, 300)):
+        stamp += timedelta(seconds=rng.randint(0, 900), microseconds=rng.randint(0, 999999))
+        events.append(
+            CompactChangeEvent(
+                str(position), stamp, rng.choice([True, False, False, None])
+            )
+        )
+    columns = EventColumns.from_events(events)
+
+    assert change_frequency_vectorized(columns, timedelta(days=3)) == change_frequency(
+        events, timedelta(days=3)
+    )
+    assert change_failure_rate_vectorized(columns) == change_failure_rate(events)
+    assert mean_time_to_recover_vectorized(columns) == mean_time_to_recover(events)
+    assert lead_time_for_changes_vectorized(columns) == lead_time_for_changes(events)
+    assert_metrics_close(
+        MetricAccumulator().update(events).metrics(timedelta(days=3)),
+        reference_metrics(events, timedelta(days=3)),
+    )
+
+
+def test_lead_times_of_events_are_used(assert_metrics_close):
+    """
+    Test that every engine takes the lead time a collector measured and
+    only makes events without one wait for the next success.
+    """
+    events = [
+        CompactChangeEvent("1", datetime(2023, 1, 1, 12, 0), False, timedelta(hours=1)),
+        CompactChangeEvent("2", datetime(2023, 1, 1, 12, 30), False),
+        CompactChangeEvent("3", datetime(2023, 1, 1, 13, 0), True, timedelta(hours=3)),
+        CompactChangeEvent("4", datetime(2023, 1, 1, 14, 0), True),
+    ]
+    columns = EventColumns.from_events(events)
+
+    # 1 hour, 3 hours and the 30 minutes event 2 waited
+    assert lead_time_for_changes(events) == timedelta(hours=1.5)
+    assert lead_time_for_changes_vectorized(columns) == timedelta(hours=1.5)
+    fields = MetricAccumulator().update(events).metrics(timedelta(days=1))
+    assert fields["lead_time_for_changes"] == timedelta(hours=1.5)
+    assert_metrics_close(fields, reference_metrics(events, timedelta(days=1)))
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_vectorized_lead_times_of_events_match_reference(seed):
+    """
+    Test mixed measured and waiting lead times against the reference.
+    """
+    rng = random.Random(seed)
+    stamp = datetime(2024, 1, 1)
+    events = []
+    for position in range(rng.randint(0, 300)):
+        stamp += timedelta(seconds=rng.randint(0, 900), microseconds=rng.randint(0, 999999))
+        lead_time = rng.choice([None, timedelta(seconds=rng.randint(0, 10**6))])
+        events.append(
+            CompactChangeEvent(
+                str(position), stamp, rng.choice([True, False, None]), lead_time
+            )
+        )
+
+    assert lead_time_for_changes_vectorized(
+        EventColumns.from_events(events)
+    ) == lead_time_for_changes(events)
+
+
+@pytest.mark.parametrize(
+    "outcomes",
+    [
+        [],
+        [None, None],
+        [False, None, False, True, None, True],
+        [True, True, True],
+        [False, False, False],
+        [False, True, False],
+        [None, False, None, None, True],
+    ],
+)
+def test_vectorized_metrics_edge_cases(change_event_factory, outcomes, assert_metrics_close):
+    """
+    Test the vectorized metrics on empty, unrecovered and unknown-only events.
+    """
+    events = [change_event_factory(success) for success in outcomes]
+    columns = EventColumns.from_events(events)
+
+    assert change_failure_rate_vectorized(columns) == change_failure_rate(events)
+    assert mean_time_to_recover_vectorized(columns) == mean_time_to_recover(events)
+    assert lead_time_for_changes_vectorized(columns) == lead_time_for_changes(events)
+    assert_metrics_close(
+        MetricAccumulator().update(events).metrics(timedelta(days=1)),
+        reference_metrics(events, timedelta(days=1)),
+    )
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_accumulator_carry(seed):
+    """
+    Test that carrying the open state across pieces of the events measures
+    every recovery and lead time of the whole sequence once.
+    """
+    rng = random.Random(seed)
+    stamp = datetime(2024, 1, 1)
+    events = []
+    for position in range(200):
+        stamp += timedelta(seconds=rng.randint(0, 900))
+        events.append(
+            CompactChangeEvent(str(position), stamp, rng.choice([True, False, None]))
+        )
+    cuts = sorted(rng.sample(range(1, 200), 10))
+    accumulator = MetricAccumulator()
+    pieces = []
+    for start, stop in zip([0] + cuts, cuts + [200]):
+        pieces.append(accumulator.update(events[start:stop]))
+        accumulator = accumulator.carry()
+    whole = MetricAccumulator().update(events)
+
+    for name in ("events", "failures", "recoveries", "lead_times"):
+        assert sum(getattr(p, name) for p in pieces) == getattr(whole, name)
+    assert sum((p.recovery_total for p in pieces), timedelta(0)) == whole.recovery_total
+    assert sum((p.lead_time_total for p in pieces), timedelta(0)) == whole.lead_time_total
+
+
+def test_accumulator_long_wait(assert_metrics_close):
+    """
+    Test that the events waiting for a success take bounded memory while
+    the lead times stay exact and their percentiles close.
+    """
+    rng = random.Random(0)
+    stamp = datetime(2024, 1, 1)
+    events = []
+    for position in range(50000):
+        stamp += timedelta(seconds=rng.randint(0, 600), microseconds=rng.randint(0, 999999))
+        events.append(CompactChangeEvent(str(position), stamp, False))
+    events.append(CompactChangeEvent("success", stamp + timedelta(hours=1), True))
+
+    accumulator = MetricAccumulator().update(events[:-1])
+    assert len(accumulator.waiting) == 50000
+    assert len(accumulator.waiting.runs) < 10000
+    accumulator.update(events[-1:])
+
+    expected = reference_metrics(events, timedelta(days=1))
+    actual = accumulator.metrics(timedelta(days=1))
+    assert actual["lead_time_for_changes"] == expected["lead_time_for_changes"]
+    for name in ("lead_time_p50", "lead_time_p90", "lead_time_p99"):
+        assert abs(actual[name] - expected[name]) <= expected[name] * (0.01 + PENDING_ERROR)
+
+
+def test_pending_stamps_merge_within_error():
+    rng = random.Random(1)
+    pending = PendingStamps()
+    stamp = datetime(2024, 1, 1)
+    for _ in range(20000):
+        stamp += timedelta(microseconds=rng.randint(0, 10**9))
+        pending.add(stamp)
+    carried = pending.copy()
+    pending.clear()
+
+    assert len(carried) == 20000
+    assert len(carried.runs) < 10000
+    assert sum(count for _, _, count in carried.runs) + len(carried.recent) == 20000
+    for first, last, _ in carried.runs:
+        assert last - first <= (stamp - last) * PENDING_ERROR
+    assert len(pending) == 0 and pending.runs == []
+
+
+def test_accumulator_zero_duration():
+    with pytest.raises(ValueError):
+        MetricAccumulator().change_frequency(timedelta(0))
+
+
+def test_vectorized_metrics_do_not_overflow():
+    """
+    Test sums of durations past the int64 range of microseconds.
+    """
+    events = [
+        CompactChangeEvent(str(i), datetime(1975, 1, 1) + timedelta(seconds=i), False)
+        for i in range(10000)
+    ]
+    events.append(CompactChangeEvent("recovery", datetime(2030, 1, 1), True))
+    columns = EventColumns.from_events(events)
+
+    assert lead_time_for_changes_vectorized(columns) == lead_time_for_changes(events)
+    assert mean_time_to_recover_vectorized(columns) == mean_time_to_recover(events)
@@ -1,6 +1,7 @@
 import pytest
 from datetime import datetime, timedelta
-from dora_report.models import ChangeEvent
+from pydantic import ValidationError
+from dora_report.models import ChangeEvent, CompactChangeEvent, compact_events
 
 def test_change_event_instantiation():
     """
@@ -33,3 +34,66 @@ def test_change_event_instantiation_success_is_none():
     assert change_event.identifier == "unique-change-001"
     assert change_event.stamp == datetime(2023, 1, 1, 12, 0, 0)
     assert change_event.success is None
+
+
+def test_change_event_lead_time():
+    """
+    Test that the lead time defaults to None and accepts a timedelta.
+    """
+    change_event = ChangeEvent(
+        identifier="unique-change-001",
+        stamp=datetime(2023, 1, 1, 12, 0, 0),
+        success=True,
+    )
+    assert change_event.lead_time is None
+
+    change_event = ChangeEvent(
+        identifier="unique-change-001",
+        stamp=datetime(2023, 1, 1, 12, 0, 0),
+        success=True,
+        lead_time=timedelta(hours=2),
+    )
+    assert change_event.lead_time == timedelta(hours=2)
+
+
+def test_compact_change_event():
+    """
+    Test that the compact form mirrors ChangeEvent without a __dict__.
+    """
+    change_event = ChangeEvent(
+        identifier="unique-change-001",
+        stamp=datetime(2023, 1, 1, 12, 0, 0),
+        success=True,
+        lead_time=timedelta(hours=2),
+    )
+    compact = CompactChangeEvent.from_event(change_event)
+
+    assert compact == ("unique-change-001", datetime(2023, 1, 1, 12), True, timedelta(hours=2))
+    assert compact.stamp == change_event.stamp
+    assert not hasattr(compact, "__dict__")
+    assert CompactChangeEvent("id", datetime(2023, 1, 1), None).lead_time is None
+
+
+def test_compact_events_validation():
+    """
+    Test that events are validated unless the collector is trusted.
+    """
+    stamp = datetime(2023, 1, 1, 12, 0, 0)
+    events = [
+        ChangeEvent(identifier="a", stamp=stamp, success=True),
+        CompactChangeEvent("b", "2023-01-01T13:00:00", False),
+        {"identifier": "c", "stamp": stamp, "success": None},
+    ]
+
+    compact = list(compact_events(events))
+    assert [e.identifier for e in compact] == ["a", "b", "c"]
+    # Validation coerces like the pydantic model does
+    assert compact[1].stamp == datetime(2023, 1, 1, 13, 0, 0)
+    assert all(isinstance(e, CompactChangeEvent) for e in compact)
+
+    # The trusted fast path passes compact events through untouched
+    trusted = list(compact_events(events[1:2], validate=False))
+    assert trusted[0] is events[1]
+
+    with pytest.raises(ValidationError):
+        list(compact_events([CompactChangeEvent("d", "not a date", True)]))
@@ -0,0 +1,194 @@
+import csv
+import io
+import json
+import os
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from dora_report.main import Record
+from dora_report.output import (
+    ColumnarSerializer,
+    CSVSerializer,
+    NDJSONSerializer,
+    RecordWriter,
+    read_columnar,
+)
+
+
+class CountingStream(io.StringIO):
+    def __init__(self):
+        super().__init__()
+        self.flushes = []
+
+    def flush(self):
+        self.flushes.append(self.getvalue().count("\n"))
+        super().flush()
+
+
+def make_record(day):
+    return Record(
+        start=datetime(2025, 7, day),
+        end=datetime(2025, 7, day + 1),
+        duration=timedelta(days=1),
+        deployment_frequency=1.0,
+    )
+
+
+def test_flush_every_record():
+    stream = CountingStream()
+    with RecordWriter(stream, flush_every=1) as writer:
+        writer.write(make_record(1))
+        assert stream.getvalue() == make_record(1).json() + "\n"
+        writer.write(make_record(2))
+    assert stream.flushes[:2] == [1, 2]
+
+
+def test_flush_every_n_records():
+    stream = CountingStream()
+    with RecordWriter(stream, flush_every=3) as writer:
+        assert writer.write_all(make_record(day) for day in range(1, 8)) == 7
+    assert stream.flushes[:2] == [3, 6]
+    assert stream.getvalue().splitlines() == [
+        make_record(day).json() for day in range(1, 8)
+    ]
+
+
+def test_flush_on_batch_size():
+    stream = CountingStream()
+    writer = RecordWriter(stream, batch_size=1)
+    writer.write(make_record(1))
+    assert stream.flushes == [1]
+
+
+def test_batches_by_default():
+    stream = CountingStream()
+    with RecordWriter(stream, batch_size=3) as writer:
+        assert writer.write_all(make_record(day) for day in range(1, 8)) == 7
+    assert stream.flushes[:3] == [3, 6, 7]
+
+
+def test_flush_every_record_on_a_pipe(tmp_path):
+    """
+    Test that a pipe gets every record as it is written by default while a
+    file is written in batches.
+    """
+    read_end, write_end = os.pipe()
+    with open(read_end) as reader, open(write_end, "w") as stream:
+        writer = RecordWriter(stream)
+        assert writer.flush_every == 1
+        writer.write(make_record(1))
+        assert reader.readline() == make_record(1).json() + "\n"
+    with open(tmp_path / "records.ndjson", "w") as stream:
+        assert RecordWriter(stream).flush_every == 0
+    assert RecordWriter(CountingStream()).flush_every == 0
+
+
+def test_flush_on_time():
+    """
+    Test that records are flushed flush_seconds after the last flush while
+    no further records arrive.
+    """
+    stream = CountingStream()
+    with RecordWriter(stream, flush_every=0, flush_seconds=0.05) as writer:
+        writer.write(make_record(1))
+        writer.write(make_record(2))
+        assert stream.flushes == []
+        deadline = time.monotonic() + 5
+        while not stream.flushes and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert stream.flushes[:1] == [2]
+    assert writer.timer is not None and not writer.timer.is_alive()
+
+
+def test_no_flush_before_time():
+    stream = CountingStream()
+    writer = RecordWriter(stream, flush_every=0, flush_seconds=60)
+    writer.write(make_record(1))
+    time.sleep(0.05)
+    assert stream.flushes == []
+    writer.close()
+    assert stream.flushes == [1]
+
+
+def report_records():
+    """Records like the report writes, with awkward float values."""
+    values = [0.0, 1 / 3, 1e-20, 12345678.9, float("inf"), float("nan")]
+    return [
+        Record(
+            start=datetime(2025, 7, 1) + timedelta(days=i),
+            end=datetime(2025, 7, 2) + timedelta(days=i),
+            duration=timedelta(days=1),
+            deployment_frequency=values[i % len(values)],
+            change_failure_rate=i / 7,
+            mean_time_to_recover=timedelta(seconds=i * 1.5, microseconds=i),
+            lead_time_for_changes=timedelta(hours=i),
+        )
+        for i in range(20)
+    ]
+
+
+def test_ndjson_matches_record_json():
+    records = report_records()
+    encoded = NDJSONSerializer().encode(records)
+    assert encoded == "".join(record.json() + "\n" for record in records)
+    # Field layouts are not mixed up
+    other = make_record(3)
+    assert NDJSONSerializer().encode([records[0], other]).splitlines()[1] == other.json()
+
+
+def test_csv():
+    records = report_records()
+    serializer = CSVSerializer()
+    data = serializer.encode(records[:5]) + serializer.encode(records[5:])
+    rows = list(csv.DictReader(io.StringIO(data)))
+
+    assert len(rows) == 20
+    for row, record in zip(rows, records):
+        expected = json.loads(record.json())
+        assert row["start"] == expected["start"]
+        assert float(row["duration"]) == expected["duration"]
+        assert float(row["change_failure_rate"]) == expected["change_failure_rate"]
+    with pytest.raises(ValueError):
+        serializer.encode([make_record(1)])
+
+
+def test_columnar_round_trip():
+    records = report_records()
+    serializer = ColumnarSerializer()
+    data = serializer.encode(records[:7]) + serializer.encode(records[7:])
+    columns = read_columnar(io.BytesIO(data))
+
+    assert list(columns) == list(records[0].fields)
+    assert columns["start"].dtype == np.dtype("datetime64[us]")
+    assert columns["start"].astype(datetime).tolist() == [r.fields["start"] for r in records]
+    assert columns["mean_time_to_recover"].astype(timedelta).tolist() == [
+        r.fields["mean_time_to_recover"] for r in records
+    ]
+    np.testing.assert_array_equal(
+        columns["deployment_frequency"],
+        [r.fields["deployment_frequency"] for r in records],
+    )
+    with pytest.raises(ValueError):
+        read_columnar(io.BytesIO(b"not columnar"))
+
+
+def test_main_formats(script_runner, tmp_path):
+    command = "dora_report/main.py --since 2025-07-12 --until 2025-07-14 --interval 1d"
+    output = tmp_path / "report.drc"
+    script_runner.run(
+        f"{command} --format columnar --output {output} example_plugin",
+        check=True,
+        shell=True,
+    )
+    with open(output, "rb") as stream:
+        columns = read_columnar(stream)
+    assert columns["start"].astype(datetime).tolist() == [
+        datetime(2025, 7, 12), datetime(2025, 7, 13)
+    ]
+
+    result = script_runner.run(f"{command} --format csv example_plugin", check=True, shell=True)
+    rows = list(csv.DictReader(io.StringIO(result.stdout)))
+    assert [row["start"] for row in rows] == ["2025-07-12T00:00:00", "2025-07-13T00:00:00"]
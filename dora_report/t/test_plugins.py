@@ -1,9 +1,21 @@
 import pytest
 from datetime import datetime, timedelta
 from argparse import Namespace
-from dora_report.plugins import FakeGitMerge
+from importlib.metadata import EntryPoint
+from unittest.mock import patch
+import dora_report.plugins
+from dora_report.plugins import (
+    ENTRY_POINT_GROUP,
+    FakeGitMerge,
+    GitMergeCollector,
+    collector_entry_points,
+)
 from dora_report.models import ChangeEvent
+from dora_report.columns import FAILURE, SUCCESS
+from dora_report.plugins.synthetic import SyntheticCollector
+import numpy as np
 import subprocess
+import sys
 
 @pytest.fixture
 def plugin_factory(root_logger, tmp_path):
@@ -52,4 +64,196 @@ def test_collect_change_events_invalid_arguments(plugin_factory):
 
     with pytest.raises(ValueError, match="Arguments object must have 'since' and 'until' attributes."):
         arguments = Namespace()
-        FakeGitMerge.from_arguments(arguments)
\ No newline at end of file
+        FakeGitMerge.from_arguments(arguments)
+
+@pytest.fixture
+def git_collector_factory(root_logger, git_repository):
+    def inner(cache_dir=None, backend="git"):
+        arguments = Namespace(
+            log=root_logger,
+            repository=str(git_repository),
+            tag="build-*",
+            branch=None,
+            cache_dir=cache_dir,
+            backend=backend,
+            since_dt=datetime(2023, 1, 1, 0, 0, 0),
+            until_dt=datetime(2023, 1, 2, 0, 0, 0),
+        )
+        return GitMergeCollector.from_arguments(arguments)
+    return inner
+
+
+@pytest.mark.parametrize(
+    "use_cache, backend", [(False, "git"), (True, "git"), (False, "python")]
+)
+def test_git_merge_collect_change_events(
+    git_collector_factory, tmp_path_factory, use_cache, backend
+):
+    """
+    Test that merges are streamed as ChangeEvents with tag based success.
+    """
+    cache_dir = str(tmp_path_factory.mktemp("cache")) if use_cache else None
+    collector = git_collector_factory(cache_dir=cache_dir, backend=backend)
+
+    events = collector.collect_change_events()
+    first = next(events)
+    events = [first, *events]
+
+    assert [(e.stamp, e.success, e.lead_time) for e in events] == [
+        (datetime(2023, 1, 1, 12, 0, 0), False, timedelta(hours=2)),
+        (datetime(2023, 1, 1, 12, 30, 0), True, timedelta(hours=1, minutes=30)),
+    ]
+    assert all(len(e.identifier) == 40 for e in events)
+
+
+@pytest.mark.parametrize("backend", ["git", "python"])
+def test_git_merge_collect_change_events_sliced(git_collector_factory, backend):
+    """
+    Test that merges read a slice at a time keep their lead times, without
+    loading the commit graph of the range up front.
+    """
+    import merge_commits_with_tags
+    from functools import partial
+
+    collector = git_collector_factory(backend=backend)
+    sliced = partial(merge_commits_with_tags.iter_merge_slices, slice_size=1)
+    with patch("dora_report.plugins.git_merge.iter_merge_slices", sliced), \
+            patch.object(merge_commits_with_tags, "load_commit_graph", side_effect=AssertionError):  # noqa: E501
+        events = list(collector.collect_change_events())
+
+    assert [(e.stamp, e.success, e.lead_time) for e in events] == [
+        (datetime(2023, 1, 1, 12, 0, 0), False, timedelta(hours=2)),
+        (datetime(2023, 1, 1, 12, 30, 0), True, timedelta(hours=1, minutes=30)),
+    ]
+
+
+def test_git_merge_invalid_arguments():
+    with pytest.raises(ValueError, match="Arguments object must have 'since' and 'until' attributes."):
+        GitMergeCollector.from_arguments(Namespace())
+
+
+def test_collector_entry_points_builtin():
+    collectors = collector_entry_points()
+
+    assert list(collectors) == ["example_plugin", "git_merge", "synthetic"]
+    assert collectors["example_plugin"].load() is FakeGitMerge
+    assert collectors["git_merge"].load() is GitMergeCollector
+
+
+def test_collector_entry_points_installed():
+    """
+    Test that installed collectors are discovered without loading them and
+    cannot take over a built-in name.
+    """
+    installed = [
+        EntryPoint("mine", "my_package.collector:MyCollector", ENTRY_POINT_GROUP),
+        EntryPoint("git_merge", "my_package.collector:Other", ENTRY_POINT_GROUP),
+    ]
+    with patch("dora_report.plugins.entry_points", return_value=installed) as found:
+        collectors = collector_entry_points()
+
+    found.assert_called_once_with(group=ENTRY_POINT_GROUP)
+    assert list(collectors) == ["example_plugin", "git_merge", "synthetic", "mine"]
+    assert collectors["mine"].value == "my_package.collector:MyCollector"
+    assert collectors["git_merge"].value == "dora_report.plugins.git_merge:GitMergeCollector"
+
+
+def test_plugins_unknown_attribute():
+    with pytest.raises(AttributeError):
+        dora_report.plugins.NoCollector
+
+
+def test_main_imports_collectors_lazily():
+    """
+    Test that the report does not import a collector before one is selected.
+    """
+    code = (
+        "import sys, dora_report.main\n"
+        "print(sorted(m for m in ('faker', 'merge_commits_with_tags') if m in sys.modules))"
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+
+    assert result.stdout.strip() == "[]"
+
+
+@pytest.fixture
+def synthetic_factory(root_logger):
+    def inner(since=datetime(2024, 1, 1), until=datetime(2024, 3, 1), **options):
+        return SyntheticCollector(root_logger, since, until, **options)
+    return inner
+
+
+def test_synthetic_is_deterministic(synthetic_factory):
+    """
+    Test that a seed gives the same events whatever the batch size.
+    """
+    events = list(synthetic_factory(seed=3, unknown_probability=0.1).collect_change_events())
+    batched = list(
+        synthetic_factory(seed=3, unknown_probability=0.1, batch_size=7).collect_change_events()
+    )
+    other = list(synthetic_factory(seed=4, unknown_probability=0.1).collect_change_events())
+
+    assert len(events) > 2000
+    assert events == batched
+    assert events != other
+    assert events[0].identifier == "00000003" + "0" * 32
+    assert all(datetime(2024, 1, 1) < e.stamp <= datetime(2024, 3, 1) for e in events)
+    assert [e.stamp for e in events] == sorted(e.stamp for e in events)
+
+
+def test_synthetic_distributions(synthetic_factory):
+    """
+    Test the arrival rate, failure streaks and lead times on a large sample.
+    """
+    collector = synthetic_factory(
+        until=datetime(2025, 1, 1),
+        rate=500,
+        failure_probability=0.2,
+        streak_mean=4,
+        lead_time_median=12,
+        lead_time_sigma=0.5,
+    )
+    columns = list(collector.iter_columns())
+    success = np.concatenate([c.success for c in columns])
+    lead_times = np.concatenate([c.lead_times for c in columns])
+
+    assert len(success) == pytest.approx(366 * 500, rel=0.01)
+    # Streaks start after successes and last four changes on average
+    starts = np.flatnonzero((success[1:] == FAILURE) & (success[:-1] == SUCCESS))
+    assert len(starts) / np.count_nonzero(success == SUCCESS) == pytest.approx(0.2, rel=0.05)
+    assert np.count_nonzero(success == FAILURE) / len(starts) == pytest.approx(4, rel=0.05)
+    assert np.median(lead_times) / 3600e6 == pytest.approx(12, rel=0.02)
+
+
+def test_synthetic_extremes(synthetic_factory):
+    events = list(
+        synthetic_factory(failure_probability=0, lead_time_median=0).collect_change_events()
+    )
+    assert {e.success for e in events} == {True}
+    assert {e.lead_time for e in events} == {None}
+
+    events = list(synthetic_factory(unknown_probability=1).collect_change_events())
+    assert {e.success for e in events} == {None}
+
+    assert list(synthetic_factory(until=datetime(2023, 1, 1)).collect_change_events()) == []
+
+
+@pytest.mark.parametrize(
+    "options",
+    [
+        {"rate": 0},
+        {"failure_probability": 1.5},
+        {"unknown_probability": -0.1},
+        {"streak_mean": 0.5},
+        {"lead_time_median": -1},
+        {"batch_size": 0},
+    ],
+)
+def test_synthetic_invalid_options(synthetic_factory, options):
+    with pytest.raises(ValueError):
+        synthetic_factory(**options)
+
+
+def test_synthetic_invalid_arguments(root_logger):
+    with pytest.raises(ValueError):
+        SyntheticCollector.from_arguments(Namespace(log=root_logger))
@@ -0,0 +1,734 @@
+"""
+Read git repositories straight from disk, without running git.
+
+Loose objects are inflated with zlib, packfiles and their version 2
+``.idx`` files are memory mapped and searched through the fan-out table,
+offset and reference deltas are resolved, refs are read from loose files
+and ``packed-refs`` and, when present, ``commit-graph`` files (single or
+split chains) answer parent and commit time lookups without inflating
+commits. Only SHA-1 repositories are supported.
+"""
+
+import mmap
+import os
+import struct
+import zlib
+from collections import OrderedDict
+from typing import Dict, NamedTuple, Optional, Tuple
+
+OBJECT_TYPES = {1: "commit", 2: "tree", 3: "blob", 4: "tag"}
+OFS_DELTA = 6
+REF_DELTA = 7
+HASH_SIZE = 20
+# Resolved delta bases kept in memory, in objects
+DELTA_CACHE_SIZE = 256
+# Prefixes tried, in order, when a revision is not a full ref name
+REF_RULES = (
+    "{}",
+    "refs/{}",
+    "refs/tags/{}",
+    "refs/heads/{}",
+    "refs/remotes/{}",
+    "refs/remotes/{}/HEAD",
+)
+GRAPH_PARENT_NONE = 0x70000000
+GRAPH_EXTRA_EDGES = 0x80000000
+GRAPH_LAST_EDGE = 0x80000000
+
+
+class GitObject(NamedTuple):
+    """Header fields and subject of a commit or tag object."""
+
+    oid: str
+    type: str
+    parents: Tuple[str, ...] = ()
+    author_time: int = None
+    committer_time: int = None
+    target: str = None
+    tag: str = None
+    tagger_time: int = None
+    subject: str = None
+
+
+def _signature_time(line: str) -> int:
+    # "<name> <email> <timestamp> <tz>"
+    return int(line.rsplit(" ", 2)[-2])
+
+
+def _subject(message: str) -> str:
+    # Like git's %s: the first paragraph, lines joined with spaces
+    lines = []
+    for line in message.split("\n"):
+        line = line.rstrip()
+        if line:
+            lines.append(line)
+        elif lines:
+            break
+    return " ".join(lines)
+
+
+def parse_object(oid: str, object_type: str, content: bytes) -> GitObject:
+    """
+    Parse the header and subject of a raw commit or tag object.
+
+    :param oid: Object id of the object.
+    :param object_type: ``commit``, ``tag``, ``tree`` or ``blob``.
+    :param content: The object's content, without the loose object header.
+    """
+    if object_type not in ("commit", "tag"):
+        return GitObject(oid, object_type)
+    header, _, message = content.decode(errors="replace").partition("\n\n")
+    fields = {"parents": []}
+    for line in header.split("\n"):
+        key, _, value = line.partition(" ")
+        if key == "parent":
+            fields["parents"].append(value)
+        elif key == "author":
+            fields["author_time"] = _signature_time(value)
+        elif key == "committer":
+            fields["committer_time"] = _signature_time(value)
+        elif key == "object":
+            fields["target"] = value
+        elif key == "tag":
+            fields["tag"] = value
+        elif key == "tagger":
+            fields["tagger_time"] = _signature_time(value)
+    fields["parents"] = tuple(fields["parents"])
+    return GitObject(oid, object_type, subject=_subject(message), **fields)
+
+
+def _map(path: str) -> mmap.mmap:
+    with open(path, "rb") as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _varint(data, pos: int) -> Tuple[int, int]:
+    value = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        shift += 7
+        if not byte & 0x80:
+            return value, pos
+
+
+def apply_delta(base: bytes, delta: bytes) -> bytes:
+    """
+    Rebuild an object from its delta base and a git delta.
+
+    :raises ValueError: If the delta is corrupt or meant for another base.
+    """
+    source_size, pos = _varint(delta, 0)
+    target_size, pos = _varint(delta, pos)
+    if source_size != len(base):
+        raise ValueError("Delta does not match the size of its base")
+    out = bytearray()
+    while pos < len(delta):
+        op = delta[pos]
+        pos += 1
+        if op & 0x80:
+            # Copy from the base, offset and size bytes are optional
+            offset = size = 0
+            for i in range(4):
+                if op & (1 << i):
+                    offset |= delta[pos] << (8 * i)
+                    pos += 1
+            for i in range(3):
+                if op & (0x10 << i):
+                    size |= delta[pos] << (8 * i)
+                    pos += 1
+            out += base[offset : offset + (size or 0x10000)]
+        elif op:
+            out += delta[pos : pos + op]
+            pos += op
+        else:
+            raise ValueError("Invalid delta opcode 0")
+    if len(out) != target_size:
+        raise ValueError("Delta produced an object of the wrong size")
+    return bytes(out)
+
+
+class PackIndex:
+    """A memory mapped version 2 pack index."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.data = data = _map(path)
+        if data[:4] != b"\377tOc" or struct.unpack_from(">I", data, 4)[0] != 2:
+            raise ValueError(f"Unsupported pack index {path}")
+        self.fanout = struct.unpack_from(">256I", data, 8)
+        self.count = self.fanout[255]
+        self.names_offset = 8 + 256 * 4
+        self.offsets_offset = self.names_offset + (HASH_SIZE + 4) * self.count
+        self.large_offsets_offset = self.offsets_offset + 4 * self.count
+
+    def find(self, oid: bytes) -> Optional[int]:
+        """Return the pack offset of a binary object id, or None."""
+        first = oid[0]
+        low = self.fanout[first - 1] if first else 0
+        high = self.fanout[first]
+        data, names = self.data, self.names_offset
+        while low < high:
+            middle = (low + high) // 2
+            start = names + middle * HASH_SIZE
+            name = data[start : start + HASH_SIZE]
+            if name < oid:
+                low = middle + 1
+            elif name > oid:
+                high = middle
+            else:
+                return self._offset(middle)
+        return None
+
+    def _offset(self, index: int) -> int:
+        (offset,) = struct.unpack_from(">I", self.data, self.offsets_offset + 4 * index)
+        if offset & 0x80000000:
+            (offset,) = struct.unpack_from(
+                ">Q",
+                self.data,
+                self.large_offsets_offset + 8 * (offset & 0x7FFFFFFF),
+            )
+        return offset
+
+    def close(self):
+        self.data.close()
+
+
+class Pack:
+    """A memory mapped packfile together with its index."""
+
+    def __init__(self, index_path: str):
+        self.index = PackIndex(index_path)
+        self.path = index_path[: -len(".idx")] + ".pack"
+        self.data = _map(self.path)
+        if self.data[:4] != b"PACK":
+            raise ValueError(f"Not a packfile: {self.path}")
+
+    def header(self, offset: int) -> Tuple[int, int, int]:
+        """Return the type number, inflated size and data offset of an entry."""
+        data = self.data
+        byte = data[offset]
+        type_number = (byte >> 4) & 7
+        size = byte & 0x0F
+        shift = 4
+        offset += 1
+        while byte & 0x80:
+            byte = data[offset]
+            offset += 1
+            size |= (byte & 0x7F) << shift
+            shift += 7
+        return type_number, size, offset
+
+    def delta_base_offset(self, offset: int, pos: int) -> Tuple[int, int]:
+        """Decode the base of an offset delta at ``offset``."""
+        data = self.data
+        byte = data[pos]
+        pos += 1
+        distance = byte & 0x7F
+        while byte & 0x80:
+            byte = data[pos]
+            pos += 1
+            distance = ((distance + 1) << 7) | (byte & 0x7F)
+        return offset - distance, pos
+
+    def inflate(self, pos: int, size: int) -> bytes:
+        """Inflate the zlib stream at ``pos`` that expands to ``size`` bytes."""
+        inflater = zlib.decompressobj()
+        parts = []
+        step = size + 64
+        while not inflater.eof:
+            chunk = self.data[pos : pos + step]
+            if not chunk:
+                raise ValueError(f"Truncated object in {self.path}")
+            parts.append(inflater.decompress(chunk))
+            pos += step
+        content = b"".join(parts)
+        if len(content) != size:
+            raise ValueError(f"Corrupt object in {self.path}")
+        return content
+
+    def close(self):
+        self.index.close()
+        self.data.close()
+
+
+class CommitGraphFile:
+    """One memory mapped ``commit-graph`` file, or one layer of a chain."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.data = data = _map(path)
+        signature, version, hash_version, chunk_count = struct.unpack_from(
+            ">4sBBB", data, 0
+        )
+        if signature != b"CGPH" or version != 1 or hash_version != 1:
+            raise ValueError(f"Unsupported commit-graph {path}")
+        self.chunks = {}
+        for i in range(chunk_count):
+            chunk_id, offset = struct.unpack_from(">4sQ", data, 8 + 12 * i)
+            self.chunks[chunk_id] = offset
+        self.fanout = struct.unpack_from(">256I", data, self.chunks[b"OIDF"])
+        self.count = self.fanout[255]
+        self.oids_offset = self.chunks[b"OIDL"]
+        self.commits_offset = self.chunks[b"CDAT"]
+        self.edges_offset = self.chunks.get(b"EDGE")
+
+    def find(self, oid: bytes) -> Optional[int]:
+        """Return the position of a binary object id in this file, or None."""
+        first = oid[0]
+        low = self.fanout[first - 1] if first else 0
+        high = self.fanout[first]
+        data, oids = self.data, self.oids_offset
+        while low < high:
+            middle = (low + high) // 2
+            start = oids + middle * HASH_SIZE
+            name = data[start : start + HASH_SIZE]
+            if name < oid:
+                low = middle + 1
+            elif name > oid:
+                high = middle
+            else:
+                return middle
+        return None
+
+    def oid(self, position: int) -> bytes:
+        start = self.oids_offset + position * HASH_SIZE
+        return self.data[start : start + HASH_SIZE]
+
+    def commit(self, position: int) -> Tuple[int, int, list]:
+        """
+        Return the commit time, generation and parent positions of a commit.
+
+        Parent positions count across all layers of a chain.
+        """
+        parent1, parent2, high, low = struct.unpack_from(
+            ">IIII", self.data, self.commits_offset + position * (HASH_SIZE + 16) + HASH_SIZE
+        )
+        commit_time = ((high & 0x3) << 32) | low
+        generation = high >> 2
+        parents = []
+        if parent1 != GRAPH_PARENT_NONE:
+            parents.append(parent1)
+        if parent2 & GRAPH_EXTRA_EDGES:
+            edge = parent2 & ~GRAPH_EXTRA_EDGES
+            while True:
+                (value,) = struct.unpack_from(">I", self.data, self.edges_offset + 4 * edge)
+                parents.append(value & ~GRAPH_LAST_EDGE)
+                if value & GRAPH_LAST_EDGE:
+                    break
+                edge += 1
+        elif parent2 != GRAPH_PARENT_NONE:
+            parents.append(parent2)
+        return commit_time, generation, parents
+
+    def close(self):
+        self.data.close()
+
+
+class CommitGraphChain:
+    """
+    The commit-graph of a repository: a single file or a split chain.
+
+    Layers are ordered base first, so a global position is the position in
+    a layer plus the commit count of all layers below it.
+    """
+
+    def __init__(self, layers):
+        self.layers = layers
+        self.bases = []
+        total = 0
+        for layer in layers:
+            self.bases.append(total)
+            total += layer.count
+
+    @classmethod
+    def open(cls, objects_dir: str) -> Optional["CommitGraphChain"]:
+        """Open the commit-graph of an objects directory, None if it has none."""
+        single = os.path.join(objects_dir, "info", "commit-graph")
+        chain = os.path.join(objects_dir, "info", "commit-graphs", "commit-graph-chain")
+        if os.path.exists(chain):
+            with open(chain) as f:
+                names = f.read().split()
+            directory = os.path.dirname(chain)
+            return cls(
+                [CommitGraphFile(os.path.join(directory, f"graph-{n}.graph")) for n in names]
+            )
+        if os.path.exists(single):
+            return cls([CommitGraphFile(single)])
+        return None
+
+    def _locate(self, position: int) -> Tuple[CommitGraphFile, int]:
+        for layer, base in zip(reversed(self.layers), reversed(self.bases)):
+            if position >= base:
+                return layer, position - base
+        raise ValueError(f"Invalid commit-graph position {position}")
+
+    def lookup(self, oid: bytes) -> Optional[Tuple[int, int, Tuple[bytes, ...]]]:
+        """Return the commit time, generation and parent ids of a commit."""
+        for layer in self.layers:
+            position = layer.find(oid)
+            if position is not None:
+                commit_time, generation, parents = layer.commit(position)
+                return (
+                    commit_time,
+                    generation,
+                    tuple(self._oid(p) for p in parents),
+                )
+        return None
+
+    def _oid(self, position: int) -> bytes:
+        layer, local = self._locate(position)
+        return layer.oid(local)
+
+    def close(self):
+        for layer in self.layers:
+            layer.close()
+
+
+def open_commit_graph(path: str) -> Optional[CommitGraphChain]:
+    """
+    Open the commit-graph of the repository at ``path``.
+
+    :return: The commit-graph, or None if the repository has none or is not
+             a repository this module can read.
+    """
+    try:
+        return Repository(path).commit_graph
+    except ValueError:
+        return None
+
+
+def find_git_dir(path: str) -> Tuple[str, str]:
+    """
+    Find the git directory of a work tree or bare repository.
+
+    :return: The git directory and the common directory shared by all of
+             its worktrees.
+    :raises ValueError: If ``path`` is not inside a git repository.
+    """
+    if not os.path.isdir(path):
+        raise ValueError(f"Not a git repository: {path}")
+    current = os.path.abspath(path)
+    while True:
+        dot_git = os.path.join(current, ".git")
+        if os.path.isfile(dot_git):
+            with open(dot_git) as f:
+                content = f.read().strip()
+            if content.startswith("gitdir: "):
+                git_dir = os.path.join(current, content[len("gitdir: ") :])
+                break
+        if os.path.isdir(dot_git):
+            git_dir = dot_git
+            break
+        if all(
+            os.path.exists(os.path.join(current, name)) for name in ("HEAD", "objects", "refs")
+        ):
+            git_dir = current
+            break
+        parent = os.path.dirname(current)
+        if parent == current:
+            raise ValueError(f"Not a git repository: {path}")
+        current = parent
+    git_dir = os.path.normpath(git_dir)
+    common_dir = git_dir
+    commondir_file = os.path.join(git_dir, "commondir")
+    if os.path.exists(commondir_file):
+        with open(commondir_file) as f:
+            common_dir = os.path.normpath(os.path.join(git_dir, f.read().strip()))
+    return git_dir, common_dir
+
+
+class Repository:
+    """
+    Read-only access to the objects and refs of a git repository.
+
+    :param path: A work tree, a directory inside one or a bare repository.
+    :raises ValueError: If ``path`` is not a SHA-1 git repository.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.git_dir, self.common_dir = find_git_dir(path)
+        self._check_object_format()
+        objects_dir = os.path.join(self.common_dir, "objects")
+        self.object_dirs = [objects_dir, *self._alternates(objects_dir)]
+        self.shallow = self._read_shallow()
+        self._packs = None
+        self._commit_graph = False
+        self._packed_refs = (None, {}, {})
+        self._delta_cache = OrderedDict()
+
+    def _check_object_format(self):
+        config = os.path.join(self.common_dir, "config")
+        if not os.path.exists(config):
+            return
+        with open(config) as f:
+            for line in f:
+                key, _, value = line.partition("=")
+                if key.strip().lower() == "objectformat" and value.strip() != "sha1":
+                    raise ValueError(f"Unsupported object format {value.strip()}")
+
+    @staticmethod
+    def _alternates(objects_dir: str):
+        alternates = os.path.join(objects_dir, "info", "alternates")
+        if not os.path.exists(alternates):
+            return []
+        with open(alternates) as f:
+            return [
+                os.path.normpath(os.path.join(objects_dir, line.strip()))
+                for line in f
+                if line.strip() and not line.startswith("#")
+            ]
+
+    def _read_shallow(self) -> set:
+        shallow = os.path.join(self.common_dir, "shallow")
+        if not os.path.exists(shallow):
+            return set()
+        with open(shallow) as f:
+            return set(f.read().split())
+
+    @property
+    def packs(self):
+        if self._packs is None:
+            self._packs = []
+            for objects_dir in self.object_dirs:
+                pack_dir = os.path.join(objects_dir, "pack")
+                if not os.path.isdir(pack_dir):
+                    continue
+                for name in sorted(os.listdir(pack_dir)):
+                    if name.endswith(".idx") and os.path.exists(
+                        os.path.join(pack_dir, name[: -len(".idx")] + ".pack")
+                    ):
+                        self._packs.append(Pack(os.path.join(pack_dir, name)))
+        return self._packs
+
+    @property
+    def commit_graph(self) -> Optional[CommitGraphChain]:
+        """The commit-graph, None if there is none or, like git, if shallow."""
+        if self._commit_graph is False:
+            self._commit_graph = None
+            if not self.shallow:
+                self._commit_graph = CommitGraphChain.open(self.object_dirs[0])
+        return self._commit_graph
+
+    def close(self):
+        for pack in self._packs or ():
+            pack.close()
+        self._packs = None
+        if self._commit_graph:
+            self._commit_graph.close()
+        self._commit_graph = False
+        self._delta_cache.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _read_loose(self, oid: str) -> Optional[Tuple[str, bytes]]:
+        for objects_dir in self.object_dirs:
+            path = os.path.join(objects_dir, oid[:2], oid[2:])
+            try:
+                with open(path, "rb") as f:
+                    raw = zlib.decompress(f.read())
+            except FileNotFoundError:
+                continue
+            header, _, content = raw.partition(b"\0")
+            object_type, _, _ = header.decode().partition(" ")
+            return object_type, content
+        return None
+
+    def _locate(self, oid: bytes) -> Optional[Tuple[Pack, int]]:
+        for pack in self.packs:
+            offset = pack.index.find(oid)
+            if offset is not None:
+                return pack, offset
+        return None
+
+    def _read_packed(self, pack: Pack, offset: int) -> Tuple[str, bytes]:
+        # Walk down the delta chain to a base, then apply the deltas back up
+        chain = []
+        while True:
+            cached = self._delta_cache.get((pack.path, offset))
+            if cached is not None:
+                self._delta_cache.move_to_end((pack.path, offset))
+                object_type, content = cached
+                break
+            type_number, size, pos = pack.header(offset)
+            if type_number == OFS_DELTA:
+                base_offset, pos = pack.delta_base_offset(offset, pos)
+                chain.append((pack, offset, pos, size))
+                offset = base_offset
+                continue
+            if type_number == REF_DELTA:
+                base = pack.data[pos : pos + HASH_SIZE]
+                chain.append((pack, offset, pos + HASH_SIZE, size))
+                location = self._locate(base)
+                if location is None:
+                    loose = self._read_loose(base.hex())
+                    if loose is None:
+                        raise KeyError(f"Delta base {base.hex()} is missing")
+                    object_type, content = loose
+                    break
+                pack, offset = location
+                continue
+            object_type = OBJECT_TYPES[type_number]
+            content = pack.inflate(pos, size)
+            if chain:
+                self._cache(pack.path, offset, object_type, content)
+            break
+        for pack, offset, pos, size in reversed(chain):
+            content = apply_delta(content, pack.inflate(pos, size))
+            self._cache(pack.path, offset, object_type, content)
+        return object_type, content
+
+    def _cache(self, path: str, offset: int, object_type: str, content: bytes):
+        self._delta_cache[(path, offset)] = (object_type, content)
+        if len(self._delta_cache) > DELTA_CACHE_SIZE:
+            self._delta_cache.popitem(last=False)
+
+    def read(self, oid: str) -> Tuple[str, bytes]:
+        """
+        Return the type and content of an object.
+
+        :raises KeyError: If the object is not in the repository.
+        """
+        location = self._locate(bytes.fromhex(oid))
+        if location is not None:
+            return self._read_packed(*location)
+        loose = self._read_loose(oid)
+        if loose is None:
+            raise KeyError(f"Object {oid} is missing")
+        return loose
+
+    def contains(self, oid: str) -> bool:
+        if self._locate(bytes.fromhex(oid)) is not None:
+            return True
+        return any(
+            os.path.exists(os.path.join(d, oid[:2], oid[2:])) for d in self.object_dirs
+        )
+
+    def commit(self, oid: str) -> Tuple[int, Tuple[str, ...]]:
+        """
+        Return the commit time and parents of a commit.
+
+        The commit-graph is used when it lists the commit. Commits listed in
+        ``shallow`` have no parents, as for git.
+
+        :raises KeyError: If the commit is not in the repository.
+        """
+        parents = None
+        graph = self.commit_graph
+        if graph is not None:
+            entry = graph.lookup(bytes.fromhex(oid))
+            if entry is not None:
+                commit_time, _, parent_oids = entry
+                parents = tuple(p.hex() for p in parent_oids)
+        if parents is None:
+            commit = parse_object(oid, *self.read(oid))
+            if commit.type != "commit":
+                raise KeyError(f"Object {oid} is a {commit.type}, not a commit")
+            commit_time, parents = commit.committer_time, commit.parents
+        if oid in self.shallow:
+            parents = ()
+        return commit_time, parents
+
+    def peel(self, oid: str) -> str:
+        """Follow tags from ``oid`` to the first object that is not a tag."""
+        while True:
+            object_type, content = self.read(oid)
+            if object_type != "tag":
+                return oid
+            oid = parse_object(oid, object_type, content).target
+
+    def packed_refs(self) -> Tuple[Dict[str, str], Dict[str, str]]:
+        """Return the packed refs and the peeled ids of packed tags."""
+        path = os.path.join(self.common_dir, "packed-refs")
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return {}, {}
+        key = (stat.st_mtime_ns, stat.st_size)
+        if self._packed_refs[0] != key:
+            refs, peeled = {}, {}
+            name = None
+            with open(path) as f:
+                for line in f:
+                    line = line.rstrip("\n")
+                    if not line or line.startswith("#"):
+                        continue
+                    if line.startswith("^"):
+                        peeled[name] = line[1:]
+                        continue
+                    oid, _, name = line.partition(" ")
+                    refs[name] = oid
+            self._packed_refs = (key, refs, peeled)
+        return self._packed_refs[1], self._packed_refs[2]
+
+    def _read_loose_ref(self, name: str) -> Optional[str]:
+        for directory in (self.git_dir, self.common_dir):
+            path = os.path.join(directory, name)
+            if os.path.isfile(path):
+                with open(path) as f:
+                    return f.read().strip()
+        return None
+
+    def read_ref(self, name: str) -> Optional[str]:
+        """Return the object id a ref points to, following symbolic refs."""
+        for _ in range(10):
+            value = self._read_loose_ref(name)
+            if value is None:
+                value = self.packed_refs()[0].get(name)
+            if value is None:
+                return None
+            if not value.startswith("ref: "):
+                return value
+            name = value[len("ref: ") :]
+        raise ValueError(f"Symbolic ref loop at {name}")
+
+    def refs(self, prefix: str = "refs/") -> Dict[str, str]:
+        """Return all refs under ``prefix`` with the ids they point to."""
+        refs = {n: o for n, o in self.packed_refs()[0].items() if n.startswith(prefix)}
+        root = os.path.join(self.common_dir, prefix)
+        for directory, _, files in os.walk(root):
+            for file_name in files:
+                path = os.path.join(directory, file_name)
+                name = os.path.relpath(path, self.common_dir).replace(os.sep, "/")
+                oid = self.read_ref(name)
+                if oid is not None:
+                    refs[name] = oid
+        return refs
+
+    def resolve(self, rev: str) -> Optional[str]:
+        """
+        Resolve a revision to an object id.
+
+        Supports full object ids, ref names with git's shorthand rules
+        (``main``, ``tags/v1``, ``origin/main``, ...) and the ``^{}`` and
+        ``^{commit}`` peeling suffixes. Other revision syntax is not
+        supported and resolves to None.
+        """
+        peel_to = None
+        for suffix in ("^{}", "^{commit}"):
+            if rev.endswith(suffix):
+                rev, peel_to = rev[: -len(suffix)], suffix
+        oid = None
+        if len(rev) == 2 * HASH_SIZE and all(c in "0123456789abcdef" for c in rev):
+            oid = rev if self.contains(rev) else None
+        else:
+            for rule in REF_RULES:
+                oid = self.read_ref(rule.format(rev))
+                if oid is not None:
+                    break
+        if oid is None or peel_to is None:
+            return oid
+        try:
+            oid = self.peel(oid)
+            object_type, _ = self.read(oid)
+        except KeyError:
+            return None
+        if peel_to == "^{commit}" and object_type != "commit":
+            return None
+        return oid
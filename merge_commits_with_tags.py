@@ -1,11 +1,38 @@
 import argparse
+import atexit
+import bisect
+import codecs
 import csv
 import fnmatch
+import hashlib
+import heapq
+import json
 import logging
+import os
+import sqlite3
 import statistics
 import subprocess
+import sys
+import tempfile
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime, timedelta
-from typing import Dict, List
+from itertools import count
+from typing import Dict, Iterator, List, Tuple
+
+import profiling
+from git_objects import GitObject, Repository, open_commit_graph, parse_object
+from rolling import add_rolling_fields, parse_sizes, rolling_field_names
+
+# Bytes read from a git pipe at a time when streaming its output
+STREAM_CHUNK_SIZE = 64 * 1024
+# Requests written to a ``git cat-file`` session before reading the answers
+CAT_FILE_WINDOW = 64
+# Merges a history walk lists per ``git log``, see ``iter_merge_slices``
+MERGE_SLICE_SIZE = 5000
+# Clock skew sliced walks tolerate: each walks back this far before its slice
+CLOCK_SKEW_SECONDS = 7 * 86400
 
 
 def get_merge_commits(
@@ -15,19 +42,173 @@ def get_merge_commits(
     tag_pattern: str = None,
     branch: str = None,
     log=None,
+    tag_index: Dict[str, List[str]] = None,
+    cache: "CommitCache" = None,
 ) -> List[Dict]:
+    merge_commits = list(
+        iter_merge_commits(
+            repo_path, since, until, tag_pattern, branch, log, tag_index, cache
+        )
+    )
+    if log:
+        log.debug(f"Found {len(merge_commits)} merge commits")  # noqa: E501
+    return merge_commits
+
+
+def iter_merge_commits(
+    repo_path: str,
+    since: str,
+    until: str,
+    tag_pattern: str = None,
+    branch: str = None,
+    log=None,
+    tag_index: Dict[str, List[str]] = None,
+    cache: "CommitCache" = None,
+) -> Iterator[Dict]:
+    """
+    Yield merge commits oldest first, a time slice of history at a time.
+
+    Takes the same arguments as ``get_merge_commits``; see
+    ``iter_merge_slices`` for how the history is read.
+    """
+    for _, merges in iter_merge_slices(
+        repo_path, since, until, tag_pattern, branch, log, tag_index, cache
+    ):
+        yield from merges
+
+
+def iter_merge_slices(
+    repo_path: str,
+    since: str,
+    until: str,
+    tag_pattern: str = None,
+    branch: str = None,
+    log=None,
+    tag_index: Dict[str, List[str]] = None,
+    cache: "CommitCache" = None,
+    slice_size: int = MERGE_SLICE_SIZE,
+) -> Iterator[Tuple[int, List[Dict]]]:
+    """
+    Yield the merge commits of a range in time slices, oldest first.
+
+    ``git log --reverse`` reads the whole log before writing any of it.
+    Instead one pass over the commit times of the merges, see
+    ``merge_slice_bounds``, splits the range into slices of about
+    ``slice_size`` merges, and each slice is listed by a ``git log`` of its
+    own and reversed in memory, so only one slice is held at a time.
+
+    A merge belongs to the slice of its commit time. The walk of a slice
+    starts ``CLOCK_SKEW_SECONDS`` before it, so merges git only reaches
+    through back-dated commits are listed as by a single walk of the range
+    while clocks are not skewed by more than that. The commit cache holds
+    the whole history anyway and yields it as a single slice.
+
+    :param slice_size: Merges per slice.
+    :return: An iterator of ``(end, merges)`` tuples: the commit time the
+             next slice starts at, None for the last slice, and the merges
+             of the slice in the order ``git log --reverse`` lists them.
+    """
     if log:
         log.debug(
             f"Getting merge commits in {repo_path} branch={branch} since={since} until={until} tag_pattern={tag_pattern}"  # noqa: E501
         )
+    if cache is not None:
+        try:
+            merge_commits = cache.merge_commits(since, until, tag_pattern, branch)
+        except (KeyError, ValueError) as e:
+            if log:
+                log.warning(f"Commit cache unusable ({e}), reading git log")  # noqa: E501
+            tag_index = cache.tag_index
+        else:
+            yield None, merge_commits
+            return
+    if tag_index is None:
+        tag_index = build_tag_index(repo_path, log=log)
+    session = git_session(repo_path, log=log)
+    bounds = merge_slice_bounds(repo_path, since, until, branch, log, slice_size)
+    for start, end in zip([None, *bounds], [*bounds, None]):
+        walk_since = since if start is None else f"@{start - CLOCK_SKEW_SECONDS}"
+        walk_until = until if end is None else f"@{end}"
+        if isinstance(session, ObjectStoreSession):
+            records = session.merge_records(walk_since, walk_until, branch)
+        else:
+            records = iter_merge_records(repo_path, walk_since, walk_until, branch, log=log)
+        merges = []
+        for commit_hash, timestamp, subject in records:
+            timestamp = int(timestamp)
+            if (start is not None and timestamp < start) or (
+                end is not None and timestamp >= end
+            ):
+                continue
+            tags = tag_index.get(commit_hash, [])
+            if tag_pattern:
+                tags = [tag for tag in tags if fnmatch.fnmatch(tag, tag_pattern)]
+            merges.append(
+                {
+                    "hash": commit_hash,
+                    "timestamp": timestamp,
+                    "tags": tags,
+                    "subject": subject,
+                }
+            )
+        merges.reverse()
+        yield end, merges
+
+
+def merge_slice_bounds(
+    repo_path: str,
+    since: str,
+    until: str,
+    branch: str = None,
+    log=None,
+    slice_size: int = MERGE_SLICE_SIZE,
+) -> List[int]:
+    """
+    Return the commit times splitting the merges of a range into slices.
+
+    The commit times of the merges are streamed newest first and every
+    ``slice_size``-th is kept, so the pass holds one time per slice. The
+    time of the oldest merge would start an empty first slice and is
+    dropped.
+
+    :return: The sorted commit times the slices after the first start at.
+    """
+    session = git_session(repo_path, log=log)
+    if isinstance(session, ObjectStoreSession):
+        times = session.merge_times(since, until, branch)
+    else:
+        cmd = ["git", "-C", repo_path, "rev-list", "--merges", "--timestamp"]
+        if since:
+            cmd.append(f"--since={since}")
+        if until:
+            cmd.append(f"--until={until}")
+        cmd.append(branch or "HEAD")
+        times = (int(line.split()[0]) for line in iter_lines(stream_git(cmd, log=log)))
+    bounds = set()
+    position = timestamp = 0
+    for position, timestamp in enumerate(times, 1):
+        if position % slice_size == 0:
+            bounds.add(timestamp)
+    if position and position % slice_size == 0 and timestamp == min(bounds):
+        bounds.discard(timestamp)
+    return sorted(bounds)
+
+
+def iter_merge_records(
+    repo_path: str, since: str, until: str, branch: str = None, log=None
+) -> Iterator[List[str]]:
+    """
+    Stream ``[hash, commit time, subject]`` of merges from ``git log``,
+    newest first.
+    """
     git_log_cmd = [
         "git",
         "-C",
         repo_path,
         "log",
         "--merges",
-        "--pretty=format:%H|%ct|%s",
-        "--reverse",
+        "-z",
+        "--pretty=format:%H%x00%ct%x00%s",
     ]
     if branch:
         git_log_cmd.append(branch)
@@ -35,58 +216,533 @@ def get_merge_commits(
         git_log_cmd.append(f"--since={since}")
     if until:
         git_log_cmd.append(f"--until={until}")
+    return iter_nul_records(stream_git(git_log_cmd, log=log), 3, log=log)
+
+
+def stream_git(cmd: List[str], log=None, input: str = None) -> Iterator[str]:
+    """
+    Run a git command and yield its stdout in chunks as git writes them.
+
+    stderr is spooled to a temporary file, so a chatty command cannot block
+    on a full pipe, and logged as a warning once the command ends. Closing
+    the generator early terminates git.
+
+    :param cmd: The full command line.
+    :param input: Optional text written to git's stdin before reading.
+    :return: An iterator of decoded text chunks.
+    """
     if log:
-        log.debug(f"Running git log command: {' '.join(git_log_cmd)}")  # noqa: E501
-    result = subprocess.run(git_log_cmd, capture_output=True, text=True)
-    if log and result.stderr:
-        log.warning(f"git log stderr: {result.stderr}")
-    lines = result.stdout.strip().split("\n")
-    merge_commits = []
-    for line in lines:
-        if not line:
-            continue
+        log.debug(f"Running git command: {' '.join(cmd)}")  # noqa: E501
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    started = time.perf_counter()
+    with tempfile.TemporaryFile() as stderr:
+        process = subprocess.Popen(
+            cmd,
+            stdin=subprocess.PIPE if input is not None else subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=stderr,
+        )
         try:
-            commit_hash, timestamp, subject = line.split("|", 2)
-        except Exception as e:
+            if input is not None:
+                # git reads all revisions from --stdin before it writes
+                process.stdin.write(input.encode())
+                process.stdin.close()
+            while True:
+                data = process.stdout.read1(STREAM_CHUNK_SIZE)
+                if not data:
+                    break
+                chunk = decoder.decode(data)
+                if chunk:
+                    yield chunk
+            tail = decoder.decode(b"", final=True)
+            if tail:
+                yield tail
+        finally:
+            process.stdout.close()
+            if process.poll() is None:
+                process.kill()
+            process.wait()
+            profiling.git_command(cmd, time.perf_counter() - started)
+            stderr.seek(0)
+            message = stderr.read().decode(errors="replace")
+            if log and message:
+                log.warning(f"git stderr: {message}")  # noqa: E501
+
+
+def run_git(cmd: List[str], **kwargs) -> subprocess.CompletedProcess:
+    """
+    Run a git command to completion with ``subprocess.run``, timing it for
+    ``--profile``.
+    """
+    started = time.perf_counter()
+    try:
+        return subprocess.run(cmd, **kwargs)
+    finally:
+        profiling.git_command(cmd, time.perf_counter() - started)
+
+
+def iter_lines(chunks: Iterator[str]) -> Iterator[str]:
+    """Split streamed text into lines without the line terminators."""
+    tail = ""
+    for chunk in chunks:
+        lines = (tail + chunk).split("\n")
+        tail = lines.pop()
+        yield from lines
+    if tail:
+        yield tail
+
+
+def iter_nul_records(
+    chunks: Iterator[str], field_count: int, log=None
+) -> Iterator[List[str]]:
+    """
+    Parse streamed NUL-delimited git output into records of ``field_count``.
+
+    Expects output produced with ``-z`` and ``%x00`` separated placeholders,
+    where both fields and records are separated by NUL. Since no field can
+    contain NUL, fields are regrouped by count as chunks arrive.
+
+    :param chunks: Text chunks, e.g. from ``stream_git``.
+    :param field_count: Number of fields per record.
+    :return: An iterator of field lists.
+    """
+    record = []
+    tail = ""
+    has_output = False
+    for chunk in chunks:
+        has_output = True
+        fields = (tail + chunk).split("\0")
+        tail = fields.pop()
+        for field in fields:
+            record.append(field)
+            if len(record) == field_count:
+                yield record
+                record = []
+    if not has_output or not (record or tail):
+        # Nothing, or only the terminator of the last record (tformat)
+        return
+    record.append(tail)
+    if len(record) == field_count:
+        yield record
+    elif log:
+        log.error(
+            f"Discarding {len(record)} trailing field(s) of incomplete record: {record}"  # noqa: E501
+        )
+
+
+def parse_nul_records(output: str, field_count: int, log=None) -> Iterator[List[str]]:
+    """
+    Parse NUL-delimited git output held in memory, see ``iter_nul_records``.
+
+    :param output: Raw stdout of the git command.
+    :param field_count: Number of fields per record.
+    :return: An iterator of field lists.
+    """
+    return iter_nul_records([output] if output else [], field_count, log=log)
+
+
+class GitSession:
+    """
+    Long-running ``git cat-file`` processes answering object lookups.
+
+    One ``--batch-check`` process resolves revisions and one ``--batch``
+    process returns object contents. Requests are pipelined over stdin in
+    windows of ``CAT_FILE_WINDOW`` so many lookups cost a round trip per
+    window instead of a process each. Use ``git_session`` to share one
+    session per repository.
+    """
+
+    def __init__(self, repo_path: str, log=None):
+        self.repo_path = repo_path
+        self.log = log
+        self.pid = os.getpid()
+        self.closed = False
+        self._processes = {}
+        self._started = {}
+        self._tag_index = None
+        self.commit_graph = open_commit_graph(repo_path)
+        self.graph = CommitGraph(
+            session=self, generation_source=generation_source(self.commit_graph)
+        )
+
+    def _process(self, mode: str) -> subprocess.Popen:
+        process = self._processes.get(mode)
+        if process is None:
+            cmd = ["git", "-C", self.repo_path, "cat-file", mode]
+            if self.log:
+                self.log.debug(f"Starting git session: {' '.join(cmd)}")  # noqa: E501
+            self._started[mode] = time.perf_counter()
+            process = self._processes[mode] = subprocess.Popen(
+                cmd,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+            )
+        return process
+
+    def close(self):
+        for mode, process in self._processes.items():
+            process.stdin.close()
+            process.wait()
+            process.stdout.close()
+            # The lifetime of the long-running process, idle time included
+            profiling.git_command(process.args, time.perf_counter() - self._started[mode])
+        self._processes = {}
+        if self.commit_graph is not None:
+            self.commit_graph.close()
+            self.commit_graph = None
+        self.closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _pipeline(self, mode: str, names: List[str], read) -> List:
+        """Send ``names`` to a cat-file process and collect ``read`` results."""
+        process = self._process(mode)
+        results = []
+        for start in range(0, len(names), CAT_FILE_WINDOW):
+            window = names[start : start + CAT_FILE_WINDOW]
+            process.stdin.write("".join(f"{name}\n" for name in window).encode())
+            process.stdin.flush()
+            results.extend(read(process.stdout) for _ in window)
+        return results
+
+    @staticmethod
+    def _read_info(stdout) -> Tuple[str, str, int]:
+        fields = stdout.readline().decode().split()
+        if len(fields) != 3:
+            # "<name> missing" or "<name> ambiguous"
+            return None
+        oid, object_type, size = fields
+        return oid, object_type, int(size)
+
+    @classmethod
+    def _read_object(cls, stdout) -> Tuple[str, str, bytes]:
+        info = cls._read_info(stdout)
+        if info is None:
+            return None
+        oid, object_type, size = info
+        content = stdout.read(size + 1)[:-1]
+        return oid, object_type, content
+
+    def resolve(self, rev: str) -> str:
+        """Return the object id ``rev`` names, or None if it does not exist."""
+        (info,) = self._pipeline("--batch-check", [rev], self._read_info)
+        return info[0] if info else None
+
+    def read_objects(self, names: List[str]) -> List[GitObject]:
+        """
+        Read and parse several objects in one pipelined exchange.
+
+        :return: A ``GitObject`` per name, None for missing objects.
+        """
+        objects = []
+        for name, raw in zip(names, self._pipeline("--batch", names, self._read_object)):
+            if raw is None:
+                if self.log:
+                    self.log.warning(f"Object {name} is missing")  # noqa: E501
+                objects.append(None)
+            else:
+                objects.append(parse_object(*raw))
+        return objects
+
+    def commit(self, rev: str) -> GitObject:
+        """Return the parsed header of a single object."""
+        return self.read_objects([rev])[0]
+
+    def commit_headers(self, oids: List[str]) -> Iterator[Tuple[str, int, tuple]]:
+        """
+        Yield ``(oid, commit time, parents)`` of the commits found, from the
+        commit-graph file when it lists them and from cat-file otherwise.
+        """
+        if self.commit_graph is not None:
+            missing = []
+            for oid in oids:
+                entry = self.commit_graph.lookup(bytes.fromhex(oid))
+                if entry is None:
+                    missing.append(oid)
+                else:
+                    commit_time, _, parents = entry
+                    yield oid, commit_time, tuple(p.hex() for p in parents)
+            oids = missing
+        for commit in self.read_objects(oids):
+            if commit is not None and commit.type == "commit":
+                yield commit.oid, commit.committer_time, commit.parents
+
+    @property
+    def tag_index(self) -> Dict[str, List[str]]:
+        if self._tag_index is None:
+            self._tag_index = build_tag_index(self.repo_path, log=self.log)
+        return self._tag_index
+
+
+class ObjectStoreSession:
+    """
+    In-process counterpart of ``GitSession`` reading objects from disk.
+
+    Objects, refs and commit-graph files are read with ``git_objects``, so
+    no git process is started. Merge listings replay ``git log`` on the
+    session's commit graph. Dates must be ISO 8601; git fills in the
+    current time of day for a bare date while this backend uses midnight.
+
+    :raises ValueError: If ``repo_path`` is not a git repository.
+    """
+
+    def __init__(self, repo_path: str, log=None):
+        self.repo_path = repo_path
+        self.log = log
+        self.pid = os.getpid()
+        self.closed = False
+        self.repository = Repository(repo_path)
+        self._tag_index = None
+        self.graph = CommitGraph(
+            session=self, generation_source=generation_source(self.repository.commit_graph)
+        )
+
+    def close(self):
+        self.repository.close()
+        self.closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def resolve(self, rev: str) -> str:
+        """Return the object id ``rev`` names, or None if it does not exist."""
+        return self.repository.resolve(rev)
+
+    def read_objects(self, names: List[str]) -> List[GitObject]:
+        """
+        Read and parse several objects.
+
+        :return: A ``GitObject`` per name, None for missing objects.
+        """
+        objects = []
+        for name in names:
+            oid = self.resolve(name)
+            try:
+                objects.append(parse_object(oid, *self.repository.read(oid)))
+            except (KeyError, TypeError):
+                if self.log:
+                    self.log.warning(f"Object {name} is missing")  # noqa: E501
+                objects.append(None)
+        return objects
+
+    def commit(self, rev: str) -> GitObject:
+        """Return the parsed header of a single object."""
+        return self.read_objects([rev])[0]
+
+    def commit_headers(self, oids: List[str]) -> Iterator[Tuple[str, int, tuple]]:
+        """
+        Yield ``(oid, commit time, parents)`` of the commits found, from the
+        commit-graph when it lists them.
+        """
+        for oid in oids:
+            try:
+                commit_time, parents = self.repository.commit(oid)
+            except KeyError:
+                continue
+            yield oid, commit_time, parents
+
+    @property
+    def tag_index(self) -> Dict[str, List[str]]:
+        """Map commit hashes to tag names, like ``build_tag_index``."""
+        if self._tag_index is None:
+            tag_index = {}
+            for name, oid in sorted(self.repository.refs("refs/tags/").items()):
+                object_type, content = self.repository.read(oid)
+                if object_type == "tag":
+                    # Peeled once, like %(*objectname)
+                    oid = parse_object(oid, object_type, content).target
+                tag_index.setdefault(oid, []).append(name[len("refs/tags/") :])
+            self._tag_index = tag_index
+        return self._tag_index
+
+    @staticmethod
+    def _timestamp(date: str) -> int:
+        if not date:
+            return None
+        if date.startswith("@"):
+            return int(date[1:])
+        try:
+            return int(datetime.fromisoformat(date).timestamp())
+        except ValueError:
+            raise ValueError(f"Unsupported date {date!r}, use ISO 8601")
+
+    def _merges(self, since: str, until: str, branch: str = None) -> Iterator[str]:
+        rev = branch or "HEAD"
+        tip = self.resolve(f"{rev}^{{commit}}")
+        if tip is None:
+            raise ValueError(f"Cannot resolve revision {rev} in {self.repo_path}")
+        for oid in self.graph.walk(
+            tip, max_age=self._timestamp(since), min_age=self._timestamp(until)
+        ):
+            if len(self.graph.parents[self.graph.positions[oid]]) > 1:
+                yield oid
+
+    def merge_records(
+        self, since: str, until: str, branch: str = None
+    ) -> Iterator[Tuple[str, int, str]]:
+        """
+        Yield ``(hash, commit time, subject)`` of merges, newest first, as
+        ``git log --merges`` lists them.
+
+        :raises ValueError: If the branch cannot be resolved.
+        """
+        for oid in self._merges(since, until, branch):
+            commit = self.commit(oid)
+            yield commit.oid, commit.committer_time, commit.subject
+
+    def merge_times(self, since: str, until: str, branch: str = None) -> Iterator[int]:
+        """
+        Yield the commit times of merges, newest first, as ``git rev-list
+        --merges`` lists them.
+
+        :raises ValueError: If the branch cannot be resolved.
+        """
+        for oid in self._merges(since, until, branch):
+            yield self.graph.times[self.graph.positions[oid]]
+
+
+# Session classes by backend name, selected with use_backend()
+GIT_BACKENDS = {"git": GitSession, "python": ObjectStoreSession}
+_backend = "git"
+_sessions = {}
+
+
+def use_backend(name: str):
+    """
+    Select how repositories are read: ``git`` runs git, ``python`` reads
+    objects in-process with ``git_objects``.
+    """
+    global _backend
+    if name not in GIT_BACKENDS:
+        raise ValueError(f"Unknown backend {name}, use one of {', '.join(GIT_BACKENDS)}")
+    _backend = name
+
+
+def get_backend() -> str:
+    """Return the name of the selected backend."""
+    return _backend
+
+
+# Whether branch walks may order commits by commit-graph generation number
+_generation_walks = False
+
+
+def use_generation_walks(enabled: bool):
+    """
+    Let branch walks use the generation numbers of the commit-graph file.
+
+    Generation walks stop early and do not depend on commit dates, so with
+    skewed clocks their branch roots can differ from the ones ``git
+    rev-list`` finds. They are off by default: lead times must not change
+    because a ``git gc`` wrote a commit-graph.
+    """
+    global _generation_walks
+    _generation_walks = enabled
+
+
+def generation_source(commit_graph):
+    """Return the commit-graph branch walks order by, if enabled."""
+    return commit_graph if _generation_walks else None
+
+
+def git_session(repo_path: str, log=None):
+    """
+    Return the shared session of a repository for the selected backend,
+    starting it once.
+    """
+    session = _sessions.get(repo_path)
+    # A forked worker must not share its parent's pipes
+    if (
+        session is None
+        or session.closed
+        or session.pid != os.getpid()
+        or not isinstance(session, GIT_BACKENDS[_backend])
+    ):
+        session = _sessions[repo_path] = GIT_BACKENDS[_backend](repo_path, log=log)
+    return session
+
+
+@atexit.register
+def close_git_sessions():
+    """Stop the git processes of all shared sessions."""
+    for session in _sessions.values():
+        if session.pid == os.getpid():
+            session.close()
+    _sessions.clear()
+
+
+def build_tag_index(repo_path: str, log=None) -> Dict[str, List[str]]:
+    """
+    Map commit hashes to the names of the tags pointing at them.
+
+    A single ``git for-each-ref`` call lists every tag together with its
+    peeled object, so both lightweight and annotated tags are indexed by the
+    commit they refer to. Tag names are kept in refname order, matching the
+    output of ``git tag --points-at``.
+
+    :param repo_path: Path to the git repository.
+    :return: A dict of commit hash to list of tag names.
+    """
+    session = git_session(repo_path, log=log)
+    if isinstance(session, ObjectStoreSession):
+        return session.tag_index
+    git_ref_cmd = [
+        "git",
+        "-C",
+        repo_path,
+        "for-each-ref",
+        "--format=%(objectname)%00%(*objectname)%00%(refname:strip=2)",
+        "refs/tags",
+    ]
+    tag_index = {}
+    for line in iter_lines(stream_git(git_ref_cmd, log=log)):
+        try:
+            object_hash, peeled_hash, tag = line.split("\0")
+        except ValueError as e:
             if log:
                 log.error(f"Failed to parse line: {line} ({e})")  # noqa: E501
             continue
-        tags = get_tags_for_commit(repo_path, commit_hash, log=log)
-        if tag_pattern:
-            tags = [tag for tag in tags if fnmatch.fnmatch(tag, tag_pattern)]
-        merge_commits.append(
-            {
-                "hash": commit_hash,
-                "timestamp": int(timestamp),
-                "tags": tags,
-                "subject": subject,
-            }
-        )
+        # Annotated tags are peeled to the commit, lightweight tags already
+        # point at it.
+        tag_index.setdefault(peeled_hash or object_hash, []).append(tag)
     if log:
-        log.debug(f"Found {len(merge_commits)} merge commits")  # noqa: E501
-    return merge_commits
+        log.debug(f"Indexed {len(tag_index)} tagged commits")  # noqa: E501
+    return tag_index
 
 
 def get_tags_for_commit(repo_path: str, commit_hash: str, log=None) -> List[str]:
-    git_tag_cmd = ["git", "-C", repo_path, "tag", "--points-at", commit_hash]
-    if log:
-        log.debug(f"Running git tag command: {' '.join(git_tag_cmd)}")  # noqa: E501
-    result = subprocess.run(git_tag_cmd, capture_output=True, text=True)
-    if log and result.stderr:
-        log.warning(f"git tag stderr: {result.stderr}")  # noqa: E501
-    tags = result.stdout.strip().split("\n") if result.stdout.strip() else []
+    tags = git_session(repo_path, log=log).tag_index.get(commit_hash, [])
     if log:
         log.debug(f"Tags for {commit_hash}: {tags}")  # noqa: E501
     return tags
 
 
-def classify_tag_state(tags: list, tag_pattern: str, prev_state: str = None) -> str:
+def classify_tag_state(
+    tags: list,
+    tag_pattern: str,
+    prev_state: str = None,
+    commit_hash: str = None,
+    tag_index: Dict[str, List[str]] = None,
+) -> str:
     """
     Classifies the state for a tag pattern as 'success', 'failed', or 'recovery'.
     - 'success': tag matching pattern is present
     - 'failed': tag matching pattern is not present
     - 'recovery': previous was 'failed' or None, now 'success'
+
+    When ``tags`` is None the tags of ``commit_hash`` are looked up in
+    ``tag_index`` (see ``build_tag_index``).
     """
+    if tags is None and tag_index is not None:
+        tags = tag_index.get(commit_hash, [])
     matched = any(fnmatch.fnmatch(tag, tag_pattern) for tag in tags)
     if matched:
         if prev_state in [None, "failed"]:
@@ -100,69 +756,710 @@ def classify_tag_state(tags: list, tag_pattern: str, prev_state: str = None) ->
 def get_first_commit_time_of_branch(
     repo_path: str, merge_commit_hash: str, log=None
 ) -> int:
-    # Get the second parent (feature branch tip) of the merge commit
-    cmd = [
-        "git",
-        "-C",
-        repo_path,
-        "rev-list",
-        "--parents",
-        "-n",
-        "1",
-        merge_commit_hash,
-    ]
-    result = subprocess.run(cmd, capture_output=True, text=True)
-    if result.returncode != 0:
+    """
+    Return the commit time of the first commit on the branch a merge merged.
+
+    That is the oldest commit of ``git rev-list <parent2> ^<parent1>``. The
+    walk is replayed on the repository's shared ``GitSession``, whose
+    commit graph loads commits through ``git cat-file`` as it needs them.
+    """
+    session = git_session(repo_path, log=log)
+    merge = session.commit(merge_commit_hash)
+    if merge is None:
         if log:
-            log.error(
-                f"Failed to get parents for {merge_commit_hash}: {result.stderr}"
-            )  # noqa: E501
+            log.error(f"Failed to get parents for {merge_commit_hash}")  # noqa: E501
         return None
-    parts = result.stdout.strip().split()
-    if len(parts) < 3:
+    if len(merge.parents) < 2:
         if log:
             log.warning(
                 f"Merge commit {merge_commit_hash} does not have two parents"
             )  # noqa: E501
         return None
-    feature_branch_tip = parts[2]
-    # Find the root commit of the feature branch (not reachable from the first parent)
-    cmd = [
-        "git",
-        "-C",
-        repo_path,
-        "rev-list",
-        "--reverse",
-        feature_branch_tip,
-        f"^{parts[1]}",
-    ]
-    result = subprocess.run(cmd, capture_output=True, text=True)
-    if result.returncode != 0 or not result.stdout.strip():
+    try:
+        root_time = session.graph.branch_root_time(merge.oid)
+    except KeyError as e:
         if log:
-            log.error(
-                f"Failed to get root commit for branch tip {feature_branch_tip}: "
-                f"{result.stderr}"
-            )  # noqa: E501
+            log.error(f"Failed to walk branch {merge.parents[1]}: {e}")  # noqa: E501
         return None
-    root_commit = result.stdout.strip().split("\n")[0]
-    # Get the commit time of the root commit
+    if root_time is None and log:
+        log.error(f"Failed to get root commit for branch tip {merge.parents[1]}")  # noqa: E501
+    return root_time
+
+
+# Flags used when replaying git's revision walk over a CommitGraph
+SEEN = 1
+UNINTERESTING = 2
+# Number of extra uninteresting commits git walks before it stops (revision.c)
+SLOP = 5
+
+
+class CommitGraph:
+    """
+    Compact in-memory commit DAG used to compute branch roots in batch.
+
+    Commits are numbered in the order they are first seen, parents are kept
+    as tuples of those numbers and commit times in an ``array``. Parents
+    that are referenced but were not listed (e.g. older than ``--since``)
+    are known but not loaded; walks that need them raise ``KeyError`` so the
+    caller can fall back to asking git. A graph bound to a ``GitSession``
+    instead loads missing commits through it, a walk step at a time.
+
+    When ``generation_source`` is the repository's commit-graph file (see
+    ``use_generation_walks``), branch walks order commits by generation
+    number and stop as soon as no
+    commit left can belong to the branch; ``stats`` counts the walks done
+    each way and their time.
+    """
+
+    def __init__(self, session: "GitSession" = None, generation_source=None):
+        self.session = session
+        self.generation_source = generation_source
+        self.positions = {}
+        self.oids = []
+        self.times = array("q")
+        self.parents = []
+        self.loaded = bytearray()
+        # 0: not looked up yet, -1: not in the commit-graph file
+        self.generations = array("l")
+        self._root_times = {}
+        self.stats = {"generation_walks": 0, "date_walks": 0, "walk_seconds": 0.0}
+
+    def __len__(self):
+        return sum(self.loaded)
+
+    def _position(self, commit_hash: str) -> int:
+        position = self.positions.get(commit_hash)
+        if position is None:
+            position = self.positions[commit_hash] = len(self.parents)
+            self.oids.append(commit_hash)
+            self.times.append(0)
+            self.parents.append(())
+            self.loaded.append(0)
+            self.generations.append(0)
+        return position
+
+    def _generation(self, position: int) -> int:
+        generation = self.generations[position]
+        if not generation:
+            generation = -1
+            if self.generation_source is not None:
+                entry = self.generation_source.lookup(bytes.fromhex(self.oids[position]))
+                if entry is not None:
+                    generation = entry[1]
+            self.generations[position] = generation
+        return generation if generation > 0 else None
+
+    def _require(self, position: int) -> int:
+        if not self.loaded[position]:
+            self._fetch((position,))
+        if not self.loaded[position]:
+            raise KeyError(f"Commit {self.oids[position]} is not in the commit graph")
+        return position
+
+    def _fetch(self, positions):
+        """Load the given commits through the session, in one exchange."""
+        if self.session is None:
+            return
+        missing = [self.oids[p] for p in positions if not self.loaded[p]]
+        if not missing:
+            return
+        for oid, commit_time, parents in self.session.commit_headers(missing):
+            self.add_commit(oid, commit_time, parents)
+
+    def add_commit(self, commit_hash: str, timestamp: int, parent_hashes: List[str]):
+        position = self._position(commit_hash)
+        self.times[position] = timestamp
+        self.parents[position] = tuple(self._position(p) for p in parent_hashes)
+        self.loaded[position] = 1
+
+    def walk(self, commit_hash: str, max_age: int = None, min_age: int = None):
+        """
+        Yield commit hashes in the order ``git log <commit_hash>`` lists them.
+
+        Replays git's unlimited revision walk: the newest queued commit is
+        shown first (ties in insertion order), commits older than
+        ``max_age`` are dropped together with their ancestry like
+        ``--since`` does, and commits newer than ``min_age`` are walked but
+        not shown like ``--until``.
+
+        :raises KeyError: If the walk needs a commit outside the graph.
+        """
+        times = self.times
+        sequence = count()
+        start = self._require(self._position(commit_hash))
+        seen = {start}
+        queue = [(-times[start], next(sequence), start)]
+        while queue:
+            _, _, commit = heapq.heappop(queue)
+            if max_age is not None and times[commit] < max_age:
+                continue
+            self._fetch(self.parents[commit])
+            for parent in self.parents[commit]:
+                if parent not in seen:
+                    seen.add(parent)
+                    heapq.heappush(
+                        queue, (-times[self._require(parent)], next(sequence), parent)
+                    )
+            if min_age is not None and times[commit] > min_age:
+                continue
+            yield self.oids[commit]
+
+    def branch_root_time(self, merge_commit_hash: str) -> int:
+        """
+        Return the commit time of the first commit of a merged branch.
+
+        This is the graph equivalent of ``get_first_commit_time_of_branch``:
+        the oldest commit listed by ``git rev-list <parent2> ^<parent1>``.
+        Results are memoised per parent pair, so merges sharing a branch
+        tip and mainline parent are only walked once.
+
+        :raises KeyError: If the walk needs a commit outside the graph.
+        """
+        position = self._require(self._position(merge_commit_hash))
+        parents = self.parents[position]
+        if len(parents) < 2:
+            return None
+        key = parents[:2]
+        if key not in self._root_times:
+            started = time.perf_counter()
+            root = self._walk_generations(*key)
+            if root is False:
+                root = self._walk_branch_root(*key)
+                self.stats["date_walks"] += 1
+            else:
+                self.stats["generation_walks"] += 1
+            self.stats["walk_seconds"] += time.perf_counter() - started
+            self._root_times[key] = root
+        return self._root_times[key]
+
+    def _mark_parents_uninteresting(self, position: int, flags: Dict[int, int]):
+        # Like git, only propagate through commits that have been parsed,
+        # i.e. that were queued during the walk.
+        stack = list(self.parents[position])
+        while stack:
+            parent = stack.pop()
+            flag = flags.get(parent, 0)
+            if flag & UNINTERESTING:
+                continue
+            flags[parent] = flag | UNINTERESTING
+            if flag & SEEN:
+                stack.extend(self.parents[parent])
+
+    def _walk_generations(self, base: int, tip: int) -> int:
+        """
+        Find the commits of ``tip ^base`` walking by generation number.
+
+        Commits are popped highest generation first, so a commit's flag is
+        final when it is popped, and the walk ends once no queued commit is
+        interesting. The commits found are then ordered like git's date
+        walk to pick the one ``rev-list --reverse`` lists first. Unlike
+        git's date heuristic this is exact even with skewed clocks.
+
+        :return: The branch root time or None as ``_walk_branch_root``
+                 does, or False if a commit has no generation number.
+        """
+        if self._generation(base) is None or self._generation(tip) is None:
+            return False
+        if tip == base:
+            return None
+        flags = {tip: SEEN, base: SEEN | UNINTERESTING}
+        sequence = count()
+        queue = [
+            (-self._generation(p), next(sequence), p)
+            for p in sorted((tip, base), key=lambda p: -self.times[p])
+        ]
+        heapq.heapify(queue)
+        interesting = 1
+        branch = set()
+        while interesting:
+            _, _, commit = heapq.heappop(queue)
+            uninteresting = flags[commit] & UNINTERESTING
+            if not uninteresting:
+                interesting -= 1
+                branch.add(commit)
+            self._fetch(self.parents[self._require(commit)])
+            for parent in self.parents[commit]:
+                flag = flags.get(parent, 0)
+                if flag & SEEN:
+                    if uninteresting and not flag & UNINTERESTING:
+                        flags[parent] = flag | UNINTERESTING
+                        interesting -= 1
+                    continue
+                generation = self._generation(self._require(parent))
+                if generation is None:
+                    return False
+                flags[parent] = SEEN | uninteresting
+                interesting += not uninteresting
+                heapq.heappush(queue, (-generation, next(sequence), parent))
+        if tip not in branch:
+            return None
+        # Date order restricted to the branch, as git lists it
+        times = self.times
+        queue = [(-times[tip], next(sequence), tip)]
+        seen = {tip}
+        last = None
+        while queue:
+            _, _, last = heapq.heappop(queue)
+            for parent in self.parents[last]:
+                if parent in branch and parent not in seen:
+                    seen.add(parent)
+                    heapq.heappush(queue, (-times[parent], next(sequence), parent))
+        return times[last]
+
+    def _walk_branch_root(self, base: int, tip: int) -> int:
+        """
+        Replay ``git rev-list --reverse tip ^base`` and return the time of
+        the first listed commit.
+
+        The walk mirrors ``limit_list`` in git's revision.c: commits are
+        popped newest first (ties in insertion order), uninteresting flags
+        are propagated through parsed commits, and the walk stops once only
+        uninteresting commits remain after ``SLOP`` extra steps. Following
+        git this closely keeps results identical even with clock skew.
+        """
+        times = self.times
+        flags = {}
+        queue = []
+        sequence = count()
+
+        def enqueue(position):
+            self._require(position)
+            heapq.heappush(queue, (-times[position], next(sequence), position))
+
+        # Both revisions are parsed up front, the negative one marks its
+        # parents uninteresting before the walk starts.
+        initial = [tip] if tip == base else [tip, base]
+        for position in initial:
+            flags[self._require(position)] = SEEN
+        flags[base] |= UNINTERESTING
+        self._mark_parents_uninteresting(base, flags)
+        for position in sorted(initial, key=lambda p: -times[p]):
+            enqueue(position)
+
+        listed = []
+        date = None
+        slop = SLOP
+        interesting_cache = None
+        while queue:
+            _, _, commit = heapq.heappop(queue)
+            if commit == interesting_cache:
+                interesting_cache = None
+            uninteresting = flags[commit] & UNINTERESTING
+            self._fetch(self.parents[commit])
+            for parent in self.parents[commit]:
+                flag = flags.get(parent, 0)
+                if uninteresting:
+                    flag |= UNINTERESTING
+                    flags[self._require(parent)] = flag
+                    self._mark_parents_uninteresting(parent, flags)
+                if not flag & SEEN:
+                    flags[parent] = flag | SEEN
+                    enqueue(parent)
+            if not uninteresting:
+                date = times[commit]
+                listed.append(commit)
+                continue
+            self._mark_parents_uninteresting(commit, flags)
+            # still_interesting(): keep walking while queued commits are
+            # newer than the last listed one or any of them is interesting.
+            if not queue:
+                break
+            if date is None or date <= -queue[0][0]:
+                slop = SLOP
+                continue
+            if interesting_cache is None or flags[interesting_cache] & UNINTERESTING:
+                interesting_cache = next(
+                    (p for _, _, p in queue if not flags[p] & UNINTERESTING), None
+                )
+            if interesting_cache is not None:
+                slop = SLOP
+                continue
+            slop -= 1
+            if not slop:
+                break
+        listed = [p for p in listed if not flags[p] & UNINTERESTING]
+        if not listed:
+            return None
+        return times[listed[-1]]
+
+
+def load_commit_graph(
+    repo_path: str,
+    branch: str = None,
+    since: str = None,
+    until: str = None,
+    log=None,
+) -> CommitGraph:
+    """
+    Read parents and commit times for a range with one ``git rev-list``.
+
+    :param repo_path: Path to the git repository.
+    :param branch: Revision to walk, defaults to ``HEAD``.
+    :param since: Optional lower bound passed as ``--since``.
+    :param until: Optional upper bound passed as ``--until``.
+    :return: The populated ``CommitGraph``. With the python backend this is
+             the session's graph, which reads commits as walks reach them.
+    """
+    session = git_session(repo_path, log=log)
+    if isinstance(session, ObjectStoreSession):
+        return session.graph
     cmd = [
         "git",
         "-C",
         repo_path,
-        "show",
-        "-s",
-        "--format=%ct",
-        root_commit,
+        "rev-list",
+        "--parents",
+        "--timestamp",
     ]
-    result = subprocess.run(cmd, capture_output=True, text=True)
-    if result.returncode != 0:
-        if log:
-            log.error(
-                f"Failed to get commit time for {root_commit}: {result.stderr}"
-            )  # noqa: E501
-        return None
-    return int(result.stdout.strip())
+    if since:
+        cmd.append(f"--since={since}")
+    if until:
+        cmd.append(f"--until={until}")
+    cmd.append(branch or "HEAD")
+    graph = CommitGraph(
+        generation_source=open_commit_graph(repo_path) if _generation_walks else None
+    )
+    for line in iter_lines(stream_git(cmd, log=log)):
+        try:
+            timestamp, commit_hash, *parent_hashes = line.split()
+            graph.add_commit(commit_hash, int(timestamp), parent_hashes)
+        except ValueError as e:
+            if log:
+                log.error(f"Failed to parse line: {line} ({e})")  # noqa: E501
+    if log:
+        log.debug(f"Loaded {len(graph)} commits into the commit graph")  # noqa: E501
+    return graph
+
+
+def branch_graph(repo_path: str, log=None) -> CommitGraph:
+    """
+    Return an empty commit graph reading commits through the repository's
+    session as branch walks reach them.
+
+    Unlike ``load_commit_graph`` nothing is read up front, so a graph per
+    slice of merges holds about the commits of the slice.
+    """
+    session = git_session(repo_path, log=log)
+    if isinstance(session, ObjectStoreSession):
+        commit_graph = session.repository.commit_graph
+    else:
+        commit_graph = session.commit_graph
+    return CommitGraph(session=session, generation_source=generation_source(commit_graph))
+
+
+CACHE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS repositories (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS refs (
+    repo_id INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    oid TEXT NOT NULL,
+    PRIMARY KEY (repo_id, name)
+);
+CREATE TABLE IF NOT EXISTS commits (
+    repo_id INTEGER NOT NULL,
+    oid TEXT NOT NULL,
+    time INTEGER NOT NULL,
+    parents TEXT NOT NULL,
+    subject TEXT,
+    tags TEXT,
+    PRIMARY KEY (repo_id, oid)
+);
+CREATE TABLE IF NOT EXISTS tags (
+    repo_id INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    oid TEXT NOT NULL,
+    PRIMARY KEY (repo_id, name)
+);
+CREATE TABLE IF NOT EXISTS branch_roots (
+    repo_id INTEGER NOT NULL,
+    oid TEXT NOT NULL,
+    root_time INTEGER,
+    PRIMARY KEY (repo_id, oid)
+);
+"""
+
+
+def default_cache_dir() -> str:
+    """Return the default cache directory, honouring ``XDG_CACHE_HOME``."""
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    return os.path.join(base, "git-dora-report")
+
+
+def cache_path(cache_dir: str, git_dir: str) -> str:
+    """
+    Return the cache database of a repository.
+
+    :param cache_dir: Commit cache directory.
+    :param git_dir: Absolute git common directory of the repository.
+    """
+    digest = hashlib.sha1(git_dir.encode("utf-8")).hexdigest()[:16]
+    git_dir = git_dir.rstrip(os.sep)
+    if os.path.basename(git_dir) == ".git":
+        git_dir = os.path.dirname(git_dir)
+    name = os.path.basename(git_dir)
+    return os.path.join(cache_dir, f"{name}-{digest}.sqlite3")
+
+
+class CommitCache:
+    """
+    Persistent SQLite cache of commit metadata for one repository.
+
+    The cache stores every commit reachable from the revisions analysed so
+    far (time, parents and, for merges, subject and resolved tags), the tag
+    refs and computed branch-root times. Commits are immutable, so a refresh
+    only asks git for commits not reachable from the stored ref tips, and a
+    changed tag only re-resolves the merges it pointed at before and after.
+
+    The cache offers ``merge_commits`` as a drop-in for ``get_merge_commits``
+    and ``branch_root_time`` like ``CommitGraph``, so it can be passed as
+    ``commit_graph`` to ``calculate_lead_times``.
+    """
+
+    def __init__(self, cache_dir: str, repo_path: str, log=None):
+        self.repo_path = repo_path
+        self.log = log
+        os.makedirs(cache_dir, exist_ok=True)
+        git_dir = self._git(
+            "rev-parse", "--path-format=absolute", "--git-common-dir"
+        ).strip()
+        # One database per repository, so parallel workers do not contend
+        # for one write lock; concurrent runs on one repository still wait
+        self.db = sqlite3.connect(cache_path(cache_dir, git_dir), timeout=60)
+        self.db.executescript(CACHE_SCHEMA)
+        self.db.execute(
+            "INSERT OR IGNORE INTO repositories (path) VALUES (?)", (git_dir,)
+        )
+        (self.repo_id,) = self.db.execute(
+            "SELECT id FROM repositories WHERE path = ?", (git_dir,)
+        ).fetchone()
+        self.graph = None
+        self.tag_index = None
+        self._refreshed = {}
+        self._root_times = None
+
+    def _git(self, *args, input=None) -> str:
+        cmd = ["git", "-C", self.repo_path, *args]
+        if self.log:
+            self.log.debug(f"Running git command: {' '.join(cmd)}")  # noqa: E501
+        result = run_git(cmd, capture_output=True, text=True, input=input)
+        if self.log and result.stderr:
+            self.log.warning(f"git {args[0]} stderr: {result.stderr}")  # noqa: E501
+        return result.stdout
+
+    def close(self):
+        self.db.commit()
+        self.db.close()
+
+    def refresh(self, rev: str = None) -> str:
+        """
+        Bring the cache up to date for ``rev`` and return its commit hash.
+
+        :param rev: Revision to analyse, defaults to ``HEAD``.
+        """
+        rev = rev or "HEAD"
+        if rev in self._refreshed:
+            return self._refreshed[rev]
+        tip = git_session(self.repo_path, log=self.log).resolve(f"{rev}^{{commit}}")
+        if not tip:
+            raise ValueError(f"Cannot resolve revision {rev} in {self.repo_path}")
+        self._refresh_tags()
+        known = {
+            oid
+            for (oid,) in self.db.execute(
+                "SELECT oid FROM refs WHERE repo_id = ?", (self.repo_id,)
+            )
+        }
+        if tip not in known:
+            self._load_commits(tip, known)
+        self.db.execute(
+            "INSERT OR REPLACE INTO refs (repo_id, name, oid) VALUES (?, ?, ?)",
+            (self.repo_id, rev, tip),
+        )
+        self.db.commit()
+        self.graph = None
+        self._refreshed[rev] = tip
+        return tip
+
+    def _load_commits(self, tip: str, known: set):
+        """Read only the commits that no stored ref tip can reach."""
+        revisions = "\n".join([tip, *(f"^{oid}" for oid in known)]) + "\n"
+        cmd = [
+            "git",
+            "-C",
+            self.repo_path,
+            "log",
+            "-z",
+            "--format=%H%x00%ct%x00%P%x00%s",
+            "--ignore-missing",
+            "--stdin",
+        ]
+        rows = []
+        for commit_hash, timestamp, parents, subject in iter_nul_records(
+            stream_git(cmd, log=self.log, input=revisions), 4, log=self.log
+        ):
+            is_merge = len(parents.split()) > 1
+            tags = self.tag_index.get(commit_hash) if is_merge else None
+            rows.append(
+                (
+                    self.repo_id,
+                    commit_hash,
+                    int(timestamp),
+                    parents,
+                    subject if is_merge else None,
+                    "\0".join(tags) if tags else None,
+                )
+            )
+        self.db.executemany(
+            "INSERT OR IGNORE INTO commits VALUES (?, ?, ?, ?, ?, ?)", rows
+        )
+        if self.log:
+            self.log.info(f"Cached {len(rows)} new commits from {tip}")  # noqa: E501
+
+    def _refresh_tags(self):
+        """Update tag refs and re-resolve tags only for affected merges."""
+        if self.tag_index is not None:
+            return
+        self.tag_index = build_tag_index(self.repo_path, log=self.log)
+        current = {
+            tag: oid for oid, tags in self.tag_index.items() for tag in tags
+        }
+        stored = dict(
+            self.db.execute(
+                "SELECT name, oid FROM tags WHERE repo_id = ?", (self.repo_id,)
+            )
+        )
+        changed = {
+            tag
+            for tag in current.keys() | stored.keys()
+            if current.get(tag) != stored.get(tag)
+        }
+        if not changed:
+            return
+        affected = {current.get(tag) for tag in changed} | {
+            stored.get(tag) for tag in changed
+        }
+        affected.discard(None)
+        self.db.executemany(
+            "DELETE FROM tags WHERE repo_id = ? AND name = ?",
+            [(self.repo_id, tag) for tag in changed if tag not in current],
+        )
+        self.db.executemany(
+            "INSERT OR REPLACE INTO tags (repo_id, name, oid) VALUES (?, ?, ?)",
+            [(self.repo_id, tag, current[tag]) for tag in changed if tag in current],
+        )
+        self.db.executemany(
+            "UPDATE commits SET tags = ? WHERE repo_id = ? AND oid = ? AND subject IS NOT NULL",  # noqa: E501
+            [
+                ("\0".join(self.tag_index.get(oid, [])) or None, self.repo_id, oid)
+                for oid in affected
+            ],
+        )
+        if self.log:
+            self.log.info(
+                f"{len(changed)} tags changed, re-resolved {len(affected)} commits"
+            )
+
+    def _load_graph(self) -> CommitGraph:
+        if self.graph is None:
+            self.graph = CommitGraph(
+                generation_source=open_commit_graph(self.repo_path)
+                if _generation_walks
+                else None
+            )
+            for oid, commit_time, parents in self.db.execute(
+                "SELECT oid, time, parents FROM commits WHERE repo_id = ?",
+                (self.repo_id,),
+            ):
+                self.graph.add_commit(oid, commit_time, parents.split())
+        return self.graph
+
+    def merge_commits(
+        self, since: str, until: str, tag_pattern: str = None, branch: str = None
+    ) -> List[Dict]:
+        """
+        Return the merge commits ``get_merge_commits`` would, from the cache.
+
+        Dates are resolved by git itself so they keep the exact meaning of
+        ``--since``/``--until``.
+        """
+        tip = self.refresh(branch)
+        max_age = min_age = None
+        date_args = [f"--since={since}"] if since else []
+        date_args += [f"--until={until}"] if until else []
+        if date_args:
+            for arg in self._git("rev-parse", *date_args).split():
+                name, _, value = arg.partition("=")
+                if name == "--max-age":
+                    max_age = int(value)
+                elif name == "--min-age":
+                    min_age = int(value)
+        graph = self._load_graph()
+        merge_hashes = [
+            oid
+            for oid in graph.walk(tip, max_age=max_age, min_age=min_age)
+            if len(graph.parents[graph.positions[oid]]) > 1
+        ]
+        merge_hashes.reverse()
+        details = {}
+        for chunk_start in range(0, len(merge_hashes), 500):
+            chunk = merge_hashes[chunk_start : chunk_start + 500]
+            details.update(
+                (oid, (time, subject, tags))
+                for oid, time, subject, tags in self.db.execute(
+                    "SELECT oid, time, subject, tags FROM commits "
+                    f"WHERE repo_id = ? AND oid IN ({','.join('?' * len(chunk))})",
+                    (self.repo_id, *chunk),
+                )
+            )
+        merge_commits = []
+        for oid in merge_hashes:
+            timestamp, subject, tags = details[oid]
+            tags = tags.split("\0") if tags else []
+            if tag_pattern:
+                tags = [tag for tag in tags if fnmatch.fnmatch(tag, tag_pattern)]
+            merge_commits.append(
+                {"hash": oid, "timestamp": timestamp, "tags": tags, "subject": subject}
+            )
+        if self.log:
+            self.log.debug(f"Found {len(merge_commits)} cached merge commits")  # noqa: E501
+        return merge_commits
+
+    def branch_root_time(self, merge_commit_hash: str) -> int:
+        """
+        Return the stored branch-root time of a merge, computing it once.
+
+        Branch roots only depend on a commit's ancestry, so stored values
+        never need invalidation.
+        """
+        if self._root_times is None:
+            self._root_times = dict(
+                self.db.execute(
+                    "SELECT oid, root_time FROM branch_roots WHERE repo_id = ?",
+                    (self.repo_id,),
+                )
+            )
+        if merge_commit_hash in self._root_times:
+            return self._root_times[merge_commit_hash]
+        try:
+            root_time = self._load_graph().branch_root_time(merge_commit_hash)
+        except KeyError:
+            # Incomplete history (e.g. a shallow clone): ask git every time
+            root_time = get_first_commit_time_of_branch(
+                self.repo_path, merge_commit_hash, log=self.log
+            )
+            self._root_times[merge_commit_hash] = root_time
+            return root_time
+        self._root_times[merge_commit_hash] = root_time
+        self.db.execute(
+            "INSERT OR REPLACE INTO branch_roots (repo_id, oid, root_time) VALUES (?, ?, ?)",  # noqa: E501
+            (self.repo_id, merge_commit_hash, root_time),
+        )
+        return root_time
 
 
 def parse_interval(interval_str):
@@ -196,23 +1493,50 @@ def classify_merge_states(merges, tag_pattern, log):
     return states, times, recovery_times
 
 
-def calculate_lead_times(merges, repo, log):
-    """Calculate lead times for each merge commit."""
+def calculate_lead_times(merges, repo, log, commit_graph=None):
+    """
+    Calculate lead times for each merge commit.
+
+    With a ``commit_graph`` (see ``load_commit_graph``) branch roots are
+    found in memory; merges whose history is not fully loaded fall back to
+    querying git.
+    """
     lead_times = []
     for m in merges:
-        first_commit_time = get_first_commit_time_of_branch(repo, m["hash"], log=log)
-        if first_commit_time:
-            lead_time = m["timestamp"] - first_commit_time
+        lead_time = calculate_lead_time(m, repo, log, commit_graph=commit_graph)
+        if lead_time is not None:
             lead_times.append(lead_time)
     return lead_times
 
 
+def calculate_lead_time(merge, repo, log, commit_graph=None):
+    """Calculate the lead time of a single merge commit, or None if unknown."""
+    if commit_graph is None:
+        first_commit_time = get_first_commit_time_of_branch(repo, merge["hash"], log=log)
+    else:
+        try:
+            first_commit_time = commit_graph.branch_root_time(merge["hash"])
+        except KeyError:
+            if log:
+                log.debug(f"Commit graph incomplete for {merge['hash']}, asking git")  # noqa: E501
+            first_commit_time = get_first_commit_time_of_branch(
+                repo, merge["hash"], log=log
+            )
+    if not first_commit_time:
+        return None
+    return merge["timestamp"] - first_commit_time
+
+
 def aggregate_dora_metrics(states, times, recovery_times, lead_times, interval_days):
     """Aggregate DORA metrics from states and lead times."""
     deployment_count = states.count("success") + states.count("recovery")
     total_merges = len(states)
     change_failure_count = states.count("failed")
-    deployment_frequency = deployment_count / ((times[-1] - times[0]) / (86400 * interval_days))
+    # Intervals with fewer than two deployments have no measurable span
+    span = times[-1] - times[0] if times else 0
+    deployment_frequency = (
+        deployment_count / (span / (86400 * interval_days)) if span else 0
+    )
     change_failure_rate = change_failure_count / total_merges if total_merges else 0
     mttr = statistics.mean(recovery_times) if recovery_times else 0
     mean_lead_time = statistics.mean(lead_times) if lead_times else 0
@@ -226,20 +1550,163 @@ def aggregate_dora_metrics(states, times, recovery_times, lead_times, interval_d
     }
 
 
-def dora_metrics_for_range(repo, tag, branch, since, until, log, interval_days):
+def dora_metrics_for_range(
+    repo, tag, branch, since, until, log, interval_days, tag_index=None, cache=None
+):
     """Compute DORA metrics for a given range using helper functions."""
-    merges = get_merge_commits(repo, since, until, tag, branch, log=log)
+    merges = get_merge_commits(
+        repo, since, until, tag, branch, log=log, tag_index=tag_index, cache=cache
+    )
     states, times, recovery_times = classify_merge_states(merges, tag, log)
-    lead_times = calculate_lead_times(merges, repo, log)
+    if cache is not None:
+        commit_graph = cache
+    else:
+        commit_graph = load_commit_graph(repo, branch, since, until, log=log)
+    lead_times = calculate_lead_times(merges, repo, log, commit_graph=commit_graph)
     return aggregate_dora_metrics(states, times, recovery_times, lead_times, interval_days)
 
 
+def dora_metrics_for_intervals(
+    repo,
+    tag,
+    branch,
+    intervals,
+    log,
+    interval_days,
+    tag_index=None,
+    cache=None,
+    slice_size=MERGE_SLICE_SIZE,
+):
+    """
+    Compute DORA metrics for consecutive intervals from a single history scan.
+
+    As with ``git log --since/--until`` both interval bounds are inclusive,
+    so each interval yields the same metrics as ``dora_metrics_for_range``.
+    See ``iter_interval_inputs`` for how the history is read.
+
+    :param intervals: ``(start, end)`` datetime tuples, earliest first.
+    :param cache: Optional ``CommitCache`` to read commits and branch roots from.
+    :param slice_size: Merges read per ``git log``.
+    :return: A list of metric dicts, one per interval.
+    """
+    return [
+        aggregate_dora_metrics(*inputs, interval_days)
+        for inputs in iter_interval_inputs(
+            repo,
+            tag,
+            branch,
+            intervals,
+            log,
+            tag_index=tag_index,
+            cache=cache,
+            slice_size=slice_size,
+        )
+    ]
+
+
+def iter_interval_inputs(
+    repo,
+    tag,
+    branch,
+    intervals,
+    log,
+    tag_index=None,
+    cache=None,
+    walk_stats=None,
+    slice_size=MERGE_SLICE_SIZE,
+):
+    """
+    Yield the inputs of ``aggregate_dora_metrics`` for consecutive intervals.
+
+    Merge commits of the window spanning all intervals are read a time
+    slice at a time, see ``iter_merge_slices``, and each merge's lead time
+    is computed once, on a ``branch_graph`` per slice. A merge belongs to
+    the slice of its commit time even when skewed clocks make git list it
+    after newer ones, so an interval is yielded as soon as the slice its
+    end falls in has been read. Only the slice and the merges of intervals
+    still open are held, not the window's history.
+
+    :param intervals: ``(start, end)`` datetime tuples, earliest first.
+    :param walk_stats: Optional dict updated with the ``CommitGraph.stats``
+                       of the branch walks once all intervals are yielded.
+    :param slice_size: Merges read per ``git log``.
+    :return: An iterator of ``(states, times, recovery_times, lead_times)``
+             tuples, one per interval.
+    """
+    if not intervals:
+        return
+    since = intervals[0][0].strftime("%Y-%m-%dT%H:%M:%S")
+    until = intervals[-1][1].strftime("%Y-%m-%dT%H:%M:%S")
+    log.info(f"Scanning history from {since} to {until}")
+    starts = [int(start.replace(microsecond=0).timestamp()) for start, _ in intervals]
+    ends = [int(end.replace(microsecond=0).timestamp()) for _, end in intervals]
+
+    buckets = {}
+    closed = 0  # Intervals yielded so far
+    stats = {"generation_walks": 0, "date_walks": 0, "walk_seconds": 0.0}
+
+    def close_interval(index):
+        chunk = buckets.pop(index, [])
+        log.debug(f"{len(chunk)} merges in interval {intervals[index][0]} to {intervals[index][1]}")  # noqa: E501
+        with profiling.stage("classify"):
+            states, times, recovery_times = classify_merge_states(chunk, tag, log)
+            lead_times = [m["lead_time"] for m in chunk if m["lead_time"] is not None]
+        return states, times, recovery_times, lead_times
+
+    slices = iter_merge_slices(
+        repo,
+        since,
+        until,
+        tag,
+        branch,
+        log=log,
+        tag_index=tag_index,
+        cache=cache,
+        slice_size=slice_size,
+    )
+    for slice_end, merges in profiling.iterate("merges", slices):
+        profiling.count("merges", len(merges))
+        commit_graph = cache if cache is not None else branch_graph(repo, log=log)
+        for m in merges:
+            timestamp = m["timestamp"]
+            first = bisect.bisect_left(ends, timestamp)
+            last = bisect.bisect_right(starts, timestamp)
+            if first >= last:
+                continue
+            with profiling.stage("lead_times"):
+                m["lead_time"] = calculate_lead_time(m, repo, log, commit_graph=commit_graph)
+            for index in range(first, last):
+                buckets.setdefault(index, []).append(m)
+        if cache is None:
+            for name, value in commit_graph.stats.items():
+                stats[name] += value
+        # Later slices only hold merges from slice_end on
+        while closed < len(intervals) and (slice_end is None or ends[closed] < slice_end):
+            yield close_interval(closed)
+            closed += 1
+    while closed < len(intervals):
+        yield close_interval(closed)
+        closed += 1
+    if cache is not None:
+        if cache.graph is None:
+            # Every branch root was stored, nothing was walked
+            return
+        stats = cache.graph.stats
+    log.info(
+        f"Branch walks: {stats['generation_walks']} by generation number, {stats['date_walks']} by commit date in {stats['walk_seconds']:.3f}s"  # noqa: E501
+    )
+    if walk_stats is not None:
+        walk_stats.update(stats)
+
+
 def parse_args():
     """Parse command-line arguments."""
     parser = argparse.ArgumentParser(
         description="Generate DORA metrics from merge commits in a git repo."
     )
-    parser.add_argument("repo", help="Path to the git repository")
+    parser.add_argument(
+        "repo", nargs="?", default=None, help="Path to the git repository"
+    )
     parser.add_argument(
         "--since",
         required=False,
@@ -254,8 +1721,9 @@ def parse_args():
     )
     parser.add_argument(
         "--tag",
-        required=True,
-        help='Tag pattern to classify (e.g., "build-*")',  # noqa: E501
+        required=False,
+        default=None,
+        help='Tag pattern to classify (e.g., "build-*"). Required unless every manifest entry has one.',  # noqa: E501
     )
     parser.add_argument(
         "--branch",
@@ -287,13 +1755,79 @@ def parse_args():
         "--csv", required=False, default=None, help="CSV output file"
     )  # noqa: E501
     parser.add_argument(
-        "--ma",
+        "--cache-dir",
+        required=False,
+        default=None,
+        help="Cache commit metadata in this directory (implies --cache)",  # noqa: E501
+    )
+    parser.add_argument(
+        "--cache",
+        action="store_true",
+        help="Cache commit metadata between runs in $XDG_CACHE_HOME/git-dora-report",  # noqa: E501
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Read everything from git, even with --cache or --cache-dir (the default without them)",  # noqa: E501
+    )
+    parser.add_argument(
+        "--backend",
+        choices=sorted(GIT_BACKENDS),
+        default="git",
+        help="Read repositories by running git, or in-process with the pure Python object reader (no cache)",  # noqa: E501
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Report the time spent per stage and in git commands to stderr",  # noqa: E501
+    )
+    parser.add_argument(
+        "--profile-output",
+        default=None,
+        help="Write the --profile report to this JSON file instead",  # noqa: E501
+    )
+    parser.add_argument(
+        "--write-commit-graph",
+        action="store_true",
+        help="Write a commit-graph for repositories without an up-to-date one, speeding up git's history walks",  # noqa: E501
+    )
+    parser.add_argument(
+        "--generation-walks",
+        action="store_true",
+        help="Walk merged branches by commit-graph generation number: faster, but with skewed clocks lead times can differ from git rev-list",  # noqa: E501
+    )
+    parser.add_argument(
+        "--manifest",
+        required=False,
+        default=None,
+        help='JSON list of repositories to analyse instead of REPO, each a path relative to the manifest or {"path", "branch", "tag"}',  # noqa: E501
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
         required=False,
         type=int,
-        default=3,
-        help="Moving average window (number of intervals, default 3, simple)",  # noqa: E501
+        default=os.cpu_count() or 1,
+        help="Number of repositories collected in parallel (default: number of CPUs)",  # noqa: E501
+    )
+    parser.add_argument(
+        "--ma",
+        required=False,
+        type=parse_sizes,
+        default=[3],
+        help="Simple moving average windows, comma separated (number of intervals, default 3)",  # noqa: E501
     )
-    return parser.parse_args()
+    parser.add_argument(
+        "--ema",
+        required=False,
+        type=parse_sizes,
+        default=[],
+        help="Exponential moving average spans, comma separated (number of intervals)",  # noqa: E501
+    )
+    args = parser.parse_args()
+    if not args.repo and not args.manifest:
+        parser.error("either REPO or --manifest is required")
+    return args
 
 
 def setup_logging(verbosity: int) -> logging.Logger:
@@ -312,9 +1846,10 @@ def setup_logging(verbosity: int) -> logging.Logger:
 def generate_intervals(since_dt, until_dt, interval_td, count, log):
     """Generate a list of (interval_start, interval_end) tuples for reporting."""
     intervals = []
+    step = timedelta(days=interval_td)
     for i in range(count):
-        interval_end = until_dt - i * (interval_td*86400.0)
-        interval_start = interval_end - (interval_td*86400.0)
+        interval_end = until_dt - i * step
+        interval_start = interval_end - step
         if interval_start < since_dt:
             log.info(
                 f"Stopping interval generation: interval_start {interval_start} < since {since_dt}"  # noqa: E501
@@ -325,12 +1860,13 @@ def generate_intervals(since_dt, until_dt, interval_td, count, log):
     return intervals
 
 
-def write_csv_report(results, csv_file, ma_fields, ma_fieldnames):
+def write_csv_report(results, csv_file, ma_fields, ma_fieldnames, with_repository=False):
     """Write the DORA metrics and moving averages to a CSV file."""
     with open(csv_file, "w", newline="") as f:
         writer = csv.DictWriter(
             f,
             fieldnames=[
+                *(["repository"] if with_repository else []),
                 "interval_start",
                 "interval_end",
                 "deployment_frequency",
@@ -347,11 +1883,353 @@ def write_csv_report(results, csv_file, ma_fields, ma_fieldnames):
             writer.writerow(row)
 
 
+def load_manifest(manifest_file: str, tag: str = None, branch: str = None) -> List[Dict]:
+    """
+    Read a JSON manifest of repositories to analyse.
+
+    The manifest is a list whose entries are either a repository path or an
+    object with a ``path`` and optional ``branch`` and ``tag`` keys. Missing
+    values default to the ``--branch`` and ``--tag`` arguments. Relative
+    paths are relative to the directory of the manifest. A repository may be
+    listed more than once, with different branches or tags for instance.
+
+    :return: A list of ``{"path", "branch", "tag"}`` dicts.
+    """
+    with open(manifest_file) as f:
+        entries = json.load(f)
+    base = os.path.dirname(manifest_file)
+    repositories = []
+    for entry in entries:
+        if isinstance(entry, str):
+            entry = {"path": entry}
+        if "path" not in entry:
+            raise ValueError(f"Manifest entry without a path: {entry}")
+        repositories.append(
+            {
+                "path": os.path.join(base, entry["path"]),
+                "branch": entry.get("branch") or branch,
+                "tag": entry.get("tag") or tag,
+            }
+        )
+    return repositories
+
+
+def get_first_commit_time(repo: str, log) -> int:
+    """Return the commit time of the first root commit of HEAD, or None."""
+    try:
+        session = git_session(repo, log=log)
+    except ValueError as e:
+        log.warning(f"Could not determine first commit of {repo}: {e}")  # noqa: E501
+        return None
+    if isinstance(session, ObjectStoreSession):
+        # rev-list --reverse lists the root the walk reaches last first
+        head = session.resolve("HEAD^{commit}")
+        graph = session.graph
+        roots = [
+            oid
+            for oid in ([] if head is None else graph.walk(head))
+            if not graph.parents[graph.positions[oid]]
+        ]
+        if not roots:
+            log.warning(f"Could not determine first commit of {repo}")  # noqa: E501
+            return None
+        return graph.times[graph.positions[roots[-1]]]
+    cmd = [
+        "git",
+        "-C",
+        repo,
+        "rev-list",
+        "--max-parents=0",
+        "--reverse",
+        "--timestamp",
+        "HEAD",
+    ]
+    result = run_git(cmd, capture_output=True, text=True)
+    if result.returncode != 0 or not result.stdout.strip():
+        log.warning(f"Could not determine first commit of {repo}: {result.stderr}")  # noqa: E501
+        return None
+    first_line = result.stdout.strip().split("\n")[0]
+    return int(first_line.split()[0])
+
+
+def prepare_repository(repo_path: str, write_commit_graph: bool = False, log=None) -> Dict:
+    """
+    Check that a repository has a commit-graph covering HEAD, optionally
+    writing one.
+
+    git's own history walks and the generation-number branch walks of
+    ``CommitGraph`` both need the commit-graph file.
+
+    :param write_commit_graph: Run ``git commit-graph write --reachable``
+                               when the commit-graph is missing or stale.
+    :return: A dict with the ``commit_graph`` state (``present``,
+             ``written``, ``stale``, ``missing`` or ``failed``) and the
+             ``seconds`` the step took.
+    """
+    started = time.perf_counter()
+    state = "missing"
+    try:
+        repository = Repository(repo_path)
+    except ValueError:
+        repository = None
+    if repository is not None and repository.commit_graph is not None:
+        head = repository.resolve("HEAD^{commit}")
+        covered = head is None or repository.commit_graph.lookup(bytes.fromhex(head))
+        state = "present" if covered else "stale"
+    if repository is not None:
+        repository.close()
+    if state != "present" and write_commit_graph:
+        cmd = ["git", "-C", repo_path, "commit-graph", "write", "--reachable"]
+        if log:
+            log.info(f"Writing commit-graph: {' '.join(cmd)}")  # noqa: E501
+        result = run_git(cmd, capture_output=True, text=True)
+        if result.returncode != 0:
+            if log:
+                log.warning(f"Failed to write commit-graph of {repo_path}: {result.stderr.strip()}")  # noqa: E501
+            state = "failed"
+        else:
+            state = "written"
+    return {"commit_graph": state, "seconds": time.perf_counter() - started}
+
+
+def collect_repository(
+    repository: Dict, intervals, cache_dir, log, walk_stats=None, write_commit_graph=False
+) -> List[tuple]:
+    """
+    Collect the per-interval metric inputs of one manifest repository.
+
+    The repository is prepared first, see ``prepare_repository``.
+
+    :param repository: A ``{"path", "branch", "tag"}`` dict.
+    :param cache_dir: Commit cache directory, or None to read git directly.
+    :param walk_stats: Optional dict receiving the branch walk statistics
+                       and, as ``preparation``, the preparation result.
+    :param write_commit_graph: Write a missing or stale commit-graph.
+    :return: A list of ``iter_interval_inputs`` tuples, one per interval.
+    :raises ValueError: If the path is not a git repository.
+    """
+    with profiling.stage("prepare"):
+        preparation = prepare_repository(repository["path"], write_commit_graph, log)
+    if walk_stats is not None:
+        walk_stats["preparation"] = preparation
+    cache = tag_index = None
+    if get_backend() == "python":
+        # Raises ValueError for a path outside a repository; the cache is
+        # filled from git output, so objects are read directly instead.
+        tag_index = git_session(repository["path"], log=log).tag_index
+    else:
+        result = run_git(
+            ["git", "-C", repository["path"], "rev-parse", "--git-dir"],
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode != 0:
+            raise ValueError(f"Not a git repository: {result.stderr.strip()}")
+        if cache_dir:
+            cache = CommitCache(cache_dir, repository["path"], log=log)
+        else:
+            tag_index = build_tag_index(repository["path"], log=log)
+    try:
+        return list(
+            iter_interval_inputs(
+                repository["path"],
+                repository["tag"],
+                repository["branch"],
+                intervals,
+                log,
+                tag_index=tag_index,
+                cache=cache,
+                walk_stats=walk_stats,
+            )
+        )
+    finally:
+        if cache is not None:
+            cache.close()
+
+
+def _collect_repository_worker(
+    repository,
+    intervals,
+    cache_dir,
+    verbosity,
+    backend,
+    generation_walks=False,
+    write_commit_graph=False,
+    profile=False,
+):
+    """
+    Entry point of pool processes, which set up their own logging and
+    prepare their repository, so commit-graphs are written in parallel.
+
+    :param profile: Profile the collection in the worker too.
+    :return: The interval inputs, the branch walk statistics and the
+             profile report, or None without ``profile``.
+    """
+    use_backend(backend)
+    use_generation_walks(generation_walks)
+    if profile:
+        profiling.start()
+    walk_stats = {}
+    try:
+        inputs = collect_repository(
+            repository,
+            intervals,
+            cache_dir,
+            setup_logging(verbosity),
+            walk_stats,
+            write_commit_graph,
+        )
+    finally:
+        if profile:
+            # cat-file processes are timed when their session closes
+            close_git_sessions()
+        profiler = profiling.stop()
+    return inputs, walk_stats, profiler and profiler.report()
+
+
+def collect_repositories(
+    repositories,
+    intervals,
+    cache_dir,
+    jobs,
+    verbosity,
+    log,
+    walk_stats=None,
+    write_commit_graph=False,
+):
+    """
+    Collect several repositories, spread over a pool of ``jobs`` processes.
+
+    A failing repository is logged and reported but does not stop the
+    others. Progress is written to stderr as repositories complete.
+
+    Results are keyed by the index of the repository in ``repositories``,
+    so a repository listed twice is collected twice.
+
+    :param walk_stats: Optional dict filled with the branch walk statistics
+                       and preparation of each collected repository, by
+                       index.
+    :param write_commit_graph: Write missing or stale commit-graphs, in the
+                               worker of each repository.
+
+    :return: A tuple of a dict of index to interval inputs for the
+             repositories that succeeded and a dict of index to error for
+             those that failed.
+    """
+    collected = {}
+    failures = {}
+    if walk_stats is None:
+        walk_stats = {}
+    total = len(repositories)
+    jobs = min(jobs, total)
+
+    def report(done, index, error=None):
+        path = repositories[index]["path"]
+        if error is not None:
+            failures[index] = error
+            log.error(f"Failed to collect {path}: {error}")  # noqa: E501
+        if total > 1:
+            status = "collected" if error is None else f"failed ({error})"
+            print(f"[{done}/{total}] {status} {path}", file=sys.stderr)
+
+    if jobs <= 1:
+        for index, repository in enumerate(repositories):
+            try:
+                stats = walk_stats[index] = {}
+                collected[index] = collect_repository(
+                    repository, intervals, cache_dir, log, stats, write_commit_graph
+                )
+            except Exception as e:
+                report(index + 1, index, e)
+            else:
+                report(index + 1, index)
+        return collected, failures
+
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = {
+            pool.submit(
+                _collect_repository_worker,
+                repository,
+                intervals,
+                cache_dir,
+                verbosity,
+                get_backend(),
+                _generation_walks,
+                write_commit_graph,
+                profiling.active() is not None,
+            ): index
+            for index, repository in enumerate(repositories)
+        }
+        for done, future in enumerate(as_completed(futures), 1):
+            index = futures[future]
+            try:
+                collected[index], walk_stats[index], profile = future.result()
+                if profile is not None:
+                    profiling.active().merge(profile)
+            except Exception as e:
+                report(done, index, e)
+            else:
+                report(done, index)
+    return collected, failures
+
+
+def combine_interval_inputs(inputs_per_repository) -> List[tuple]:
+    """
+    Merge per-interval metric inputs of several repositories.
+
+    Deployment times are re-sorted so the combined deployment frequency
+    spans the first and last deployment across all repositories.
+    """
+    combined = []
+    for interval_inputs in zip(*inputs_per_repository):
+        states, times, recovery_times, lead_times = [], [], [], []
+        for s, t, r, lt in interval_inputs:
+            states += s
+            times += t
+            recovery_times += r
+            lead_times += lt
+        combined.append((states, sorted(times), recovery_times, lead_times))
+    return combined
+
+
+def interval_rows(intervals, interval_inputs, interval_days, repository=None):
+    """Turn per-interval metric inputs into report rows."""
+    rows = []
+    for (interval_start, interval_end), inputs in zip(intervals, interval_inputs):
+        row = {} if repository is None else {"repository": repository}
+        row.update(
+            {
+                "interval_start": interval_start.strftime("%Y-%m-%dT%H:%M:%S"),
+                "interval_end": interval_end.strftime("%Y-%m-%dT%H:%M:%S"),
+                **aggregate_dora_metrics(*inputs, interval_days),
+            }
+        )
+        rows.append(row)
+    return rows
+
+
+def add_moving_averages(results, ma_fields, window):
+    """Add simple moving averages of ``ma_fields`` over ``window`` rows."""
+    add_rolling_fields(results, ma_fields, windows=[window])
+
+
 def main():
     """Main entry point for DORA metrics reporting."""
     args = parse_args()
     log = setup_logging(args.verbose)
     print(args)
+    use_backend(args.backend)
+    use_generation_walks(args.generation_walks)
+    if args.profile or args.profile_output:
+        profiling.start()
+
+    if args.manifest:
+        repositories = load_manifest(args.manifest, args.tag, args.branch)
+    else:
+        repositories = [{"path": args.repo, "branch": args.branch, "tag": args.tag}]
+    for repository in repositories:
+        if not repository["tag"]:
+            raise SystemExit(f"No tag pattern given for {repository['path']}")
 
     # Parse date arguments
     if not args.until:
@@ -363,22 +2241,14 @@ def main():
             else datetime.strptime(args.until, "%Y-%m-%d")
         )
     if not args.since:
-        # Find the timestamp of the first commit in the repo
-        cmd = [
-            "git",
-            "-C",
-            args.repo,
-            "rev-list",
-            "--max-parents=0",
-            "--reverse",
-            "--timestamp",
-            "HEAD",
+        # Find the timestamp of the first commit across the repositories
+        first_timestamps = [
+            t
+            for t in (get_first_commit_time(r["path"], log) for r in repositories)
+            if t is not None
         ]
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        if result.returncode == 0 and result.stdout.strip():
-            first_line = result.stdout.strip().split("\n")[0]
-            first_timestamp = int(first_line.split()[0])
-            since_dt = datetime.fromtimestamp(first_timestamp)
+        if first_timestamps:
+            since_dt = datetime.fromtimestamp(min(first_timestamps))
             log.info(
                 f"No --since provided, using timestamp of first commit: {since_dt}"
             )
@@ -396,8 +2266,8 @@ def main():
 
     # Determine interval size
     if not args.interval:
-        interval_td = until_dt - since_dt
-        args.interval = f"{interval_td.days}d"
+        interval_td = (until_dt - since_dt).days
+        args.interval = f"{interval_td}d"
         log.info(f"Defaulting interval to {args.interval} based on --since and --until")
     else:
         interval_td = parse_interval(args.interval)
@@ -407,20 +2277,24 @@ def main():
     # Generate intervals
     intervals = generate_intervals(since_dt, until_dt, interval_td, args.count, log)
 
-    # Collect metrics for each interval
-    results = []
-    for interval_start, interval_end in intervals:
-        since_str = interval_start.strftime("%Y-%m-%dT%H:%M:%S")
-        until_str = interval_end.strftime("%Y-%m-%dT%H:%M:%S")
-        log.info(f"Collecting metrics for interval {since_str} to {until_str}")
-        metrics = dora_metrics_for_range(
-            args.repo, args.tag, args.branch, since_str, until_str, log, interval_td
-        )
-        results.append(
-            {"interval_start": since_str, "interval_end": until_str, **metrics}
+    # Collect every repository in one pass over its history, through the
+    # cache if asked for
+    cache_dir = None
+    if (args.cache or args.cache_dir) and not args.no_cache:
+        cache_dir = args.cache_dir or default_cache_dir()
+    walk_stats = {}
+    with profiling.stage("collect"):
+        collected, failures = collect_repositories(
+            repositories,
+            intervals,
+            cache_dir,
+            args.jobs,
+            args.verbose,
+            log,
+            walk_stats,
+            args.write_commit_graph,
         )
 
-    # Compute simple moving averages if requested
     ma_fields = [
         "deployment_frequency",
         "change_failure_rate",
@@ -429,44 +2303,94 @@ def main():
         "deployment_count",
         "total_merges",
     ]
-    if args.ma and args.ma > 1:
-        for field in ma_fields:
-            ma_values = []
-            for i in range(len(results)):
-                window = results[max(0, i - args.ma + 1) : i + 1]
-                vals = [row[field] for row in window]
-                avg = sum(vals) / len(vals) if vals else 0
-                ma_values.append(avg)
-            # Add moving average fields to results
-            for i in range(len(results)):
-                results[i][f"ma_{field}"] = ma_values[i]
+    with profiling.stage("metrics"):
+        series = []
+        for index, repository in enumerate(repositories):
+            if index in collected:
+                series.append(
+                    interval_rows(
+                        intervals,
+                        collected[index],
+                        interval_td,
+                        repository["path"] if args.manifest else None,
+                    )
+                )
+        if args.manifest and len(collected) > 1:
+            series.append(
+                interval_rows(
+                    intervals,
+                    combine_interval_inputs(collected[index] for index in sorted(collected)),
+                    interval_td,
+                    "combined",
+                )
+            )
+
+        # Compute moving averages per repository if requested, in one pass
+        windows = [window for window in args.ma if window > 1]
+        rolling_fields = rolling_field_names(ma_fields, windows, args.ema)
+        if rolling_fields:
+            for rows in series:
+                add_rolling_fields(rows, ma_fields, windows, args.ema)
+        results = [row for rows in series for row in rows]
 
     # Write CSV report if requested
     if args.csv:
-        write_csv_report(
-            results, args.csv, ma_fields, [f"ma_{field}" for field in ma_fields]
-        )
+        with profiling.stage("serialize"):
+            write_csv_report(
+                results,
+                args.csv,
+                ma_fields,
+                list(rolling_fields),
+                with_repository=bool(args.manifest),
+            )
 
     # Print results to console
     headers = [
-        "Interval Start",
-        "Interval End",
-        "Deployment Frequency",
-        "Change Failure Rate",
-        "MTTR",
-        "Mean Lead Time",
-        "Deployment Count",
-        "Total Merges",
+        ("Interval Start", "interval_start"),
+        ("Interval End", "interval_end"),
+        ("Deployment Frequency", "deployment_frequency"),
+        ("Change Failure Rate", "change_failure_rate"),
+        ("MTTR", "mttr"),
+        ("Mean Lead Time", "mean_lead_time"),
+        ("Deployment Count", "deployment_count"),
+        ("Total Merges", "total_merges"),
     ]
-    ma_headers = [f"MA {field}" for field in ma_fields]
-    print(f"{' | '.join(headers + ma_headers)}")  # noqa: E501
-    for row in results:
+    if args.manifest:
+        headers.insert(0, ("Repository", "repository"))
+    for name, (field, _, _) in rolling_fields.items():
+        headers.append((f"{name.split('_', 1)[0].upper()} {field}", name))
+    with profiling.stage("serialize"):
+        print(f"{' | '.join(h for h, _ in headers)}")  # noqa: E501
+        for row in results:
+            print(
+                " | ".join(
+                    f"{row[f]:.2f}" if isinstance(row[f], (int, float)) else str(row[f])
+                    for _, f in headers
+                )
+            )  # noqa: E501
+
+    # Summarise whether history walks could use the commit-graph
+    for index, repository in enumerate(repositories):
+        path = repository["path"]
+        stats = walk_stats.get(index) or {}
+        preparation = stats.get("preparation")
+        if preparation is None:
+            # Failed in a worker before reporting back
+            continue
         print(
-            " | ".join(
-                f"{row[h]:.2f}" if isinstance(row[h], (int, float)) else str(row[h])
-                for h in headers + ma_headers
-            )
-        )  # noqa: E501
+            f"Commit-graph of {path}: {preparation['commit_graph']} ({preparation['seconds']:.2f}s), "  # noqa: E501
+            f"{stats.get('generation_walks', 0)} branch walks by generation number, "  # noqa: E501
+            f"{stats.get('date_walks', 0)} by commit date ({stats.get('walk_seconds', 0.0):.2f}s)",  # noqa: E501
+            file=sys.stderr,
+        )
+
+    if profiling.active() is not None:
+        close_git_sessions()
+        profiling.write(profiling.stop(), args.profile_output or "-")
+
+    if failures:
+        log.error(f"{len(failures)} of {len(repositories)} repositories failed")  # noqa: E501
+        sys.exit(1)
 
 
 if __name__ == "__main__":
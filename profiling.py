@@ -0,0 +1,257 @@
+"""
+Per-stage timing of a run, switched on with ``--profile``.
+
+A :class:`Profiler` measures the wall and CPU time of named stages, counts
+items such as events and merges and sums the git subprocesses by command.
+Stage times are exclusive: entering a stage pauses the one around it, so a
+stage pulling events from a collector is not charged for the collection.
+The stages of worker processes ran while the parent was in one of its own,
+so they are added up in a separate ``workers`` section.
+
+The hooks below are called from the hot paths of the report. While no
+profiler is active they only check a module global, so they stay in the
+code for free.
+"""
+import json
+import sys
+from contextlib import contextmanager, nullcontext
+from time import perf_counter, process_time
+from typing import Dict, Iterable, List, Optional
+
+_active: Optional["Profiler"] = None
+_NULL_STAGE = nullcontext()
+
+
+class Profiler:
+    """
+    Wall time, CPU time and call counts of stages, item counts and git
+    subprocess statistics of a run.
+    """
+
+    def __init__(self):
+        # name -> [wall seconds, CPU seconds, calls]
+        self.stages: Dict[str, List] = {}
+        # Stages of merged worker reports, same layout
+        self.workers: Dict[str, List] = {}
+        self.counts: Dict[str, int] = {}
+        # git command -> [runs, seconds]
+        self.git: Dict[str, List] = {}
+        self._stack: List[str] = []
+        self._wall = self.started_wall = perf_counter()
+        self._cpu = self.started_cpu = process_time()
+
+    def _charge(self):
+        """Charge the time since the last switch to the current stage."""
+        wall = perf_counter()
+        cpu = process_time()
+        if self._stack:
+            totals = self.stages[self._stack[-1]]
+            totals[0] += wall - self._wall
+            totals[1] += cpu - self._cpu
+        self._wall = wall
+        self._cpu = cpu
+
+    def enter(self, name: str):
+        self._charge()
+        self._stack.append(name)
+        totals = self.stages.setdefault(name, [0.0, 0.0, 0])
+        totals[2] += 1
+
+    def exit(self):
+        self._charge()
+        self._stack.pop()
+
+    @contextmanager
+    def stage(self, name: str):
+        self.enter(name)
+        try:
+            yield
+        finally:
+            self.exit()
+
+    def iterate(self, name: str, iterable: Iterable, counter: str = None):
+        """
+        Charge the time spent producing every item to a stage.
+
+        The switches of :meth:`enter` and :meth:`exit` are inlined, this
+        runs once per event.
+
+        :param counter: Count the items under this name too.
+        """
+        iterator = iter(iterable)
+        stack = self._stack
+        counts = self.counts
+        totals = self.stages.setdefault(name, [0.0, 0.0, 0])
+        while True:
+            self._charge()
+            stack.append(name)
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                wall = perf_counter()
+                cpu = process_time()
+                totals[0] += wall - self._wall
+                totals[1] += cpu - self._cpu
+                self._wall = wall
+                self._cpu = cpu
+                stack.pop()
+            totals[2] += 1
+            if counter:
+                counts[counter] = counts.get(counter, 0) + 1
+            yield item
+
+    def count(self, name: str, items: int = 1):
+        self.counts[name] = self.counts.get(name, 0) + items
+
+    def git_command(self, cmd: List[str], seconds: float):
+        totals = self.git.setdefault(git_command_name(cmd), [0, 0.0])
+        totals[0] += 1
+        totals[1] += seconds
+
+    def merge(self, report: Dict):
+        """
+        Add the stages, counts and git statistics of the report of a worker
+        process.
+
+        The worker's stages go to :attr:`workers`: they overlap the stage
+        the parent was in while it waited, and would break the exclusive
+        stage times if they were added to :attr:`stages`.
+        """
+        for name, stage in report["stages"].items():
+            totals = self.workers.setdefault(name, [0.0, 0.0, 0])
+            totals[0] += stage["wall_seconds"]
+            totals[1] += stage["cpu_seconds"]
+            totals[2] += stage["calls"]
+        for name, items in report["counts"].items():
+            self.count(name, items)
+        for command, git in report["git"].items():
+            totals = self.git.setdefault(command, [0, 0.0])
+            totals[0] += git["runs"]
+            totals[1] += git["seconds"]
+
+    def report(self) -> Dict:
+        """
+        Return the profile as a JSON serializable dict.
+
+        The calls of a stage timed with :meth:`iterate` are its items. Rates
+        are items per second of the whole run's wall time. ``workers`` holds
+        the stages of merged worker reports, summed over the workers.
+        """
+        self._charge()
+        wall = perf_counter() - self.started_wall
+        return {
+            "wall_seconds": wall,
+            "cpu_seconds": process_time() - self.started_cpu,
+            "stages": {
+                name: {"wall_seconds": w, "cpu_seconds": c, "calls": calls}
+                for name, (w, c, calls) in self.stages.items()
+            },
+            "workers": {
+                name: {"wall_seconds": w, "cpu_seconds": c, "calls": calls}
+                for name, (w, c, calls) in self.workers.items()
+            },
+            "counts": dict(self.counts),
+            "per_second": {
+                name: items / wall if wall else 0.0 for name, items in self.counts.items()
+            },
+            "git": {
+                command: {"runs": runs, "seconds": seconds}
+                for command, (runs, seconds) in sorted(self.git.items())
+            },
+        }
+
+
+def git_command_name(cmd: List[str]) -> str:
+    """
+    Return the git subcommand of a command line, e.g. ``log`` for
+    ``git -C repo log --merges``.
+    """
+    arguments = iter(cmd[1:])
+    for argument in arguments:
+        if argument in ("-C", "-c", "--git-dir", "--work-tree"):
+            next(arguments, None)
+        elif not argument.startswith("-"):
+            return argument
+    return "git"
+
+
+def format_report(report: Dict) -> str:
+    """
+    Format a profile report as a text table.
+    """
+    lines = [f"{'Stage':<16} {'Wall s':>10} {'CPU s':>10} {'Calls':>10}"]
+    for name, stage in report["stages"].items():
+        lines.append(
+            f"{name:<16} {stage['wall_seconds']:>10.3f} {stage['cpu_seconds']:>10.3f} {stage['calls']:>10}"  # noqa: E501
+        )
+    lines.append(f"{'total':<16} {report['wall_seconds']:>10.3f} {report['cpu_seconds']:>10.3f}")  # noqa: E501
+    if report["workers"]:
+        lines.append(f"{'Worker stage':<16} {'Wall s':>10} {'CPU s':>10} {'Calls':>10}")  # noqa: E501
+        for name, stage in report["workers"].items():
+            lines.append(
+                f"{name:<16} {stage['wall_seconds']:>10.3f} {stage['cpu_seconds']:>10.3f} {stage['calls']:>10}"  # noqa: E501
+            )
+    for name, items in report["counts"].items():
+        lines.append(f"{name}: {items} ({report['per_second'][name]:,.0f}/s)")
+    for command, git in report["git"].items():
+        lines.append(f"git {command}: {git['runs']} runs, {git['seconds']:.3f}s")
+    return "\n".join(lines)
+
+
+def start() -> Profiler:
+    """Make a new profiler the active one and return it."""
+    global _active
+    _active = Profiler()
+    return _active
+
+
+def stop() -> Optional[Profiler]:
+    """Deactivate the active profiler and return it."""
+    global _active
+    profiler, _active = _active, None
+    return profiler
+
+
+def active() -> Optional[Profiler]:
+    return _active
+
+
+def stage(name: str):
+    """Context manager charging its block to a stage, a no-op when off."""
+    if _active is None:
+        return _NULL_STAGE
+    return _active.stage(name)
+
+
+def iterate(name: str, iterable: Iterable, counter: str = None) -> Iterable:
+    """Charge the items of an iterable to a stage, the iterable when off."""
+    if _active is None:
+        return iterable
+    return _active.iterate(name, iterable, counter)
+
+
+def count(name: str, items: int = 1):
+    if _active is not None:
+        _active.count(name, items)
+
+
+def git_command(cmd: List[str], seconds: float):
+    if _active is not None:
+        _active.git_command(cmd, seconds)
+
+
+def write(profiler: Profiler, destination: str):
+    """
+    Write the report of a profiler as text to stderr for ``-``, as JSON to
+    the file ``destination`` otherwise.
+
+    :param destination: ``-`` or the path of the JSON file.
+    """
+    report = profiler.report()
+    if destination == "-":
+        print(format_report(report), file=sys.stderr)
+    else:
+        with open(destination, "w") as f:
+            json.dump(report, f, indent=2)
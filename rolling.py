@@ -0,0 +1,178 @@
+"""
+Rolling statistics over a series of report rows.
+
+Every statistic is updated in O(1) per value: simple moving averages keep a
+running sum over a ring buffer of their window, exponential moving averages
+only their last value. Values can be numbers or timedeltas.
+"""
+from datetime import timedelta
+from typing import Dict, Iterable, List, Tuple
+
+
+def _zero(value):
+    return timedelta(0) if isinstance(value, timedelta) else 0
+
+
+class RollingMean:
+    """
+    Simple moving average over the last ``window`` values.
+
+    The first values are averaged over as many values as there are so far.
+    The sum is kept running, so it may differ from a fresh sum in the last
+    bits of a float; a window of zeros is exactly zero though.
+
+    :param window: Number of values averaged.
+    :type window: int
+    """
+
+    def __init__(self, window: int):
+        if window < 1:
+            raise ValueError("Window must be at least 1.")
+        self.window = window
+        self.values = [None] * window
+        self.position = 0
+        self.count = 0
+        self.total = None
+        self.nonzero = 0
+
+    def push(self, value):
+        """
+        Add a value and return the mean of the window ending at it.
+        """
+        if self.total is None:
+            self.total = _zero(value)
+        if self.count == self.window:
+            old = self.values[self.position]
+            self.total -= old
+            self.nonzero -= bool(old)
+        else:
+            self.count += 1
+        self.values[self.position] = value
+        self.position = (self.position + 1) % self.window
+        self.total += value
+        self.nonzero += bool(value)
+        if not self.nonzero:
+            # Do not leave rounding residue of values that left the window
+            self.total = _zero(value)
+        return self.total / self.count
+
+
+class ExponentialMovingAverage:
+    """
+    Exponential moving average with the smoothing of a ``span``.
+
+    The smoothing factor is ``2 / (span + 1)`` and the average starts at
+    the first value.
+
+    :param span: Span of the average, in values.
+    :type span: int
+    """
+
+    def __init__(self, span: int):
+        if span < 1:
+            raise ValueError("Span must be at least 1.")
+        self.span = span
+        self.alpha = 2 / (span + 1)
+        self.value = None
+
+    def push(self, value):
+        """
+        Add a value and return the average so far.
+        """
+        if self.value is None:
+            self.value = value
+        else:
+            self.value = self.value + (value - self.value) * self.alpha
+        return self.value
+
+
+def rolling_field_names(
+    fields: Iterable[str], windows: Iterable[int] = (), spans: Iterable[int] = ()
+) -> Dict[str, Tuple[str, str, int]]:
+    """
+    Name the rolling statistics of ``fields``.
+
+    A single window keeps the historical ``ma_<field>`` names, several
+    windows are told apart as ``ma<window>_<field>``; exponential averages
+    are ``ema<span>_<field>``.
+
+    :return: Statistic names mapped to (field, ``"ma"`` or ``"ema"``, size),
+             in output order.
+    :rtype: Dict[str, Tuple[str, str, int]]
+    """
+    windows = list(windows)
+    spans = list(spans)
+    names = {}
+    for window in windows:
+        for field in fields:
+            prefix = "ma" if len(windows) == 1 else f"ma{window}"
+            names[f"{prefix}_{field}"] = (field, "ma", window)
+    for span in spans:
+        for field in fields:
+            names[f"ema{span}_{field}"] = (field, "ema", span)
+    return names
+
+
+class RollingStats:
+    """
+    Several rolling statistics of several fields, fed one row at a time.
+
+    :param fields: Fields of the rows to follow.
+    :type fields: Iterable[str]
+    :param windows: Simple moving average windows.
+    :type windows: Iterable[int]
+    :param spans: Exponential moving average spans.
+    :type spans: Iterable[int]
+    """
+
+    def __init__(
+        self, fields: Iterable[str], windows: Iterable[int] = (), spans: Iterable[int] = ()
+    ):
+        self.names = rolling_field_names(list(fields), windows, spans)
+        self.statistics = [
+            (
+                name,
+                field,
+                RollingMean(size) if kind == "ma" else ExponentialMovingAverage(size),
+            )
+            for name, (field, kind, size) in self.names.items()
+        ]
+
+    def push(self, row: Dict) -> Dict:
+        """
+        Add a row and return its statistics by name.
+        """
+        return {name: statistic.push(row[field]) for name, field, statistic in self.statistics}
+
+
+def add_rolling_fields(
+    rows: List[Dict],
+    fields: Iterable[str],
+    windows: Iterable[int] = (),
+    spans: Iterable[int] = (),
+) -> List[str]:
+    """
+    Add the rolling statistics of ``fields`` to every row, in one pass.
+
+    :param rows: Rows in order, updated in place.
+    :type rows: List[Dict]
+    :return: The names of the added fields.
+    :rtype: List[str]
+    """
+    stats = RollingStats(fields, windows, spans)
+    for row in rows:
+        row.update(stats.push(row))
+    return list(stats.names)
+
+
+def parse_sizes(value: str) -> List[int]:
+    """
+    Parse a comma separated list of window sizes, e.g. ``"3,12"``.
+
+    :raises ValueError: If a size is not a positive integer.
+    """
+    sizes = [int(size) for size in value.split(",") if size.strip()]
+    if any(size < 1 for size in sizes):
+        raise ValueError(f"Window sizes must be positive: {value}")
+    return sizes
+
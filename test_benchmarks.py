@@ -0,0 +1,68 @@
+import json
+import subprocess
+import sys
+
+from benchmarks import startup, suite
+
+
+def test_compare_flags_regressions():
+    baseline = {
+        "results": {
+            "chunk_interval[100]": {"seconds": 1.0},
+            "get_merge_commits[10]": {"seconds": 1.0},
+            "metrics.reference[100]": {"seconds": 1.0},
+        },
+        "thresholds": {"get_merge_commits": 1.0},
+    }
+    results = {
+        "chunk_interval[100]": {"seconds": 1.5},
+        "get_merge_commits[10]": {"seconds": 1.5},
+        "metrics.reference[100]": {"seconds": 1.2},
+        "metrics.vectorized[100]": {"seconds": 9.0},
+    }
+
+    regressions = suite.compare(results, baseline, 0.3)
+
+    assert len(regressions) == 1
+    assert regressions[0].startswith("chunk_interval[100] took 1500.0ms, 1.50x")
+
+
+def test_suite_runs_every_benchmark(tmp_path, monkeypatch):
+    monkeypatch.setattr(suite, "MIN_SAMPLE_SECONDS", 0)
+    results = suite.run({"events": [50], "merges": [3]}, repeat=1)
+
+    assert list(results) == [
+        f"{name}[{3 if kind == 'merges' else 50}]" for name, (kind, _) in suite.BENCHMARKS.items()
+    ]
+    assert all(result["seconds"] > 0 for result in results.values())
+    json.dumps(results)
+
+
+def run_suite(*arguments):
+    command = [sys.executable, "-m", "benchmarks.suite", "--events", "50", "--merges", "2"]
+    command += ["--repeat", "1", "--only", "chunk_interval", "--only", "get_merge_commits"]
+    return subprocess.run(command + list(arguments), capture_output=True, text=True)
+
+
+def test_main_baseline(tmp_path):
+    baseline = tmp_path / "baseline.json"
+    assert run_suite("--update-baseline", str(baseline)).returncode == 0
+    document = json.loads(baseline.read_text())
+    assert sorted(document["results"]) == ["chunk_interval[50]", "get_merge_commits[2]"]
+
+    # Everything regressed against a baseline ten times faster
+    for result in document["results"].values():
+        result["seconds"] /= 10
+    baseline.write_text(json.dumps(document))
+    result = run_suite("--baseline", str(baseline))
+    assert result.returncode == 1
+    assert result.stderr.count("REGRESSION") == 2
+
+
+def test_startup_help_does_not_import_pydantic():
+    _, modules = startup.import_profile(startup.HELP_CODE)
+    assert "dora_report.main" in modules
+    assert "pydantic" not in modules
+    # Validating collectors still get it
+    _, modules = startup.import_profile(startup.scenario_code("example_plugin"))
+    assert "pydantic" in modules
@@ -0,0 +1,180 @@
+import logging
+import os
+import subprocess
+
+import pytest
+
+import merge_commits_with_tags
+from git_objects import Repository, apply_delta, find_git_dir, parse_object
+from merge_commits_with_tags import (
+    build_tag_index,
+    dora_metrics_for_range,
+    get_first_commit_time,
+    get_merge_commits,
+    use_backend,
+)
+
+
+def run_git(cmd, cwd, stamp=None, input=None):
+    env = None
+    if stamp:
+        env = {**os.environ, "GIT_AUTHOR_DATE": stamp, "GIT_COMMITTER_DATE": stamp}
+    result = subprocess.run(
+        ["git"] + cmd, cwd=cwd, capture_output=True, env=env, input=input
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Git command failed: {' '.join(cmd)}\n{result.stderr}")
+    return result.stdout
+
+
+def build_fixture(path):
+    """A history with merges, skewed clocks, tags and growing files."""
+    run_git(["init", "-b", "master"], path)
+    run_git(["config", "user.email", "test@example.com"], path)
+    run_git(["config", "user.name", "Test User"], path)
+    run_git(["commit", "--allow-empty", "-m", "Initial"], path, stamp="2023-12-31T08:00:00")
+    lines = []
+    for day in range(1, 13):
+        branch = f"feature-{day}"
+        run_git(["checkout", "-b", branch], path)
+        for hour in (8, 10):
+            lines.append(f"{branch} line {hour} " * 20)
+            (path / "file.txt").write_text("\n".join(lines) + "\n")
+            run_git(["add", "file.txt"], path)
+            # Every third branch was committed with a clock running behind
+            stamp_day = day - 1 if day % 3 == 0 and day > 1 else day
+            run_git(
+                ["commit", "-m", f"Work on {branch}\n\nDetails of {branch}"],
+                path,
+                stamp=f"2024-01-{stamp_day:02d}T{hour:02d}:00:00",
+            )
+        run_git(["checkout", "master"], path)
+        run_git(
+            ["merge", "--no-ff", branch, "-m", f"Merge {branch}\ninto master"],
+            path,
+            stamp=f"2024-01-{day:02d}T12:00:00",
+        )
+        if day % 2:
+            run_git(["tag", f"build-{day}"], path)
+        elif day % 4 == 0:
+            run_git(["tag", "-a", f"build-{day}", "-m", f"Build {day}"], path)
+    run_git(["tag", "-a", "release", "-m", "Release", "build-8"], path)
+    return path
+
+
+@pytest.fixture(params=["loose", "packed", "ref-delta", "commit-graph", "split-graph"])
+def fixture_repo(request, tmp_path):
+    path = build_fixture(tmp_path)
+    layout = request.param
+    if layout != "loose":
+        if layout == "ref-delta":
+            run_git(["config", "repack.useDeltaBaseOffset", "false"], path)
+        run_git(["gc", "--aggressive", "--prune=now"], path)
+        run_git(["pack-refs", "--all"], path)
+    if layout == "commit-graph":
+        run_git(["commit-graph", "write", "--reachable"], path)
+    if layout == "split-graph":
+        run_git(["commit-graph", "write", "--reachable", "--split"], path)
+        run_git(["commit", "--allow-empty", "-m", "Later"], path)
+        run_git(["commit-graph", "write", "--reachable", "--split=no-merge"], path)
+    return path
+
+
+@pytest.fixture
+def python_backend():
+    use_backend("python")
+    yield
+    use_backend("git")
+    merge_commits_with_tags.close_git_sessions()
+
+
+def test_read_matches_git(fixture_repo):
+    listing = run_git(
+        ["cat-file", "--batch-all-objects", "--batch-check"], fixture_repo
+    ).decode()
+    with Repository(str(fixture_repo)) as repository:
+        for line in listing.splitlines():
+            oid, object_type, _ = line.split()
+            content = run_git(["cat-file", object_type, oid], fixture_repo)
+            assert repository.read(oid) == (object_type, content)
+        with pytest.raises(KeyError):
+            repository.read("0" * 40)
+
+
+def test_commits_match_git(fixture_repo):
+    listing = run_git(
+        ["rev-list", "--all", "--parents", "--timestamp"], fixture_repo
+    ).decode()
+    with Repository(str(fixture_repo)) as repository:
+        for line in listing.splitlines():
+            timestamp, oid, *parents = line.split()
+            assert repository.commit(oid) == (int(timestamp), tuple(parents))
+            subject = run_git(["log", "-1", "--format=%s", oid], fixture_repo)
+            commit = parse_object(oid, *repository.read(oid))
+            assert commit.subject == subject.decode().rstrip("\n")
+
+
+def test_resolve_matches_git(fixture_repo):
+    refs = run_git(["for-each-ref", "--format=%(refname)"], fixture_repo).decode()
+    revisions = ["HEAD", "master", "build-3", "tags/build-4", "release"]
+    revisions += refs.split()
+    with Repository(str(fixture_repo)) as repository:
+        for rev in revisions:
+            for suffix in ("", "^{}", "^{commit}"):
+                expected = run_git(["rev-parse", f"{rev}{suffix}"], fixture_repo)
+                assert repository.resolve(rev + suffix) == expected.decode().strip()
+        assert repository.resolve("no-such-branch") is None
+        head = run_git(["rev-parse", "HEAD"], fixture_repo).decode().strip()
+        assert repository.resolve(head) == head
+
+
+def test_backends_agree(fixture_repo, python_backend):
+    repo = str(fixture_repo)
+    log = logging.getLogger("dora-metrics")
+    windows = [("", ""), ("2024-01-03T00:00:00", ""), ("", "2024-01-07T12:00:00")]
+    use_backend("git")
+    expected_tags = build_tag_index(repo)
+    expected_merges = [get_merge_commits(repo, *w, "build-*") for w in windows]
+    expected_metrics = dora_metrics_for_range(
+        repo, "build-*", None, "2024-01-01T00:00:00", "2024-01-13T00:00:00", log, 1
+    )
+    expected_first = get_first_commit_time(repo, log)
+
+    use_backend("python")
+    assert build_tag_index(repo) == expected_tags
+    assert [get_merge_commits(repo, *w, "build-*") for w in windows] == expected_merges
+    assert (
+        dora_metrics_for_range(
+            repo, "build-*", None, "2024-01-01T00:00:00", "2024-01-13T00:00:00", log, 1
+        )
+        == expected_metrics
+    )
+    assert get_first_commit_time(repo, log) == expected_first
+
+
+def test_worktree(tmp_path):
+    (tmp_path / "main").mkdir()
+    repo = build_fixture(tmp_path / "main")
+    worktree = tmp_path / "worktree"
+    run_git(["worktree", "add", "-b", "side", str(worktree)], repo)
+    run_git(["commit", "--allow-empty", "-m", "Side"], worktree)
+    git_dir, common_dir = find_git_dir(str(worktree / "."))
+    assert common_dir == str(repo / ".git")
+    with Repository(str(worktree)) as repository:
+        for rev in ("HEAD", "side", "master"):
+            expected = run_git(["rev-parse", rev], worktree).decode().strip()
+            assert repository.resolve(rev) == expected
+
+
+def test_not_a_repository(tmp_path):
+    with pytest.raises(ValueError):
+        Repository(str(tmp_path))
+
+
+def test_apply_delta():
+    base = b"hello world"
+    # Sizes 11 -> 12, copy 6 bytes at offset 0, insert "there!"
+    delta = bytes([11, 12, 0x80 | 0x10, 6, 6]) + b"there!"
+    assert apply_delta(base, delta) == b"hello there!"
+    with pytest.raises(ValueError):
+        apply_delta(b"short", delta)
@@ -1,13 +1,48 @@
+import csv
+import json
+import os
 import subprocess
 import logging
+from datetime import datetime, timedelta
 import pytest
+import profiling
+import merge_commits_with_tags
 from merge_commits_with_tags import (
+    MERGE_SLICE_SIZE,
+    build_tag_index,
     get_merge_commits,
+    get_tags_for_commit,
+    parse_nul_records,
+    iter_lines,
+    iter_nul_records,
+    iter_merge_commits,
+    iter_merge_slices,
+    iter_interval_inputs,
+    stream_git,
     classify_tag_state,
     classify_merge_states,
+    calculate_lead_time,
     calculate_lead_times,
     aggregate_dora_metrics,
+    collect_repositories,
+    combine_interval_inputs,
+    load_manifest,
+    dora_metrics_for_intervals,
+    dora_metrics_for_range,
+    generate_intervals,
+    get_first_commit_time_of_branch,
+    git_session,
+    load_commit_graph,
+    prepare_repository,
+    use_generation_walks,
+    CommitCache,
+    cache_path,
+    CommitGraph,
+    GitSession,
+    close_git_sessions,
+    use_backend,
 )
+from benchmarks.git_fixture import build_repository
 
 
 @pytest.fixture(autouse=True, scope="session")
@@ -53,14 +88,75 @@ class TestClassifyTagState:
             prev_state = state if state != "recovery" else "success"
         assert states == ["failed", "recovery", "success"]
 
+    def test_tag_index_lookup(self):
+        tag_index = {"a" * 40: ["build-1", "release-1"]}
+        assert classify_tag_state(None, "build-*", "failed", "a" * 40, tag_index) == "recovery"
+        assert classify_tag_state(None, "build-*", "success", "b" * 40, tag_index) == "failed"
 
-def run_git(cmd, cwd):
-    result = subprocess.run(["git"] + cmd, cwd=cwd, capture_output=True, text=True)
+
+def test_parse_nul_records():
+    output = "abc\x00100\x00Merge a|b\x00def\x00200\x00"
+    assert list(parse_nul_records(output, 3)) == [
+        ["abc", "100", "Merge a|b"],
+        ["def", "200", ""],
+    ]
+
+
+def test_parse_nul_records_empty():
+    assert list(parse_nul_records("", 3)) == []
+
+
+def test_parse_nul_records_incomplete_record():
+    assert list(parse_nul_records("abc\x00100\x00Merge\x00def", 3)) == [
+        ["abc", "100", "Merge"],
+    ]
+
+
+def test_iter_nul_records_across_chunks():
+    chunks = iter(["ab", "c\x001", "00\x00Mer", "ge\x00", "def\x00200\x00", "x"])
+    assert list(iter_nul_records(chunks, 3)) == [
+        ["abc", "100", "Merge"],
+        ["def", "200", "x"],
+    ]
+
+
+def test_iter_nul_records_terminated():
+    chunks = iter(["abc\x00100\x00Merge\x00", "def\x00200\x00x\x00"])
+    assert list(iter_nul_records(chunks, 3)) == [
+        ["abc", "100", "Merge"],
+        ["def", "200", "x"],
+    ]
+
+
+def test_iter_lines_across_chunks():
+    assert list(iter_lines(iter(["one\ntw", "o\n", "three"]))) == [
+        "one",
+        "two",
+        "three",
+    ]
+
+
+def run_git(cmd, cwd, env=None):
+    result = subprocess.run(
+        ["git"] + cmd,
+        cwd=cwd,
+        capture_output=True,
+        text=True,
+        env={**os.environ, **env} if env else None,
+    )
     if result.returncode != 0:
         raise RuntimeError(f"Git command failed: {' '.join(cmd)}\n{result.stderr}")
     return result.stdout.strip()
 
 
+def git_branch_root_time(repo, merge):
+    """Branch root time of a merge as plain git commands report it."""
+    parents = run_git(["rev-list", "--parents", "-n", "1", merge], repo).split()
+    branch = run_git(["rev-list", "--reverse", parents[2], f"^{parents[1]}"], repo)
+    root = branch.split()[0]
+    return int(run_git(["show", "-s", "--format=%ct", root], repo))
+
+
 def create_feature(tempdir, faker):
     branch_name = faker.word()
     file_name = faker.file_name(extension="txt")
@@ -76,6 +172,18 @@ def create_feature(tempdir, faker):
     run_git(["merge", "--no-ff", branch_name, "-m", f"Merge {branch_name}"], tempdir)
 
 
+@pytest.fixture
+def git_repo(tmp_path):
+    run_git(["init", "-b", "master"], tmp_path)
+    run_git(["config", "user.email", "test@example.com"], tmp_path)
+    run_git(["config", "user.name", "Test User"], tmp_path)
+    with open(tmp_path / "file.txt", "w") as f:
+        f.write("init\n")
+    run_git(["add", "file.txt"], tmp_path)
+    run_git(["commit", "-m", "Initial commit"], tmp_path)
+    return tmp_path
+
+
 @pytest.fixture
 def good_feature(faker):
     def _good_feature(tempdir, tag_name):
@@ -125,6 +233,488 @@ def test_pipeline_tag_classification_integration(tmp_path, good_feature, bad_fea
     assert states == ["failed", "recovery", "success"]
 
 
+def test_build_tag_index(git_repo, bad_feature):
+    bad_feature(git_repo)
+    run_git(["tag", "build-1"], git_repo)
+    run_git(["tag", "-a", "release-1", "-m", "Release 1"], git_repo)
+    bad_feature(git_repo)
+    run_git(["tag", "-a", "build-2", "-m", "Build 2"], git_repo)
+    bad_feature(git_repo)
+
+    tag_index = build_tag_index(str(git_repo))
+
+    merges = run_git(["log", "--merges", "--reverse", "--format=%H"], git_repo).split()
+    assert tag_index == {
+        merges[0]: ["build-1", "release-1"],
+        merges[1]: ["build-2"],
+    }
+    for merge in merges:
+        assert tag_index.get(merge, []) == get_tags_for_commit(str(git_repo), merge)
+
+
+def test_get_merge_commits_uses_tag_index(git_repo, bad_feature):
+    bad_feature(git_repo)
+    merge = run_git(["rev-parse", "HEAD"], git_repo)
+
+    merges = get_merge_commits(
+        str(git_repo), "", "", "build-*", tag_index={merge: ["build-7", "other"]}
+    )
+
+    assert [m["tags"] for m in merges] == [["build-7"]]
+
+
+def test_dora_metrics_for_intervals_matches_ranges(git_repo, dated_merge):
+    log = logging.getLogger("dora-metrics")
+
+    dated_merge("2024-01-01T09:00:00", "one", "build-1")
+    dated_merge("2024-01-01T15:00:00", "two")
+    dated_merge("2024-01-02T00:00:00", "three", "build-3")  # on the boundary
+    dated_merge("2024-01-02T10:00:00", "four", "build-4")
+    dated_merge("2024-01-03T08:00:00", "five")
+    dated_merge("2024-01-03T20:00:00", "six", "build-6")
+
+    intervals = generate_intervals(
+        datetime(2024, 1, 1), datetime(2024, 1, 4), 1, 3, log
+    )
+    assert len(intervals) == 3
+
+    actual = dora_metrics_for_intervals(
+        str(git_repo), "build-*", None, intervals, log, 1
+    )
+
+    expected = [
+        dora_metrics_for_range(
+            str(git_repo),
+            "build-*",
+            None,
+            start.strftime("%Y-%m-%dT%H:%M:%S"),
+            end.strftime("%Y-%m-%dT%H:%M:%S"),
+            log,
+            1,
+        )
+        for start, end in intervals
+    ]
+    assert actual == expected
+    assert [m["total_merges"] for m in actual] == [3, 2, 2]
+
+
+@pytest.fixture
+def dated_merge(git_repo):
+    def _dated_merge(stamp, name, tag=None):
+        env = {"GIT_AUTHOR_DATE": stamp, "GIT_COMMITTER_DATE": stamp}
+        run_git(["checkout", "-b", name], git_repo, env)
+        run_git(["commit", "--allow-empty", "-m", name], git_repo, env)
+        run_git(["checkout", "master"], git_repo, env)
+        run_git(["merge", "--no-ff", name, "-m", f"Merge {name}"], git_repo, env)
+        if tag:
+            run_git(["tag", tag], git_repo)
+        return run_git(["rev-parse", "HEAD"], git_repo)
+
+    return _dated_merge
+
+
+@pytest.mark.parametrize("slice_size", [MERGE_SLICE_SIZE, 1])
+def test_dora_metrics_for_intervals_skewed_clock(git_repo, dated_merge, slice_size):
+    """
+    Test that a merge git lists after newer ones, because its commit clock
+    was behind, still counts in its interval, in the order git lists it,
+    whether it is read in the same slice as the newer ones or not.
+
+    Per-range ``git log --since`` stops at the first commit older than the
+    range, so the reference is the window's listing split by timestamp.
+    """
+    log = logging.getLogger("dora-metrics")
+    dated_merge("2024-01-01T09:00:00", "one")
+    dated_merge("2024-01-03T09:00:00", "two")
+    dated_merge("2024-01-01T12:00:00", "skewed", "build-2")
+    dated_merge("2024-01-03T12:00:00", "three", "build-3")
+    intervals = generate_intervals(
+        datetime(2024, 1, 1), datetime(2024, 1, 4), 1, 3, log
+    )
+    window = get_merge_commits(
+        str(git_repo),
+        intervals[0][0].strftime("%Y-%m-%dT%H:%M:%S"),
+        intervals[-1][1].strftime("%Y-%m-%dT%H:%M:%S"),
+        "build-*",
+    )
+    listed = [m["timestamp"] for m in window]
+    assert listed != sorted(listed)
+
+    actual = dora_metrics_for_intervals(
+        str(git_repo), "build-*", None, intervals, log, 1, slice_size=slice_size
+    )
+
+    lead_times = {m["hash"]: calculate_lead_time(m, str(git_repo), log) for m in window}
+    expected = []
+    for start, end in intervals:
+        merges = [m for m in window if start.timestamp() <= m["timestamp"] <= end.timestamp()]
+        states, times, recovery_times = classify_merge_states(merges, "build-*", log)
+        expected.append(
+            aggregate_dora_metrics(
+                states,
+                times,
+                recovery_times,
+                [lead_times[m["hash"]] for m in merges if lead_times[m["hash"]] is not None],
+                1,
+            )
+        )
+    assert actual == expected
+    assert [m["total_merges"] for m in actual] == [2, 0, 2]
+    # The skewed merge recovers the failure before it
+    assert actual[0]["mttr"] == 3 * 3600
+
+
+def test_commit_cache_matches_git(git_repo, dated_merge, tmp_path_factory):
+    dated_merge("2024-01-01T09:00:00", "one", "build-1")
+    dated_merge("2024-01-02T09:00:00", "two")
+    dated_merge("2024-01-03T09:00:00", "three", "build-3")
+    cache = CommitCache(str(tmp_path_factory.mktemp("cache")), str(git_repo))
+
+    for since, until in [("", ""), ("2024-01-02", ""), ("2024-01-01", "2024-01-02T12:00:00")]:
+        assert cache.merge_commits(since, until, "build-*") == get_merge_commits(
+            str(git_repo), since, until, "build-*"
+        )
+    for merge in run_git(["rev-list", "--merges", "HEAD"], git_repo).split():
+        assert cache.branch_root_time(merge) == git_branch_root_time(git_repo, merge)
+    cache.close()
+
+
+def test_commit_cache_incremental_refresh(
+    git_repo, dated_merge, tmp_path_factory, monkeypatch
+):
+    cache_dir = str(tmp_path_factory.mktemp("cache"))
+    first = dated_merge("2024-01-01T09:00:00", "one", "build-1")
+    cache = CommitCache(cache_dir, str(git_repo))
+    assert [m["hash"] for m in cache.merge_commits("", "")] == [first]
+    cache.branch_root_time(first)
+    cache.close()
+
+    second = dated_merge("2024-01-02T09:00:00", "two")
+    cache = CommitCache(cache_dir, str(git_repo))
+    assert [m["hash"] for m in cache.merge_commits("", "")] == [first, second]
+    (count,) = cache.db.execute("SELECT COUNT(*) FROM commits").fetchone()
+    assert count == 5
+    cache.close()
+
+    # Nothing new: no commits are read and stored branch roots are reused
+    def fail(*args, **kwargs):
+        raise AssertionError("unexpected history read")
+
+    monkeypatch.setattr(CommitCache, "_load_commits", fail)
+    monkeypatch.setattr(CommitGraph, "branch_root_time", fail)
+    cache = CommitCache(cache_dir, str(git_repo))
+    assert [m["hash"] for m in cache.merge_commits("", "")] == [first, second]
+    assert cache.branch_root_time(first) == git_branch_root_time(git_repo, first)
+    cache.close()
+
+
+def test_commit_cache_tag_changes(git_repo, dated_merge, tmp_path_factory):
+    cache_dir = str(tmp_path_factory.mktemp("cache"))
+    first = dated_merge("2024-01-01T09:00:00", "one", "build-1")
+    second = dated_merge("2024-01-02T09:00:00", "two")
+    cache = CommitCache(cache_dir, str(git_repo))
+    assert [m["tags"] for m in cache.merge_commits("", "")] == [["build-1"], []]
+    cache.close()
+
+    run_git(["tag", "-d", "build-1"], git_repo)
+    run_git(["tag", "-a", "build-2", "-m", "Build 2", second], git_repo)
+    cache = CommitCache(cache_dir, str(git_repo))
+    assert [m["tags"] for m in cache.merge_commits("", "")] == [[], ["build-2"]]
+    assert dict(cache.db.execute("SELECT name, oid FROM tags")) == {"build-2": second}
+    cache.close()
+
+
+def test_get_merge_commits_falls_back_without_cacheable_history(
+    git_repo, dated_merge, tmp_path_factory
+):
+    merge = dated_merge("2024-01-01T09:00:00", "one", "build-1")
+    cache = CommitCache(str(tmp_path_factory.mktemp("cache")), str(git_repo))
+
+    merges = get_merge_commits(str(git_repo), "", "", branch="missing", cache=cache)
+
+    assert merges == []
+    cache.close()
+
+
+def test_load_manifest(tmp_path):
+    manifest = tmp_path / "manifest.json"
+    manifest.write_text(
+        json.dumps(["service-a", {"path": "service-b", "branch": "main", "tag": "v*"}])
+    )
+
+    assert load_manifest(str(manifest), tag="build-*") == [
+        {"path": str(tmp_path / "service-a"), "branch": None, "tag": "build-*"},
+        {"path": str(tmp_path / "service-b"), "branch": "main", "tag": "v*"},
+    ]
+
+
+def test_load_manifest_paths(tmp_path):
+    manifest = tmp_path / "manifests" / "manifest.json"
+    manifest.parent.mkdir()
+    manifest.write_text(json.dumps(["../service-a", "/srv/service-b", "../service-a"]))
+
+    assert [r["path"] for r in load_manifest(str(manifest), tag="build-*")] == [
+        str(tmp_path / "manifests" / "../service-a"),
+        "/srv/service-b",
+        str(tmp_path / "manifests" / "../service-a"),
+    ]
+
+
+def test_load_manifest_without_path(tmp_path):
+    manifest = tmp_path / "manifest.json"
+    manifest.write_text(json.dumps([{"branch": "main"}]))
+
+    with pytest.raises(ValueError, match="Manifest entry without a path"):
+        load_manifest(str(manifest))
+
+
+def test_combine_interval_inputs():
+    repo_a = [(["failed", "recovery"], [300], [100], [50]), ([], [], [], [])]
+    repo_b = [(["success"], [200], [], [10]), (["failed"], [], [], [])]
+
+    assert combine_interval_inputs([repo_a, repo_b]) == [
+        (["failed", "recovery", "success"], [200, 300], [100], [50, 10]),
+        (["failed"], [], [], []),
+    ]
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_collect_repositories_isolates_failures(git_repo, dated_merge, tmp_path, jobs):
+    log = logging.getLogger("dora-metrics")
+    dated_merge("2024-01-01T09:00:00", "one", "build-1")
+    dated_merge("2024-01-01T10:00:00", "two")
+    intervals = [(datetime(2024, 1, 1), datetime(2024, 1, 2))]
+    repositories = [
+        {"path": str(tmp_path / "missing"), "branch": None, "tag": "build-*"},
+        {"path": str(git_repo), "branch": None, "tag": "build-*"},
+        {"path": str(git_repo), "branch": None, "tag": "none-*"},
+    ]
+
+    collected, failures = collect_repositories(repositories, intervals, None, jobs, 0, log)
+
+    assert list(failures) == [0]
+    assert isinstance(failures[0], ValueError)
+    assert sorted(collected) == [1, 2]
+    (states, times, recovery_times, lead_times), = collected[1]
+    assert states == ["recovery", "failed"]
+
+
+def test_main_manifest(git_repo, dated_merge, tmp_path_factory, script_runner):
+    dated_merge("2024-01-01T09:00:00", "one", "build-1")
+    dated_merge("2024-01-02T10:00:00", "two")
+    workdir = tmp_path_factory.mktemp("report")
+    manifest = workdir / "manifest.json"
+    manifest.write_text(json.dumps([str(git_repo), str(workdir / "missing")]))
+    csv_file = workdir / "report.csv"
+
+    result = script_runner.run(
+        [
+            "merge_commits_with_tags.py",
+            "--manifest", str(manifest),
+            "--tag", "build-*",
+            "--since", "2024-01-01",
+            "--until", "2024-01-03",
+            "--interval", "1d",
+            "--count", "2",
+            "--no-cache",
+            "--csv", str(csv_file),
+        ]
+    )
+
+    assert result.returncode == 1
+    assert "[2/2]" in result.stderr
+    assert f"Commit-graph of {git_repo}: missing" in result.stderr
+    rows = csv_file.read_text().splitlines()
+    assert rows[0].startswith("repository,interval_start,interval_end,")
+    assert [row.split(",")[:3] + [row.split(",")[8]] for row in rows[1:]] == [
+        [str(git_repo), "2024-01-01T00:00:00", "2024-01-02T00:00:00", "1"],
+        [str(git_repo), "2024-01-02T00:00:00", "2024-01-03T00:00:00", "1"],
+    ]
+
+
+def test_main_manifest_lists_a_repository_twice(
+    git_repo, dated_merge, tmp_path_factory, script_runner
+):
+    dated_merge("2024-01-01T09:00:00", "one", "build-1")
+    dated_merge("2024-01-02T10:00:00", "two", "release-1")
+    workdir = tmp_path_factory.mktemp("report")
+    manifest = workdir / "manifest.json"
+    path = os.path.relpath(git_repo, workdir)
+    manifest.write_text(
+        json.dumps([{"path": path, "tag": "build-*"}, {"path": path, "tag": "release-*"}])
+    )
+    csv_file = workdir / "report.csv"
+
+    result = script_runner.run(
+        [
+            "merge_commits_with_tags.py",
+            "--manifest", str(manifest),
+            "--since", "2024-01-01",
+            "--until", "2024-01-03",
+            "--interval", "2d",
+            "--count", "1",
+            "--csv", str(csv_file),
+        ]
+    )
+
+    assert result.returncode == 0
+    with open(csv_file) as f:
+        rows = list(csv.DictReader(f))
+    assert [row["repository"] for row in rows] == [
+        str(workdir / path), str(workdir / path), "combined"
+    ]
+    assert [float(row["deployment_count"]) for row in rows] == [1, 1, 2]
+
+
+def test_main_cache_is_opt_in(
+    git_repo, dated_merge, tmp_path, monkeypatch, script_runner
+):
+    dated_merge("2024-01-01T09:00:00", "one", "build-1")
+    dated_merge("2024-01-02T10:00:00", "two")
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "xdg"))
+    cache_dir = tmp_path / "xdg" / "git-dora-report"
+
+    def report(*options):
+        csv_file = tmp_path / "report.csv"
+        result = script_runner.run(
+            [
+                "merge_commits_with_tags.py",
+                str(git_repo),
+                "--tag", "build-*",
+                "--since", "2024-01-01",
+                "--until", "2024-01-03",
+                "--interval", "1d",
+                "--count", "2",
+                "--csv", str(csv_file),
+                *options,
+            ]
+        )
+        assert result.returncode == 0
+        return csv_file.read_text()
+
+    uncached = report()
+    assert not cache_dir.exists()
+    assert report("--cache", "--no-cache") == uncached
+    assert not cache_dir.exists()
+
+    assert report("--cache") == uncached
+    assert [path.suffix for path in cache_dir.iterdir()] == [".sqlite3"]
+    assert report("--cache-dir", str(tmp_path / "other")) == uncached
+    assert len(list((tmp_path / "other").iterdir())) == 1
+
+
+def test_cache_path_per_repository(tmp_path):
+    one = cache_path(str(tmp_path), "/work/one/.git")
+    assert os.path.basename(one).startswith("one-")
+    assert cache_path(str(tmp_path), "/work/one/.git") == one
+    assert cache_path(str(tmp_path), "/other/one/.git") != one
+    assert os.path.basename(cache_path(str(tmp_path), "/srv/two.git")).startswith(
+        "two.git-"
+    )
+
+
+def test_main_rolling_averages(git_repo, dated_merge, tmp_path, script_runner):
+    dated_merge("2024-01-01T09:00:00", "one", "build-1")
+    dated_merge("2024-01-02T10:00:00", "two", "build-2")
+    dated_merge("2024-01-03T10:00:00", "three")
+    csv_file = tmp_path / "report.csv"
+
+    result = script_runner.run(
+        [
+            "merge_commits_with_tags.py",
+            str(git_repo),
+            "--tag", "build-*",
+            "--since", "2024-01-01",
+            "--until", "2024-01-04",
+            "--interval", "1d",
+            "--count", "3",
+            "--no-cache",
+            "--ma", "2,3",
+            "--ema", "2",
+            "--csv", str(csv_file),
+        ]
+    )
+
+    assert result.returncode == 0
+    with open(csv_file) as f:
+        rows = list(csv.DictReader(f))
+    assert [float(row["total_merges"]) for row in rows] == [1, 1, 1]
+    assert [float(row["ma2_change_failure_rate"]) for row in rows] == [0, 0, 0.5]
+    assert [float(row["ma3_change_failure_rate"]) for row in rows] == [0, 0, 1 / 3]
+    assert [float(row["ema2_change_failure_rate"]) for row in rows] == [0, 0, 2 / 3]
+    assert "MA2 mttr" in result.stdout
+
+
+def test_aggregate_dora_metrics_single_deployment():
+    metrics = aggregate_dora_metrics(["failed", "recovery"], [200], [100], [], 1)
+    assert metrics["deployment_frequency"] == 0
+    assert metrics["deployment_count"] == 1
+
+
+def test_stream_git(git_repo, bad_feature):
+    bad_feature(git_repo)
+    bad_feature(git_repo)
+    cmd = ["git", "-C", str(git_repo), "rev-list", "HEAD"]
+
+    assert "".join(stream_git(cmd)).split() == run_git(["rev-list", "HEAD"], git_repo).split()
+
+    # Stopping early terminates git without raising
+    chunks = stream_git(cmd)
+    assert next(chunks)
+    chunks.close()
+
+
+def test_iter_merge_commits_is_lazy(git_repo, bad_feature):
+    bad_feature(git_repo)
+    bad_feature(git_repo)
+
+    merges = iter_merge_commits(str(git_repo), "", "", tag_index={})
+
+    assert next(merges)["subject"].startswith("Merge ")
+    assert list(merges)[0]["subject"].startswith("Merge ")
+
+
+def test_git_session_reads_objects(git_repo, bad_feature):
+    bad_feature(git_repo)
+    run_git(["tag", "-a", "build-1", "-m", "Build 1"], git_repo)
+    merge = run_git(["rev-parse", "HEAD"], git_repo)
+    parents = run_git(["rev-list", "--parents", "-n", "1", merge], git_repo).split()[1:]
+    times = run_git(["show", "-s", "--format=%at %ct", merge], git_repo).split()
+
+    with GitSession(str(git_repo)) as session:
+        assert session.resolve("HEAD^{commit}") == merge
+        assert session.resolve("no-such-ref") is None
+        commit, missing, tag = session.read_objects([merge, "0" * 40, "build-1"])
+        assert commit.type == "commit"
+        assert list(commit.parents) == parents
+        assert [commit.author_time, commit.committer_time] == [int(t) for t in times]
+        assert missing is None
+        assert (tag.type, tag.target, tag.tag) == ("tag", merge, "build-1")
+        assert tag.tagger_time is not None
+    assert session.closed
+
+
+def test_git_session_closes_commit_graph(git_repo, bad_feature):
+    bad_feature(git_repo)
+    run_git(["commit-graph", "write", "--reachable"], git_repo)
+
+    with GitSession(str(git_repo)) as session:
+        layers = session.commit_graph.layers
+    assert session.commit_graph is None
+    assert all(layer.data.closed for layer in layers)
+
+
+def test_git_session_is_shared(git_repo, bad_feature):
+    bad_feature(git_repo)
+    session = git_session(str(git_repo))
+    assert git_session(str(git_repo)) is session
+    # The session graph loads commits lazily while walking
+    head = run_git(["rev-parse", "HEAD"], git_repo)
+    assert list(session.graph.walk(head)) == run_git(["rev-list", "HEAD"], git_repo).split()
+    session.close()
+    assert git_session(str(git_repo)) is not session
+
+
 def test_classify_merge_states_basic():
     merges = [
         {"tags": [], "timestamp": 100},
@@ -152,6 +742,125 @@ def test_calculate_lead_times(monkeypatch):
     lead_times = calculate_lead_times(merges, repo="irrelevant", log=None)
     assert lead_times == [100, 50]
 
+
+@pytest.fixture
+def commit_graph():
+    # a - b ------- m1 - m2
+    #      \       /    /
+    #       c1 - c2    /
+    #         \       /
+    #          d1 ---
+    graph = CommitGraph()
+    graph.add_commit("a", 100, [])
+    graph.add_commit("b", 200, ["a"])
+    graph.add_commit("c1", 300, ["b"])
+    graph.add_commit("c2", 400, ["c1"])
+    graph.add_commit("d1", 450, ["c1"])
+    graph.add_commit("m1", 500, ["b", "c2"])
+    graph.add_commit("m2", 600, ["m1", "d1"])
+    return graph
+
+
+def test_commit_graph_branch_root_time(commit_graph):
+    assert commit_graph.branch_root_time("m1") == 300
+    assert commit_graph.branch_root_time("m2") == 450
+    assert commit_graph.branch_root_time("c2") is None
+
+
+def test_commit_graph_missing_history():
+    graph = CommitGraph()
+    graph.add_commit("m", 500, ["b", "c"])
+    with pytest.raises(KeyError):
+        graph.branch_root_time("m")
+
+
+def test_calculate_lead_times_commit_graph(monkeypatch, commit_graph):
+    merges = [
+        {"hash": "m1", "timestamp": 500},
+        {"hash": "m2", "timestamp": 600},
+        {"hash": "unknown", "timestamp": 700},
+    ]
+    monkeypatch.setattr(
+        "merge_commits_with_tags.get_first_commit_time_of_branch",
+        lambda repo, h, log=None: 650,
+    )
+    lead_times = calculate_lead_times(
+        merges, repo="irrelevant", log=None, commit_graph=commit_graph
+    )
+    assert lead_times == [200, 150, 50]
+
+
+@pytest.fixture
+def generation_walks():
+    use_generation_walks(True)
+    yield
+    use_generation_walks(False)
+    close_git_sessions()
+
+
+@pytest.mark.parametrize(
+    "write_commit_graph, walks",
+    [(False, "date_walks"), (True, "date_walks"), (True, "generation_walks")],
+)
+def test_commit_graph_matches_git(git_repo, bad_feature, request, write_commit_graph, walks):  # noqa: E501
+    if walks == "generation_walks":
+        request.getfixturevalue("generation_walks")
+    bad_feature(git_repo)
+    bad_feature(git_repo)
+    # A branch that merges master in before being merged back
+    run_git(["checkout", "-b", "long-lived"], git_repo)
+    run_git(["commit", "--allow-empty", "-m", "Start long-lived"], git_repo)
+    bad_feature(git_repo)
+    run_git(["checkout", "long-lived"], git_repo)
+    run_git(["merge", "--no-ff", "master", "-m", "Merge master"], git_repo)
+    run_git(["checkout", "master"], git_repo)
+    run_git(["merge", "--no-ff", "long-lived", "-m", "Merge long-lived"], git_repo)
+    preparation = prepare_repository(str(git_repo), write_commit_graph)
+    assert preparation["commit_graph"] == ("written" if write_commit_graph else "missing")
+
+    graph = load_commit_graph(str(git_repo))
+
+    merges = run_git(["rev-list", "--merges", "HEAD"], git_repo).split()
+    assert len(merges) == 5
+    for merge in merges:
+        expected = git_branch_root_time(git_repo, merge)
+        assert graph.branch_root_time(merge) == expected
+        assert get_first_commit_time_of_branch(str(git_repo), merge) == expected
+    # A commit-graph alone does not change how branches are walked
+    assert graph.stats[walks] == 5
+
+
+def test_collect_repositories_writes_commit_graphs_in_workers(git_repo, bad_feature, tmp_path_factory):  # noqa: E501
+    bad_feature(git_repo)
+    other = tmp_path_factory.mktemp("other")
+    build_repository(str(other), merges=5)
+    repositories = [
+        {"path": path, "branch": "", "tag": "build-*"} for path in (str(git_repo), str(other))
+    ]
+    intervals = [(datetime(2000, 1, 1), datetime(2030, 1, 1))]
+    walk_stats = {}
+
+    collected, failures = collect_repositories(
+        repositories, intervals, None, 2, 0, logging.getLogger("dora-metrics"), walk_stats, True
+    )
+
+    assert not failures
+    assert [walk_stats[index]["preparation"]["commit_graph"] for index in (0, 1)] == [
+        "written", "written"
+    ]
+    assert prepare_repository(str(other))["commit_graph"] == "present"
+
+
+def test_prepare_repository_stale_commit_graph(git_repo, bad_feature):
+    bad_feature(git_repo)
+    assert prepare_repository(str(git_repo), True)["commit_graph"] == "written"
+    assert prepare_repository(str(git_repo))["commit_graph"] == "present"
+    bad_feature(git_repo)
+    assert prepare_repository(str(git_repo))["commit_graph"] == "stale"
+    assert prepare_repository(str(git_repo), True)["commit_graph"] == "written"
+    assert prepare_repository(str(git_repo / "missing"))["commit_graph"] == "missing"
+
+
 def test_deployment_frequency_single_day():
     states = ["success", "success", "success"]  # Three deployments
     times = [0, 86400]  # Interval: One day (start and end timestamps)
@@ -204,3 +913,184 @@ def test_aggregate_dora_metrics():
     assert metrics["deployment_frequency"] == 2 / ((300 - 200) / 86400)
     assert metrics["mttr"] == 100
     assert metrics["mean_lead_time"] == 75
+
+
+FIXTURE_OPTIONS = {"merges": 300, "seed": 7, "branch_length": (1, 6), "other_tag_ratio": 0.5}
+
+
+@pytest.fixture(
+    scope="module",
+    params=[(False, 0.0), (True, 0.0), (False, 0.3), (True, 0.3)],
+    ids=["plain", "commit_graph", "skew", "commit_graph-skew"],
+)
+def fixture_history(request, tmp_path_factory):
+    """
+    A fast-import repository of 300 merges and the merges it should have,
+    with or without a commit-graph and back-dated branches.
+    """
+    commit_graph, skew = request.param
+    path = tmp_path_factory.mktemp("fixture")
+    expected = build_repository(
+        str(path), commit_graph=commit_graph, skew=skew, **FIXTURE_OPTIONS
+    )
+    return str(path), expected
+
+
+@pytest.fixture(params=["git", "python"])
+def backend(request):
+    use_backend(request.param)
+    yield request.param
+    use_backend("git")
+    close_git_sessions()
+
+
+@pytest.mark.parametrize("skew", [0.0, 0.3])
+def test_fixture_is_deterministic(tmp_path, skew):
+    expected = build_repository(str(tmp_path / "one"), skew=skew, **FIXTURE_OPTIONS)
+    assert build_repository(str(tmp_path / "two"), skew=skew, **FIXTURE_OPTIONS) == expected  # noqa: E501
+    assert {merge["success"] for merge in expected} == {True, False}
+    assert any(tag.startswith("wip-") for merge in expected for tag in merge["tags"])
+    # Back-dated branches start before the merge they branch after
+    assert any(merge["skewed"] for merge in expected) == bool(skew)
+    assert all(
+        merge["branch_root_time"] < previous["timestamp"]
+        for previous, merge in zip(expected, expected[1:])
+        if merge["skewed"]
+    )
+
+
+def test_get_merge_commits_matches_fixture(fixture_history, backend):
+    repo, expected = fixture_history
+    merges = get_merge_commits(repo, "", "", "build-*")
+
+    assert [(m["hash"], m["timestamp"], m["tags"]) for m in merges] == [
+        (
+            merge["hash"],
+            merge["timestamp"],
+            [tag for tag in merge["tags"] if tag.startswith("build-")],
+        )
+        for merge in expected
+    ]
+
+
+def git_branch_root_times(repo, merges):
+    """The time of the first commit ``git rev-list --reverse`` lists per merge."""
+    return [
+        int(run_git(["rev-list", "--reverse", "--timestamp", f"{merge}^2", f"^{merge}^1"], repo).split()[0])  # noqa: E501
+        for merge in merges
+    ]
+
+
+@pytest.mark.parametrize("walks", [False, True], ids=["date_walks", "generation_walks"])
+def test_lead_times_match_fixture(fixture_history, backend, walks):
+    """
+    Test that the commit graph and the per-merge git walk find the first
+    commit of every merged branch, as git rev-list does.
+    """
+    repo, expected = fixture_history
+    log = logging.getLogger("dora-metrics")
+    use_generation_walks(walks)
+    try:
+        commit_graph = load_commit_graph(repo, log=log)
+        root_times = [commit_graph.branch_root_time(merge["hash"]) for merge in expected]
+        sample = expected[::10] + [merge for merge in expected if merge["skewed"]][:10]
+        walked = [get_first_commit_time_of_branch(repo, merge["hash"], log=log) for merge in sample]  # noqa: E501
+    finally:
+        use_generation_walks(False)
+        close_git_sessions()
+
+    assert [root_times[expected.index(merge)] for merge in sample] == git_branch_root_times(
+        repo, [merge["hash"] for merge in sample]
+    )
+    assert walked == git_branch_root_times(repo, [merge["hash"] for merge in sample])
+    # Back-dated branches are still listed whole, their first commit is the root
+    assert root_times == [merge["branch_root_time"] for merge in expected]
+
+
+@pytest.mark.parametrize("slice_size", [40, 30])
+def test_iter_merge_slices_match_git(fixture_history, backend, slice_size):
+    repo, expected = fixture_history
+    slices = list(iter_merge_slices(repo, "", "", "build-*", slice_size=slice_size))
+
+    assert len(slices) == -(-len(expected) // slice_size)
+    assert [end for end, _ in slices[:-1]] == sorted(end for end, _ in slices[:-1])
+    assert slices[-1][0] is None
+    for end, merges in slices[:-1]:
+        assert 0 < len(merges) <= slice_size
+        assert all(merge["timestamp"] < end for merge in merges)
+    listed = run_git(["log", "--merges", "--reverse", "--format=%H"], repo).split()
+    assert [merge["hash"] for _, merges in slices for merge in merges] == listed
+
+
+def test_iter_interval_inputs_yields_before_history_is_read(fixture_history, monkeypatch):
+    repo, expected = fixture_history
+    log = logging.getLogger("dora-metrics")
+    walks = []
+    records = merge_commits_with_tags.iter_merge_records
+
+    def recorded(*args, **kwargs):
+        walks.append(args)
+        return records(*args, **kwargs)
+
+    monkeypatch.setattr(merge_commits_with_tags, "iter_merge_records", recorded)
+    since = datetime.fromtimestamp(expected[0]["timestamp"]).replace(hour=0, minute=0, second=0)  # noqa: E501
+    days = (datetime.fromtimestamp(expected[-1]["timestamp"]) - since).days + 1
+    intervals = generate_intervals(since, since + timedelta(days=days), 1, days, log)
+    inputs = iter_interval_inputs(repo, "build-*", None, intervals, log, slice_size=40)
+
+    first = next(inputs)
+    assert len(walks) < len(expected) // 40
+    rest = list(inputs)
+    assert len(walks) == -(-len(expected) // 40)
+    assert sum(len(states) for states, _, _, _ in [first, *rest]) == len(expected)
+    reference = dora_metrics_for_intervals(repo, "build-*", None, intervals, log, 1)
+    assert [aggregate_dora_metrics(*i, 1) for i in [first, *rest]] == reference
+
+
+def test_main_profile(fixture_history, tmp_path, script_runner):
+    repo, expected = fixture_history
+    profile = tmp_path / "profile.json"
+    since = datetime.fromtimestamp(expected[0]["timestamp"]).strftime("%Y-%m-%d")
+    until = datetime.fromtimestamp(expected[-1]["timestamp"] + 86400).strftime("%Y-%m-%d")
+
+    result = script_runner.run(
+        [
+            "merge_commits_with_tags.py",
+            repo,
+            "--tag", "build-*",
+            "--since", since,
+            "--until", until,
+            "--no-cache",
+            "--profile-output", str(profile),
+        ]
+    )
+
+    assert result.returncode == 0
+    report = json.loads(profile.read_text())
+    assert report["counts"]["merges"] == len(expected)
+    assert {"prepare", "merges", "lead_times", "classify", "metrics"} <= set(report["stages"])
+    assert report["git"]["log"]["runs"] == 1
+    assert all(git["seconds"] > 0 for git in report["git"].values())
+
+
+def test_collect_repositories_merges_worker_profiles(fixture_history, git_repo, dated_merge):  # noqa: E501
+    repo, expected = fixture_history
+    dated_merge("2024-01-01T09:00:00", "one", "build-1")
+    repositories = [
+        {"path": path, "branch": "", "tag": "build-*"} for path in (repo, str(git_repo))
+    ]
+    intervals = [(datetime(2023, 1, 1), datetime(2025, 1, 1))]
+    log = logging.getLogger("dora-metrics")
+
+    profiler = profiling.start()
+    try:
+        collected, failures = collect_repositories(repositories, intervals, None, 2, 0, log)
+    finally:
+        profiling.stop()
+
+    assert not failures
+    assert profiler.counts["merges"] == len(expected) + 1
+    assert profiler.git["log"][0] == 2
+    # The parent only waited, the workers' stages are reported apart
+    assert "merges" not in profiler.stages
+    assert profiler.workers["prepare"][2] == 2
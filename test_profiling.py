@@ -0,0 +1,132 @@
+import json
+from itertools import count
+
+import pytest
+
+import profiling
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Both clocks advance one second per reading."""
+    ticks = count()
+    monkeypatch.setattr(profiling, "perf_counter", lambda: float(next(ticks)))
+    monkeypatch.setattr(profiling, "process_time", lambda: 0.0)
+
+
+@pytest.fixture
+def profiler():
+    profiler = profiling.start()
+    yield profiler
+    profiling.stop()
+
+
+def test_stages_are_exclusive(clock):
+    profiler = profiling.Profiler()
+    with profiler.stage("outer"):
+        with profiler.stage("inner"):
+            pass
+        with profiler.stage("inner"):
+            pass
+
+    assert profiler.stages == {"outer": [3.0, 0.0, 1], "inner": [2.0, 0.0, 2]}
+
+
+def test_iterate_charges_producing_items(clock):
+    profiler = profiling.Profiler()
+    items = []
+    with profiler.stage("consume"):
+        for item in profiler.iterate("produce", iter("abc"), "letters"):
+            items.append(item)
+
+    assert items == ["a", "b", "c"]
+    assert profiler.counts == {"letters": 3}
+    # The exhausting call is timed too
+    assert profiler.stages["produce"] == [4.0, 0.0, 3]
+    assert profiler.stages["consume"][0] == 5.0
+
+
+def test_report(clock):
+    profiler = profiling.Profiler()
+    profiler.count("events", 10)
+    profiler.git_command(["git", "-C", "repo", "log", "--merges"], 0.5)
+    profiler.git_command(["git", "log"], 0.25)
+    report = profiler.report()
+
+    assert report["wall_seconds"] == 2.0
+    assert report["counts"] == {"events": 10}
+    assert report["per_second"] == {"events": 5.0}
+    assert report["git"] == {"log": {"runs": 2, "seconds": 0.75}}
+
+
+def test_merge():
+    worker = profiling.Profiler()
+    with worker.stage("merges"):
+        worker.count("merges", 3)
+    worker.git_command(["git", "cat-file", "--batch"], 1.0)
+    profiler = profiling.Profiler()
+    profiler.count("merges", 2)
+
+    profiler.merge(worker.report())
+    profiler.merge(worker.report())
+
+    assert profiler.counts == {"merges": 8}
+    # Worker stages overlap the parent's, they are kept apart
+    assert profiler.stages == {}
+    assert profiler.workers["merges"][2] == 2
+    assert profiler.git == {"cat-file": [2, 2.0]}
+    report = profiler.report()
+    assert report["workers"]["merges"]["calls"] == 2
+    assert "Worker stage" in profiling.format_report(report)
+
+
+@pytest.mark.parametrize(
+    "cmd, name",
+    [
+        (["git", "log"], "log"),
+        (["git", "-C", "repo", "-c", "core.quotepath=off", "rev-list", "HEAD"], "rev-list"),
+        (["git", "--git-dir", "repo/.git", "--no-pager", "for-each-ref"], "for-each-ref"),
+        (["git", "--version"], "git"),
+    ],
+)
+def test_git_command_name(cmd, name):
+    assert profiling.git_command_name(cmd) == name
+
+
+def test_hooks_are_no_ops_when_off():
+    assert profiling.active() is None
+    items = [1, 2]
+
+    assert profiling.iterate("stage", items, "items") is items
+    with profiling.stage("stage"):
+        profiling.count("items")
+        profiling.git_command(["git", "log"], 1.0)
+    assert profiling.active() is None
+
+
+def test_hooks_record_when_on(profiler):
+    with profiling.stage("stage"):
+        assert list(profiling.iterate("items", [1, 2], "items")) == [1, 2]
+        profiling.git_command(["git", "log"], 1.0)
+
+    assert profiling.active() is profiler
+    assert profiler.counts == {"items": 2}
+    assert set(profiler.stages) == {"stage", "items"}
+    assert profiler.git == {"log": [1, 1.0]}
+
+
+def test_write(tmp_path, capsys):
+    profiler = profiling.Profiler()
+    with profiler.stage("metrics"):
+        profiler.count("events", 4)
+
+    profiling.write(profiler, "-")
+    text = capsys.readouterr().err
+    assert text.splitlines()[1].startswith("metrics")
+    assert "events: 4" in text
+
+    path = tmp_path / "profile.json"
+    profiling.write(profiler, str(path))
+    report = json.loads(path.read_text())
+    assert report["stages"]["metrics"]["calls"] == 1
+    assert report["counts"] == {"events": 4}
@@ -0,0 +1,93 @@
+import random
+from datetime import timedelta
+
+import pytest
+
+from merge_commits_with_tags import add_moving_averages
+from rolling import (
+    ExponentialMovingAverage,
+    RollingMean,
+    RollingStats,
+    add_rolling_fields,
+    parse_sizes,
+    rolling_field_names,
+)
+
+
+def naive_moving_averages(values, window):
+    """The moving average the report computed before, re-summing windows."""
+    result = []
+    for i in range(len(values)):
+        window_values = values[max(0, i - window + 1) : i + 1]
+        result.append(sum(window_values) / len(window_values))
+    return result
+
+
+@pytest.mark.parametrize("window", [1, 2, 3, 7, 50])
+def test_rolling_mean_matches_naive(window):
+    rng = random.Random(window)
+    values = [rng.choice([0, 0.5, rng.random() * 1000, rng.randint(0, 9)]) for _ in range(200)]
+    mean = RollingMean(window)
+    assert [mean.push(v) for v in values] == pytest.approx(
+        naive_moving_averages(values, window), rel=1e-9, abs=1e-9
+    )
+
+
+def test_rolling_mean_zero_window_is_exact():
+    mean = RollingMean(2)
+    for value in (0.1, 1e16, 0.3):
+        mean.push(value)
+    mean.push(0.0)
+    assert mean.push(0.0) == 0.0
+
+
+def test_rolling_mean_of_timedeltas():
+    mean = RollingMean(2)
+    pushed = [mean.push(timedelta(seconds=s)) for s in (10, 20, 40)]
+    assert pushed == [timedelta(seconds=10), timedelta(seconds=15), timedelta(seconds=30)]
+
+
+def test_exponential_moving_average():
+    ema = ExponentialMovingAverage(3)
+    assert [ema.push(v) for v in (4.0, 8.0, 8.0)] == [4.0, 6.0, 7.0]
+    ema = ExponentialMovingAverage(1)
+    assert [ema.push(v) for v in (4.0, 8.0)] == [4.0, 8.0]
+    ema = ExponentialMovingAverage(3)
+    assert ema.push(timedelta(seconds=4)) == timedelta(seconds=4)
+    assert ema.push(timedelta(seconds=8)) == timedelta(seconds=6)
+
+
+def test_invalid_sizes():
+    with pytest.raises(ValueError):
+        RollingMean(0)
+    with pytest.raises(ValueError):
+        ExponentialMovingAverage(0)
+    with pytest.raises(ValueError):
+        parse_sizes("3,0")
+    assert parse_sizes("3, 12") == [3, 12]
+
+
+def test_rolling_field_names():
+    assert list(rolling_field_names(["a", "b"], [3])) == ["ma_a", "ma_b"]
+    assert list(rolling_field_names(["a"], [3, 12], [5])) == ["ma3_a", "ma12_a", "ema5_a"]
+
+
+def test_add_rolling_fields():
+    rows = [{"a": float(i), "b": i * i} for i in range(20)]
+    names = add_rolling_fields(rows, ["a", "b"], windows=[2, 5], spans=[4])
+
+    assert names == ["ma2_a", "ma2_b", "ma5_a", "ma5_b", "ema4_a", "ema4_b"]
+    for field in ("a", "b"):
+        values = [row[field] for row in rows]
+        for window in (2, 5):
+            assert [row[f"ma{window}_{field}"] for row in rows] == pytest.approx(
+                naive_moving_averages(values, window)
+            )
+    stats = RollingStats(["a"], spans=[4])
+    assert [stats.push(row)["ema4_a"] for row in rows] == [row["ema4_a"] for row in rows]
+
+
+def test_add_moving_averages_keeps_names():
+    rows = [{"x": i} for i in range(6)]
+    add_moving_averages(rows, ["x"], 3)
+    assert [row["ma_x"] for row in rows] == naive_moving_averages(list(range(6)), 3)